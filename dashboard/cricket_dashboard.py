@@ -5,6 +5,13 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import sqlite3
 import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from result_cache import ResultCache, data_generation
+from dashboard_queries import DashboardQueries, FORMAT_OPTIONS
+from panel_cache import DB_PANEL_CACHE, read_panel_cache
 
 # Page configuration
 st.set_page_config(
@@ -64,36 +71,62 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Database connection
+# Get the absolute path to the database
+DB_PATH = os.path.join(os.getcwd(), "data", "cricket_data.db")
+PANEL_CACHE_PATH = os.path.join(os.getcwd(), DB_PANEL_CACHE)
+
+# One read-only connection per Streamlit process, shared by every session
+@st.cache_resource
+def get_queries():
+   conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False)
+   # Disk-only result cache: st.cache_data already keeps the panels in memory
+   return DashboardQueries(conn, ResultCache(DB_PATH, max_entries=0))
+
+# Per-filter panel data, filtered and aggregated in SQL; generation changes
+# whenever the tables are rebuilt or refreshed
 @st.cache_data
-def load_data():
-   import os
-   
-   # Get the absolute path to the database
-   current_dir = os.getcwd()
-   db_path = os.path.join(current_dir, "data", "cricket_data.db")
-   
-   if not os.path.exists(db_path):
-       st.error(f"Database not found at {db_path}")
-       return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-   
+def query_panel(panel, match_format, generation):
    try:
-       conn = sqlite3.connect(db_path)
-       
-       matches_df = pd.read_sql_query("SELECT * FROM matches", conn)
-       deliveries_df = pd.read_sql_query("SELECT * FROM deliveries", conn)
-       innings_df = pd.read_sql_query("SELECT * FROM innings", conn)
-       
-       conn.close()
-       
-       return matches_df, deliveries_df, innings_df
-       
+       return getattr(get_queries(), panel)(match_format)
    except Exception as e:
        st.error(f"Database error: {str(e)}")
-       return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+       return None
 
-# Load data
-matches_df, deliveries_df, innings_df = load_data()
+@st.cache_data
+def load_totals(generation):
+   return get_queries().totals()
+
+# Every panel of every format, prebuilt by scripts/panel_cache.py; None when
+# missing or built from an older generation
+@st.cache_resource
+def load_panel_cache(generation):
+   return read_panel_cache(PANEL_CACHE_PATH, generation)
+
+# Per-ball win probability of one match, looked up by its primary key
+@st.cache_data
+def load_win_probability(match_id, generation):
+   try:
+       return get_queries().win_probability(match_id)
+   except Exception as e:
+       st.error(f"Database error: {str(e)}")
+       return None
+
+def load_panel(panel, match_format, generation):
+   panel_cache = load_panel_cache(generation)
+   if panel_cache is not None:
+       return panel_cache['panels'][match_format][panel]
+   return query_panel(panel, match_format, generation)
+
+if not os.path.exists(DB_PATH):
+   st.error(f"Database not found at {DB_PATH}")
+   st.stop()
+
+generation = data_generation(DB_PATH)
+panel_cache = load_panel_cache(generation)
+if panel_cache is not None:
+   total_deliveries_db, total_matches_db = panel_cache['totals']
+else:
+   total_deliveries_db, total_matches_db = load_totals(generation)
 
 # Header
 st.title("Cricket Data Analytics Dashboard")
@@ -102,8 +135,8 @@ st.markdown("---")
 # Sidebar filters
 st.sidebar.header("Filters")
 
-if len(matches_df) > 0:
-   format_options = ["All", "tests", "odis", "t20s", "ipl"]
+if total_matches_db > 0:
+   format_options = FORMAT_OPTIONS
 else:
    format_options = ["All"]
 
@@ -115,16 +148,9 @@ format_filter = st.sidebar.selectbox(
 
 st.sidebar.write(f"Current filter: {format_filter}")
 
-# Filter data based on selection
-if format_filter != "All":
-   filtered_matches = matches_df[matches_df['format'] == format_filter]
-   match_ids = filtered_matches['match_id'].tolist()
-   filtered_deliveries = deliveries_df[deliveries_df['match_id'].isin(match_ids)]
-   filtered_innings = innings_df[innings_df['match_id'].isin(match_ids)]
-else:
-   filtered_matches = matches_df
-   filtered_deliveries = deliveries_df
-   filtered_innings = innings_df
+kpis = load_panel('kpis', format_filter, generation)
+if kpis is None:
+   st.stop()
 
 # Key Performance Indicators
 st.header("Key Performance Indicators")
@@ -132,24 +158,24 @@ st.header("Key Performance Indicators")
 col1, col2, col3, col4, col5 = st.columns(5)
 
 with col1:
-   total_matches = len(filtered_matches)
+   total_matches = kpis['total_matches']
    st.metric("Total Matches", f"{total_matches:,}")
 
 with col2:
-   total_deliveries = len(filtered_deliveries)
+   total_deliveries = kpis['total_deliveries']
    st.metric("Total Deliveries", f"{total_deliveries:,}")
 
 with col3:
-   total_runs = filtered_deliveries['total_runs'].sum()
+   total_runs = kpis['total_runs']
    st.metric("Total Runs", f"{total_runs:,}")
 
 with col4:
-   total_wickets = len(filtered_deliveries[filtered_deliveries['wicket_type'].notna()])
+   total_wickets = kpis['total_wickets']
    st.metric("Total Wickets", f"{total_wickets:,}")
 
 with col5:
-   if len(filtered_innings) > 0:
-       avg_score = filtered_innings['total_runs'].mean()
+   if kpis['avg_score'] is not None:
+       avg_score = kpis['avg_score']
        st.metric("Average Score", f"{avg_score:.1f}")
    else:
        st.metric("Average Score", "0")
@@ -161,13 +187,10 @@ col1, col2 = st.columns(2)
 
 with col1:
    st.subheader("Top 10 Run Scorers")
-   if len(filtered_deliveries) > 0:
-       top_batsmen = (filtered_deliveries.groupby('batter')['batter_runs']
-                      .sum().reset_index()
-                      .sort_values('batter_runs', ascending=False)
-                      .head(10))
+   if total_deliveries > 0:
+       top_batsmen = load_panel('top_run_scorers', format_filter, generation)
        
-       if len(top_batsmen) > 0:
+       if top_batsmen is not None and len(top_batsmen) > 0:
            fig1 = px.bar(top_batsmen, 
                          x='batter_runs', 
                          y='batter',
@@ -190,13 +213,9 @@ with col1:
 
 with col2:
    st.subheader("Top 10 Wicket Takers")
-   if len(filtered_deliveries) > 0:
-       wicket_data = filtered_deliveries[filtered_deliveries['wicket_type'].notna()]
-       if len(wicket_data) > 0:
-           top_bowlers = (wicket_data['bowler'].value_counts()
-                          .head(10).reset_index())
-           top_bowlers.columns = ['bowler', 'wickets']
-           
+   if total_deliveries > 0:
+       top_bowlers = load_panel('top_wicket_takers', format_filter, generation)
+       if top_bowlers is not None and len(top_bowlers) > 0:
            fig2 = px.bar(top_bowlers,
                          x='wickets',
                          y='bowler',
@@ -220,15 +239,8 @@ with col2:
 # Format comparison
 st.subheader("Performance by Format")
 
-if format_filter == "All" and len(matches_df) > 0:
-   format_data = innings_df.merge(matches_df[['match_id', 'format']], on='match_id')
-   format_stats = format_data.groupby('format').agg({
-       'total_runs': ['mean', 'max', 'count'],
-       'total_wickets': 'mean'
-   }).round(2)
-   
-   format_stats.columns = ['Avg Runs', 'Highest Score', 'Innings Played', 'Avg Wickets']
-   format_stats = format_stats.reset_index()
+if format_filter == "All" and total_matches_db > 0:
+   format_stats = load_panel('format_comparison', format_filter, generation)
    
    fig3 = px.bar(format_stats,
                  x='format',
@@ -250,13 +262,12 @@ col1, col2 = st.columns(2)
 
 with col1:
    st.subheader("Dismissal Types Distribution")
-   if len(filtered_deliveries) > 0:
-       wicket_types = (filtered_deliveries[filtered_deliveries['wicket_type'].notna()]
-                       ['wicket_type'].value_counts())
+   if total_deliveries > 0:
+       wicket_types = load_panel('dismissal_types', format_filter, generation)
        
-       if len(wicket_types) > 0:
-           fig4 = px.pie(values=wicket_types.values,
-                         names=wicket_types.index,
+       if wicket_types is not None and len(wicket_types) > 0:
+           fig4 = px.pie(values=wicket_types['count'],
+                         names=wicket_types['wicket_type'],
                          title="")
            fig4.update_layout(
                showlegend=True,
@@ -271,14 +282,14 @@ with col1:
 
 with col2:
    st.subheader("Team Win Analysis")
-   if not filtered_matches.empty and 'winner' in filtered_matches.columns:
-       winners = filtered_matches['winner'].dropna().value_counts().head(8)
+   if total_matches > 0:
+       winners = load_panel('team_wins', format_filter, generation)
        
-       if len(winners) > 0:
-           fig5 = px.bar(x=winners.index,
-                         y=winners.values,
+       if winners is not None and len(winners) > 0:
+           fig5 = px.bar(x=winners['winner'],
+                         y=winners['wins'],
                          title="",
-                         color=winners.values,
+                         color=winners['wins'],
                          color_continuous_scale='Purples')
            fig5.update_layout(
                showlegend=False,
@@ -299,56 +310,71 @@ with col2:
 st.markdown("---")
 st.subheader("Detailed Statistics")
 
-tab1, tab2, tab3 = st.tabs(["Batting Stats", "Bowling Stats", "Match Results"])
+tab1, tab2, tab3, tab4 = st.tabs(["Batting Stats", "Bowling Stats", "Match Results", "Win Probability"])
 
 with tab1:
-   if len(filtered_deliveries) > 0:
-       batting_stats = (filtered_deliveries.groupby('batter').agg({
-           'batter_runs': ['sum', 'count'],
-           'delivery_number': 'count'
-       }).round(2))
-       batting_stats.columns = ['Total Runs', 'Scoring Shots', 'Balls Faced']
-       batting_stats['Strike Rate'] = (batting_stats['Total Runs'] / batting_stats['Balls Faced'] * 100).round(2)
-       batting_stats = batting_stats[batting_stats['Balls Faced'] >= 20].sort_values('Total Runs', ascending=False)
+   if total_deliveries > 0:
+       batting_stats = load_panel('batting_stats', format_filter, generation)
        
-       if len(batting_stats) > 0:
-           st.dataframe(batting_stats.head(15), use_container_width=True)
+       if batting_stats is not None and len(batting_stats) > 0:
+           st.dataframe(batting_stats, use_container_width=True)
        else:
            st.write("No batting statistics available (minimum 20 balls required)")
    else:
        st.write("No data available")
 
 with tab2:
-   if len(filtered_deliveries) > 0:
-       bowling_stats = (filtered_deliveries.groupby('bowler').agg({
-           'total_runs': 'sum',
-           'delivery_number': 'count',
-           'wicket_type': lambda x: x.notna().sum()
-       }).round(2))
-       bowling_stats.columns = ['Runs Conceded', 'Balls Bowled', 'Wickets']
-       bowling_stats['Economy Rate'] = (bowling_stats['Runs Conceded'] / bowling_stats['Balls Bowled'] * 6).round(2)
-       bowling_stats = bowling_stats[bowling_stats['Balls Bowled'] >= 30].sort_values('Wickets', ascending=False)
+   if total_deliveries > 0:
+       bowling_stats = load_panel('bowling_stats', format_filter, generation)
        
-       if len(bowling_stats) > 0:
-           st.dataframe(bowling_stats.head(15), use_container_width=True)
+       if bowling_stats is not None and len(bowling_stats) > 0:
+           st.dataframe(bowling_stats, use_container_width=True)
        else:
            st.write("No bowling statistics available (minimum 30 balls required)")
    else:
        st.write("No data available")
 
 with tab3:
-   if len(filtered_matches) > 0:
-       match_results = filtered_matches[['match_id', 'format', 'team1', 'team2', 'winner', 'venue', 'date']].copy()
-       match_results['date'] = pd.to_datetime(match_results['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+   if total_matches > 0:
+       match_results = load_panel('match_results', format_filter, generation)
        st.dataframe(match_results, use_container_width=True)
    else:
        st.write("No match data available")
 
+with tab4:
+   win_matches = query_panel('win_probability_matches', format_filter, generation)
+   
+   if win_matches is not None and len(win_matches) > 0:
+       labels = {row.match_id: f"{row.date} | {row.format.upper()} | {row.team1} vs {row.team2}"
+                 for row in win_matches.itertuples()}
+       match_id = st.selectbox("Select Match", options=list(labels), format_func=labels.get)
+       match = win_matches.set_index('match_id').loc[match_id]
+       curve = load_win_probability(match_id, generation)
+       
+       if curve is not None and len(curve) > 0:
+           # Probabilities are stored for the batting side; plot team1's chance throughout
+           team1_batting = curve['batting_team'] == match['team1']
+           curve['probability'] = np.where(team1_batting, curve['win_probability'], 1 - curve['win_probability'])
+           curve['ball'] = np.arange(1, len(curve) + 1)
+           
+           fig = px.line(curve, x='ball', y='probability', color=curve['innings_number'].astype(str),
+                         labels={'ball': 'Ball', 'probability': f"{match['team1']} win probability",
+                                 'color': 'Innings'},
+                         hover_data=['over_number', 'runs', 'wickets', 'runs_required'])
+           fig.update_yaxes(range=[0, 1], tickformat='.0%')
+           fig.update_layout(height=400)
+           st.plotly_chart(fig, use_container_width=True)
+           st.write(f"Winner: {match['winner'] if pd.notna(match['winner']) else 'No result'}")
+       else:
+           st.write("No win probability data for this match")
+   else:
+       st.write("No win probability data available (limited-overs matches only)")
+
 # Footer
 st.markdown("---")
 st.markdown(
    """
    **Cricket Analytics Dashboard** | Data Source: Cricsheet | 
    Total Records Analyzed: {:,} deliveries across {:,} matches
-   """.format(len(deliveries_df), len(matches_df))
+   """.format(total_deliveries_db, total_matches_db)
 )
\ No newline at end of file
@@ -2,6 +2,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from dashboard_queries import FORMAT_OPTIONS
+from frame_loader import load_processed_frames
+from panel_cache import PROCESSED_PANEL_CACHE, frame_panels, processed_fingerprint, read_panel_cache
+
+PROCESSED_DIR = "data/processed"
+PANEL_CACHE_PATH = PROCESSED_PANEL_CACHE
 
 # Page configuration
 st.set_page_config(
@@ -53,20 +63,38 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load data from CSV files
-@st.cache_data
+# Load categorical, downcast frames from the Parquet tables when present, otherwise the CSV files;
+# deliveries are mapped from the delivery store, so one shared resource (not a per-session
+# copy) keeps sessions on the same page cache
+@st.cache_resource
 def load_data():
     try:
-        matches_df = pd.read_csv("data/processed/matches.csv")
-        deliveries_df = pd.read_csv("data/processed/deliveries.csv")
-        innings_df = pd.read_csv("data/processed/innings.csv")
-        return matches_df, deliveries_df, innings_df
+        return load_processed_frames(PROCESSED_DIR)
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
-        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        return None
 
-# Load data
-matches_df, deliveries_df, innings_df = load_data()
+# Content hash of the processed tables, rechecked once a minute
+@st.cache_data(ttl=60)
+def data_token():
+    return processed_fingerprint(PROCESSED_DIR)
+
+# Every panel of every format, prebuilt by scripts/panel_cache.py; None when
+# missing or built from other data
+@st.cache_resource
+def load_panel_cache(token):
+    return read_panel_cache(PANEL_CACHE_PATH, token)
+
+# Fallback when there is no up-to-date panel cache
+@st.cache_data
+def compute_panels(match_format, token):
+    frames = load_data()
+    if frames is None:
+        return None
+    return frame_panels(frames['matches'], frames['deliveries'], frames['innings'], match_format)
+
+token = data_token()
+panel_cache = load_panel_cache(token)
 
 # Header
 st.title("Cricket Data Analytics Dashboard")
@@ -74,40 +102,35 @@ st.markdown("---")
 
 # Sidebar filters
 st.sidebar.header("Filters")
-format_options = ["All", "tests", "odis", "t20s", "ipl"]
-format_filter = st.sidebar.selectbox("Select Format", options=format_options, index=0)
-
-# Filter data
-if format_filter != "All":
-    filtered_matches = matches_df[matches_df['format'] == format_filter]
-    match_ids = filtered_matches['match_id'].tolist()
-    filtered_deliveries = deliveries_df[deliveries_df['match_id'].isin(match_ids)]
-    filtered_innings = innings_df[innings_df['match_id'].isin(match_ids)]
+format_filter = st.sidebar.selectbox("Select Format", options=FORMAT_OPTIONS, index=0)
+
+if panel_cache is not None:
+    panels = panel_cache['panels'][format_filter]
 else:
-    filtered_matches = matches_df
-    filtered_deliveries = deliveries_df
-    filtered_innings = innings_df
+    panels = compute_panels(format_filter, token)
+if panels is None:
+    st.stop()
+
+kpis = panels['kpis']
 
 # KPIs
 st.header("Key Performance Indicators")
 col1, col2, col3, col4, col5 = st.columns(5)
 
 with col1:
-    st.metric("Total Matches", f"{len(filtered_matches):,}")
+    st.metric("Total Matches", f"{kpis['total_matches']:,}")
 
 with col2:
-    st.metric("Total Deliveries", f"{len(filtered_deliveries):,}")
+    st.metric("Total Deliveries", f"{kpis['total_deliveries']:,}")
 
 with col3:
-    total_runs = filtered_deliveries['total_runs'].sum() if len(filtered_deliveries) > 0 else 0
-    st.metric("Total Runs", f"{total_runs:,}")
+    st.metric("Total Runs", f"{kpis['total_runs']:,}")
 
 with col4:
-    total_wickets = len(filtered_deliveries[filtered_deliveries['wicket_type'].notna()]) if len(filtered_deliveries) > 0 else 0
-    st.metric("Total Wickets", f"{total_wickets:,}")
+    st.metric("Total Wickets", f"{kpis['total_wickets']:,}")
 
 with col5:
-    avg_score = filtered_innings['total_runs'].mean() if len(filtered_innings) > 0 else 0
+    avg_score = kpis['avg_score'] if kpis['avg_score'] is not None else 0
     st.metric("Average Score", f"{avg_score:.1f}")
 
 st.markdown("---")
@@ -117,12 +140,8 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Top 10 Run Scorers")
-    if len(filtered_deliveries) > 0:
-        top_batsmen = (filtered_deliveries.groupby('batter')['batter_runs']
-                       .sum().reset_index()
-                       .sort_values('batter_runs', ascending=False)
-                       .head(10))
-        
+    top_batsmen = panels['top_run_scorers']
+    if len(top_batsmen) > 0:
         fig1 = px.bar(top_batsmen, x='batter_runs', y='batter', orientation='h',
                       color='batter_runs', color_continuous_scale='Blues')
         fig1.update_layout(showlegend=False, height=400, yaxis={'categoryorder': 'total ascending'})
@@ -130,25 +149,20 @@ with col1:
 
 with col2:
     st.subheader("Top 10 Wicket Takers")
-    if len(filtered_deliveries) > 0:
-        wicket_data = filtered_deliveries[filtered_deliveries['wicket_type'].notna()]
-        if len(wicket_data) > 0:
-            top_bowlers = wicket_data['bowler'].value_counts().head(10).reset_index()
-            top_bowlers.columns = ['bowler', 'wickets']
-            
-            fig2 = px.bar(top_bowlers, x='wickets', y='bowler', orientation='h',
-                          color='wickets', color_continuous_scale='Reds')
-            fig2.update_layout(showlegend=False, height=400, yaxis={'categoryorder': 'total ascending'})
-            st.plotly_chart(fig2, use_container_width=True)
+    top_bowlers = panels['top_wicket_takers']
+    if len(top_bowlers) > 0:
+        fig2 = px.bar(top_bowlers, x='wickets', y='bowler', orientation='h',
+                      color='wickets', color_continuous_scale='Reds')
+        fig2.update_layout(showlegend=False, height=400, yaxis={'categoryorder': 'total ascending'})
+        st.plotly_chart(fig2, use_container_width=True)
 
 # Format comparison
-if format_filter == "All" and len(matches_df) > 0:
+if format_filter == "All" and kpis['total_matches'] > 0:
     st.subheader("Performance by Format")
-    format_data = innings_df.merge(matches_df[['match_id', 'format']], on='match_id')
-    format_stats = format_data.groupby('format')['total_runs'].mean().reset_index()
+    format_stats = panels['format_comparison']
     
-    fig3 = px.bar(format_stats, x='format', y='total_runs', 
-                  title="Average Runs by Format", color='total_runs', color_continuous_scale='Greens')
+    fig3 = px.bar(format_stats, x='format', y='Avg Runs', 
+                  title="Average Runs by Format", color='Avg Runs', color_continuous_scale='Greens')
     fig3.update_layout(showlegend=False)
     st.plotly_chart(fig3, use_container_width=True)
 
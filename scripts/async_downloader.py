@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import http.client
+import urllib.error
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+# Politeness budget: at most RATE requests per second (bursts of BURST) and
+# CONCURRENCY requests in flight
+CONCURRENCY = 8
+RATE = 4.0
+BURST = 4
+
+# Transient failures worth retrying; other 4xx responses fail at once
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Connection-level failures, retried like the statuses above (IncompleteRead,
+# RemoteDisconnected and friends are http.client.HTTPException, not OSError)
+RETRY_ERRORS = (urllib.error.URLError, http.client.HTTPException, OSError)
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+
+INDEX_FILENAME = "download_index.json"
+
+def http_get(url, headers=None, timeout=30):
+    """Blocking GET: (status, headers, body); error statuses (incl. 304) are returned, not raised"""
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT, **(headers or {})})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, b''
+
+def atomic_write(path, data):
+    """Write bytes to path via a temporary file in the same directory and os.replace()"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class LinkParser(HTMLParser):
+    """Collect the href of every <a> tag"""
+
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href)
+
+def extract_links(html, base_url, suffix='.json'):
+    """Absolute URLs of the links on a page ending with suffix, in page order without repeats"""
+    parser = LinkParser()
+    parser.feed(html)
+    links = [urljoin(base_url, href) for href in parser.links if urlparse(href).path.endswith(suffix)]
+    return list(dict.fromkeys(links))
+
+def list_links(page_url, suffix='.json', timeout=30):
+    """Links of a listing page fetched with a plain GET - no browser needed"""
+    status, headers, body = http_get(page_url, timeout=timeout)
+    if status != 200:
+        raise IOError(f"HTTP {status} for {page_url}")
+    return extract_links(body.decode('utf-8', errors='replace'), page_url, suffix)
+
+class TokenBucket:
+    """Async token bucket: rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class DownloadIndex:
+    """URL -> ETag / Last-Modified of the copy on disk, for conditional GETs"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def validators(self, url, dest):
+        """If-None-Match / If-Modified-Since headers, only while the file is still on disk"""
+        entry = self.entries.get(url)
+        if entry is None or not os.path.exists(dest):
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url, headers, **details):
+        self.entries[url] = {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified'), **details}
+
+    def save(self):
+        atomic_write(self.path, json.dumps(self.entries, indent=2, sort_keys=True).encode('utf-8'))
+
+class AsyncDownloader:
+    """Download many files concurrently within a politeness budget
+
+    At most concurrency requests are in flight and a token bucket caps the
+    request rate. Transient failures are retried with exponential backoff
+    (honouring Retry-After), files already on disk are revalidated with
+    conditional GETs, and every file is written atomically. Requests run on
+    worker threads with urllib, so no async HTTP library is needed.
+    """
+
+    def __init__(self, concurrency=CONCURRENCY, rate=RATE, burst=BURST, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, timeout=30, index_path=None, validate_json=True):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.index = DownloadIndex(index_path) if index_path else None
+        self.validate_json = validate_json
+
+    async def fetch(self, url, headers, semaphore, bucket):
+        """GET with retries: (status, headers, body) of the last attempt"""
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            async with semaphore:
+                try:
+                    status, response_headers, body = await asyncio.to_thread(http_get, url, headers, self.timeout)
+                except RETRY_ERRORS as e:
+                    status, response_headers, body = None, {}, str(e)
+
+            if status not in RETRY_STATUSES and status is not None:
+                return status, response_headers, body
+            if attempt == self.max_retries:
+                break
+
+            retry_after = response_headers.get('Retry-After') if status else None
+            delay = (float(retry_after) if retry_after and retry_after.isdigit()
+                     else self.backoff_base * 2 ** attempt * (1 + random.random()))
+            logger.info(f"Retrying {url} in {delay:.1f}s (attempt {attempt + 1}, "
+                        f"{'HTTP ' + str(status) if status else body})")
+            await asyncio.sleep(delay)
+
+        return status, response_headers, body
+
+    async def download_one(self, url, dest, semaphore, bucket):
+        """'downloaded', 'not_modified' or 'failed' for one URL"""
+        headers = self.index.validators(url, dest) if self.index else {}
+        status, response_headers, body = await self.fetch(url, headers, semaphore, bucket)
+
+        if status == 304:
+            return 'not_modified'
+        if status != 200:
+            logger.warning(f"❌ Failed to download {url}: {'HTTP ' + str(status) if status else body}")
+            return 'failed'
+
+        if self.validate_json and dest.endswith('.json'):
+            try:
+                json.loads(body)
+            except ValueError as e:
+                logger.warning(f"❌ Invalid JSON from {url}: {str(e)}")
+                return 'failed'
+
+        atomic_write(dest, body)
+        if self.index:
+            self.index.record(url, response_headers)
+        return 'downloaded'
+
+    async def download_all_async(self, jobs):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket(self.rate, self.burst)
+        outcomes = await asyncio.gather(*(self.download_one(url, dest, semaphore, bucket) for url, dest in jobs),
+                                        return_exceptions=True)
+
+        # An unexpected error fails its own file, not the whole batch
+        for (url, dest), outcome in zip(jobs, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"❌ Failed to download {url}: {str(outcome)}")
+        return [outcome if isinstance(outcome, str) else 'failed' for outcome in outcomes]
+
+    def download_all(self, jobs):
+        """Download [(url, dest path)]; returns {url: outcome} and saves the validator index"""
+        jobs = list(jobs)
+        start = time.perf_counter()
+        try:
+            outcomes = asyncio.run(self.download_all_async(jobs))
+        finally:
+            # Keep the validators of the files written before an interruption
+            if self.index:
+                self.index.save()
+
+        results = dict(zip((url for url, dest in jobs), outcomes))
+        counts = {outcome: outcomes.count(outcome) for outcome in ('downloaded', 'not_modified', 'failed')}
+        logger.info(f"{len(jobs)} files in {time.perf_counter() - start:.1f}s: ✅ {counts['downloaded']} downloaded, "
+                    f"♻️  {counts['not_modified']} not modified, ❌ {counts['failed']} failed")
+        return results
+
+def format_jobs(links, download_dir, match_format):
+    """(url, dest) jobs that save each link under download_dir/match_format/"""
+    jobs = []
+    for url in links:
+        filename = os.path.basename(urlparse(url).path)
+        if not filename.endswith('.json'):
+            filename += '.json'
+        jobs.append((url, os.path.join(download_dir, match_format, filename)))
+    return jobs
+
+def download_format(page_url, match_format, download_dir="data/raw_json", limit=None, **downloader_kwargs):
+    """List the JSON links of a page and download them into download_dir/match_format
+
+    Returns (successful, failed), counting not-modified files as successful.
+    """
+    links = list_links(page_url)
+    if limit:
+        links = links[:limit]
+    print(f"Found {len(links)} JSON files to download")
+
+    downloader_kwargs.setdefault('index_path', os.path.join(download_dir, INDEX_FILENAME))
+    results = AsyncDownloader(**downloader_kwargs).download_all(format_jobs(links, download_dir, match_format))
+    failed = sum(outcome == 'failed' for outcome in results.values())
+    return len(results) - failed, failed
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Download the JSON files linked from a Cricsheet page concurrently")
+    parser.add_argument("page_url", help="Listing page, e.g. https://cricsheet.org/matches/")
+    parser.add_argument("--format", default="all", help="Subdirectory of the download dir to save into")
+    parser.add_argument("--download-dir", default="data/raw_json")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE, help="Requests per second")
+    args = parser.parse_args()
+
+    successful, failed = download_format(args.page_url, args.format, args.download_dir, args.limit,
+                                         concurrency=args.concurrency, rate=args.rate)
+    print(f"\n📊 {args.format.upper()} Summary: ✅ {successful} | ❌ {failed}")
@@ -0,0 +1,109 @@
+import os
+import time
+import argparse
+import tempfile
+import pandas as pd
+
+from database_setup import CricketDatabase
+from frame_loader import read_processed_frame, plain_values
+
+def synthesize_tables(processed_data_dir, target_rows, output_dir):
+    """Tile every processed table (with fresh match ids) until the deliveries reach
+    target_rows, and write the copies as processed CSVs; returns the delivery count"""
+    tables = {table: read_processed_frame(processed_data_dir, table)
+              for csv_file, table in CricketDatabase.TABLES_TO_LOAD}
+    copies = -(-target_rows // len(tables['deliveries']))
+    
+    for table, base in tables.items():
+        base = plain_values(base)
+        frames = []
+        for copy in range(copies):
+            frame = base.copy()
+            frame['match_id'] = frame['match_id'].astype(str) + f"_{copy}"
+            frames.append(frame)
+        pd.concat(frames, ignore_index=True).to_csv(os.path.join(output_dir, f"{table}.csv"), index=False)
+    
+    return copies * len(tables['deliveries'])
+
+def time_legacy_load(db_path, processed_data_dir):
+    """The original loader (setup_database(bulk=False)): to_sql per table, then indexes"""
+    db = CricketDatabase(db_path=db_path, processed_data_dir=processed_data_dir)
+    db.connect()
+    db.create_tables()
+    
+    start = time.perf_counter()
+    if not db.load_all_data():
+        raise RuntimeError("Legacy load failed")
+    load_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    db.create_indexes()
+    index_s = time.perf_counter() - start
+    
+    db.close()
+    return load_s, index_s, 0.0
+
+def time_bulk_load(db_path, processed_data_dir):
+    """The bulk loader: declared schema, one transaction, deferred indexes, ANALYZE"""
+    db = CricketDatabase(db_path=db_path, processed_data_dir=processed_data_dir)
+    db.connect()
+    db.create_tables()
+    
+    start = time.perf_counter()
+    if not db.bulk_load_all_data():
+        raise RuntimeError("Bulk load failed")
+    load_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    db.create_indexes()
+    index_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    db.analyze()
+    analyze_s = time.perf_counter() - start
+    
+    db.close()
+    return load_s, index_s, analyze_s
+
+def benchmark_db_load(processed_data_dir="data/processed", rows=3000000):
+    """Compare the legacy and bulk SQLite loaders on a large deliveries table
+    
+    Both timings read the synthesized processed tables and intern players and
+    deliveries into the star schema, as setup_database() does.
+    """
+    
+    print("🏏 SQLITE LOAD BENCHMARK")
+    print("=" * 70)
+    
+    tmp = tempfile.TemporaryDirectory()
+    synthetic_dir = os.path.join(tmp.name, "processed")
+    os.makedirs(synthetic_dir)
+    delivery_rows = synthesize_tables(processed_data_dir, rows, synthetic_dir)
+    print(f"📊 Deliveries rows: {delivery_rows:,}")
+    
+    header = f"{'loader':<10}{'load s':>10}{'index s':>10}{'analyze s':>11}{'total s':>10}{'rows/s':>13}"
+    print(header)
+    print("-" * len(header))
+    
+    results = {}
+    
+    with tmp:
+        for name, loader in [('legacy', time_legacy_load), ('bulk', time_bulk_load)]:
+            db_path = os.path.join(tmp.name, f"{name}.db")
+            load_s, index_s, analyze_s = loader(db_path, synthetic_dir)
+            total_s = load_s + index_s + analyze_s
+            results[name] = total_s
+            
+            print(f"{name:<10}{load_s:>10.2f}{index_s:>10.2f}{analyze_s:>11.2f}{total_s:>10.2f}"
+                  f"{delivery_rows / total_s:>13,.0f}")
+    
+    print(f"\n⚡ Bulk loader speedup: {results['legacy'] / results['bulk']:.2f}x")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark legacy vs bulk SQLite loading")
+    parser.add_argument("--processed-dir", default="data/processed")
+    parser.add_argument("--rows", type=int, default=3000000)
+    args = parser.parse_args()
+    
+    benchmark_db_load(args.processed_dir, args.rows)
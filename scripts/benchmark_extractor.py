@@ -0,0 +1,115 @@
+import argparse
+
+from benchmark_json import load_corpus
+from benchmark_storage import time_call
+from json_backend import get_json_parser
+from data_processor import CricketDataProcessor, BOWLER_WICKET_KINDS, rows_to_columns
+
+def legacy_extract(match_data, match_id):
+    """The delivery extractor before the wickets table and per-type extras:
+    one dict per ball, first wicket only, extras looked up per type"""
+    innings_data = []
+    deliveries_data = []
+
+    for innings_num, innings in enumerate(match_data.get('innings', []), 1):
+        team = innings.get('team')
+        innings_info = {'match_id': match_id, 'innings_number': innings_num, 'batting_team': team,
+                        'total_overs': 0, 'total_runs': 0, 'total_wickets': 0, 'extras': 0}
+        overs = innings.get('overs', [])
+        delivery_count = 0
+
+        for over_data in overs:
+            over_num = over_data.get('over', 0)
+            for delivery in over_data.get('deliveries', []):
+                delivery_count += 1
+                runs = delivery.get('runs', {})
+                batter_runs = runs.get('batter', 0)
+                extras_runs = runs.get('extras', 0)
+                total_runs = runs.get('total', 0)
+                extras = delivery.get('extras', {})
+                wickets = delivery.get('wickets', [])
+
+                deliveries_data.append({
+                    'match_id': match_id,
+                    'innings_number': innings_num,
+                    'over_number': over_num,
+                    'delivery_number': delivery_count,
+                    'batting_team': team,
+                    'batter': delivery.get('batter'),
+                    'non_striker': delivery.get('non_striker'),
+                    'bowler': delivery.get('bowler'),
+                    'batter_runs': batter_runs,
+                    'extras_runs': extras_runs,
+                    'total_runs': total_runs,
+                    'extras_type': delivery.get('extras', {}).get('wides') and 'wide' or
+                                   delivery.get('extras', {}).get('byes') and 'bye' or
+                                   delivery.get('extras', {}).get('legbyes') and 'legbye' or
+                                   delivery.get('extras', {}).get('noballs') and 'noball' or None,
+                    'wicket_type': delivery.get('wickets', [{}])[0].get('kind') if delivery.get('wickets') else None,
+                    'player_dismissed': delivery.get('wickets', [{}])[0].get('player_out') if delivery.get('wickets') else None,
+                    'is_legal_ball': int(not extras.get('wides') and not extras.get('noballs')),
+                    'is_batter_ball': int(not extras.get('wides')),
+                    'is_bowler_wicket': int(any(wicket.get('kind') in BOWLER_WICKET_KINDS for wicket in wickets))
+                })
+
+                innings_info['total_runs'] += total_runs
+                innings_info['extras'] += extras_runs
+                if delivery.get('wickets'):
+                    innings_info['total_wickets'] += len(delivery['wickets'])
+
+        innings_info['total_overs'] = len(overs)
+        innings_data.append(innings_info)
+
+    return rows_to_columns(innings_data), rows_to_columns(deliveries_data)
+
+def benchmark_extractor(raw_data_dir="data/raw_json", match_format="tests", json_backend="auto", repeats=5):
+    """Compare delivery extraction throughput of the legacy and single-pass extractors
+
+    Files are decoded once up front, so only extraction (including the
+    conversion to column batches) is timed.
+    """
+    print("🏏 DELIVERY EXTRACTOR BENCHMARK")
+    print("=" * 60)
+
+    parser = get_json_parser(json_backend)
+    matches = [(parser.loads(data), str(number)) for number, data in
+               enumerate(load_corpus(raw_data_dir, match_format))]
+    processor = CricketDataProcessor(raw_data_dir=raw_data_dir, json_backend=json_backend)
+
+    def run_legacy():
+        return [legacy_extract(match_data, match_id) for match_data, match_id in matches]
+
+    def run_single_pass():
+        return [processor.extract_innings_deliveries(match_data, match_id) for match_data, match_id in matches]
+
+    legacy_seconds, legacy = time_call(run_legacy, repeats)
+    seconds, extracted = time_call(run_single_pass, repeats)
+
+    deliveries = sum(len(result[1].get('match_id', [])) for result in extracted)
+    wickets = sum(len(result[2].get('match_id', [])) for result in extracted)
+    print(f"📂 {match_format}: {len(matches)} files, {deliveries:,} deliveries, "
+          f"{wickets:,} wickets ({parser.name} decoder)")
+
+    print(f"{'extractor':<14}{'seconds':>10}{'balls/s':>12}{'speedup':>10}")
+    print("-" * 46)
+    for name, elapsed in (('legacy', legacy_seconds), ('single pass', seconds)):
+        print(f"{name:<14}{elapsed:>10.4f}{deliveries / elapsed:>12,.0f}{legacy_seconds / elapsed:>9.1f}x")
+
+    # Every column the legacy extractor produced must come out unchanged
+    same = all(old[1].get(col) == new[1].get(col) and old[0] == rows_to_columns(new[0])
+               for old, new in zip(legacy, extracted) for col in old[1])
+    print("✅ Delivery columns match the legacy extractor" if same
+          else "⚠️  Delivery columns differ from the legacy extractor")
+
+    return {'legacy': legacy_seconds, 'single pass': seconds}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the delivery extractor on Cricsheet files")
+    parser.add_argument("--raw-dir", default="data/raw_json")
+    parser.add_argument("--format", default="tests")
+    parser.add_argument("--json-backend", default="auto",
+                        choices=["auto", "json", "orjson", "msgspec", "msgspec-struct"])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    benchmark_extractor(args.raw_dir, args.format, args.json_backend, args.repeats)
@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import argparse
+import pandas as pd
+
+from benchmark_storage import time_call
+from frame_loader import read_csv_frame, read_db_frame, frame_memory
+from delivery_store import delivery_store_exists, open_delivery_store
+
+def time_groupbys(df, repeats):
+    """Best time of the dashboard's batter and bowler aggregations"""
+    def run():
+        df.groupby('batter', observed=True)['batter_runs'].sum()
+        df.groupby('bowler', observed=True).agg({'total_runs': 'sum', 'delivery_number': 'count'})
+        df[df['wicket_type'].notna()]['bowler'].value_counts()
+    return time_call(run, repeats)[0]
+
+def benchmark_frame_memory(processed_data_dir="data/processed", db_path="data/cricket_data.db", repeats=3):
+    """Compare default-dtype and typed deliveries frames: load time, memory and groupby time"""
+
+    print("🏏 DELIVERIES FRAME MEMORY BENCHMARK")
+    print("=" * 80)
+
+    csv_path = os.path.join(processed_data_dir, "deliveries.csv")
+    loaders = [
+        ('csv default', lambda: pd.read_csv(csv_path)),
+        ('csv typed', lambda: read_csv_frame(csv_path, 'deliveries'))
+    ]
+
+    if delivery_store_exists(processed_data_dir):
+        # Numeric columns stay mapped: their pages are shared, not owned by the frame
+        loaders.append(('memmap store', lambda: open_delivery_store(processed_data_dir).frame()))
+
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        loaders += [
+            ('sqlite default', lambda: pd.read_sql_query("SELECT * FROM deliveries", conn)),
+            ('sqlite typed', lambda: read_db_frame(conn, 'deliveries'))
+        ]
+
+    header = f"{'loader':<16}{'rows':>11}{'load s':>10}{'memory MB':>12}{'groupby s':>11}"
+    print(header)
+    print("-" * len(header))
+
+    results = []
+
+    for name, loader in loaders:
+        load_time, df = time_call(loader, repeats)
+        row = {
+            'loader': name,
+            'rows': len(df),
+            'load_s': load_time,
+            'memory_mb': frame_memory(df) / 1e6,
+            'groupby_s': time_groupbys(df, repeats)
+        }
+        results.append(row)
+        del df
+
+        print(f"{name:<16}{row['rows']:>11,}{row['load_s']:>10.3f}{row['memory_mb']:>12.2f}{row['groupby_s']:>11.4f}")
+
+    results = pd.DataFrame(results).set_index('loader')
+
+    print("-" * len(header))
+    for source in ['csv', 'sqlite']:
+        if f"{source} typed" in results.index:
+            default = results.loc[f"{source} default"]
+            typed = results.loc[f"{source} typed"]
+            print(f"📉 {source}: {default['memory_mb'] / typed['memory_mb']:.1f}x less memory, "
+                  f"groupbys {default['groupby_s'] / typed['groupby_s']:.1f}x faster")
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark default vs typed deliveries frames")
+    parser.add_argument("--processed-dir", default="data/processed")
+    parser.add_argument("--db", default="data/cricket_data.db")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    benchmark_frame_memory(args.processed_dir, args.db, args.repeats)
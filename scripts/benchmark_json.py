@@ -0,0 +1,62 @@
+import time
+import argparse
+
+from json_backend import available_backends, get_json_parser
+from match_sources import list_file_sources
+
+def load_corpus(raw_data_dir, match_format):
+    """Read every match of a format (loose or packed) into memory as bytes"""
+    return [source.read_bytes() for source in
+            sorted(list_file_sources(raw_data_dir, match_format), key=lambda source: source.key)]
+
+def benchmark_backend(parser, corpus, repeats):
+    """Best decode throughput of a parser over a corpus, in MB/s"""
+    total_bytes = sum(len(data) for data in corpus)
+    best = None
+    
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for data in corpus:
+            parser.loads(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    
+    return total_bytes / 1e6 / best, best
+
+def benchmark_json(raw_data_dir="data/raw_json", formats=("tests", "ipl"), repeats=5):
+    """Compare JSON decoding throughput of the installed backends"""
+    
+    print("🏏 CRICSHEET JSON DECODING BENCHMARK")
+    print("=" * 60)
+    
+    backends = available_backends()
+    results = []
+    
+    for match_format in formats:
+        corpus = load_corpus(raw_data_dir, match_format)
+        total_mb = sum(len(data) for data in corpus) / 1e6
+        
+        print(f"\n📂 {match_format}: {len(corpus)} files, {total_mb:.2f} MB")
+        print(f"{'backend':<16}{'MB/s':>10}{'seconds':>10}{'speedup':>10}")
+        print("-" * 46)
+        
+        baseline = None
+        for backend in backends:
+            throughput, seconds = benchmark_backend(get_json_parser(backend), corpus, repeats)
+            if baseline is None:
+                baseline = throughput
+            
+            results.append({'format': match_format, 'backend': backend,
+                            'mb_per_s': throughput, 'seconds': seconds})
+            print(f"{backend:<16}{throughput:>10.1f}{seconds:>10.4f}{throughput / baseline:>9.1f}x")
+    
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoding backends on Cricsheet files")
+    parser.add_argument("--raw-dir", default="data/raw_json")
+    parser.add_argument("--formats", nargs="+", default=["tests", "ipl"])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    
+    benchmark_json(args.raw_dir, args.formats, args.repeats)
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import argparse
+import pandas as pd
+
+from benchmark_storage import time_call
+from frame_loader import load_processed_frames
+from stats_engine import batting_stats, bowling_stats
+
+def pandas_stats(df):
+    """The groupby aggregations the dashboards and EDA ran before the stats engine"""
+    batting = df.groupby('batter', observed=True).agg({
+        'batter_runs': ['sum', 'count', lambda x: (x == 4).sum(), lambda x: (x == 6).sum()]
+    })
+    dismissals = df['player_dismissed'].value_counts()
+    bowling = df.groupby('bowler', observed=True).agg({
+        'total_runs': 'sum',
+        'delivery_number': 'count',
+        'wicket_type': lambda x: x.notna().sum()
+    })
+    return batting, dismissals, bowling
+
+def engine_stats(df):
+    return (batting_stats(df['batter'], df['batter_runs'], df['player_dismissed'],
+                          batter_ball=df['is_batter_ball']),
+            bowling_stats(df['bowler'], df['total_runs'],
+                          legal_ball=df['is_legal_ball'], bowler_wicket=df['is_bowler_wicket']))
+
+def sql_stats(conn):
+    """The batter and bowler aggregates of the analysis queries"""
+    batting = pd.read_sql_query('''
+    SELECT batter, SUM(is_batter_ball) AS balls, SUM(batter_runs) AS runs,
+           COUNT(CASE WHEN batter_runs = 4 THEN 1 END) AS fours,
+           COUNT(CASE WHEN batter_runs = 6 THEN 1 END) AS sixes
+    FROM deliveries
+    WHERE batter IS NOT NULL
+    GROUP BY batter
+    ''', conn)
+    bowling = pd.read_sql_query('''
+    SELECT bowler, SUM(is_legal_ball) AS balls, SUM(total_runs) AS runs_conceded,
+           SUM(is_bowler_wicket) AS wickets
+    FROM deliveries
+    WHERE bowler IS NOT NULL
+    GROUP BY bowler
+    ''', conn)
+    return batting, bowling
+
+def benchmark_stats(processed_data_dir="data/processed", db_path="data/cricket_data.db", repeats=5):
+    """Time batter and bowler aggregates with pandas groupby, SQLite and the NumPy stats engine"""
+
+    print("🏏 BATTING / BOWLING STATS BENCHMARK")
+    print("=" * 80)
+
+    deliveries_df = load_processed_frames(processed_data_dir, tables=('deliveries',))['deliveries']
+    print(f"📊 {len(deliveries_df):,} deliveries")
+
+    runs = [
+        ('pandas groupby', lambda: pandas_stats(deliveries_df)),
+        ('stats engine', lambda: engine_stats(deliveries_df))
+    ]
+
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        runs.append(('sqlite', lambda: sql_stats(conn)))
+
+    header = f"{'method':<16}{'seconds':>10}{'speedup':>10}"
+    print(header)
+    print("-" * len(header))
+
+    results = {}
+    for name, run in runs:
+        results[name] = time_call(run, repeats)[0]
+
+    engine = results['stats engine']
+    for name, seconds in results.items():
+        print(f"{name:<16}{seconds:>10.4f}{seconds / engine:>9.1f}x")
+
+    # The engine must agree with the groupby it replaces
+    batting, bowling = engine_stats(deliveries_df)
+    expected_runs = deliveries_df.groupby('batter', observed=True)['batter_runs'].sum()
+    expected_wickets = deliveries_df.groupby('bowler', observed=True)['is_bowler_wicket'].sum()
+    if ((batting['runs'].reindex(expected_runs.index) == expected_runs).all() and
+            (bowling['wickets'].reindex(expected_wickets.index) == expected_wickets).all()):
+        print("✅ Engine totals match pandas")
+    else:
+        print("⚠️  Engine totals differ from pandas")
+
+    return pd.Series(results, name='seconds')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy stats engine against pandas and SQLite")
+    parser.add_argument("--processed-dir", default="data/processed")
+    parser.add_argument("--db", default="data/cricket_data.db")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    benchmark_stats(args.processed_dir, args.db, args.repeats)
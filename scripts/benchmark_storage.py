@@ -0,0 +1,66 @@
+import os
+import time
+import argparse
+import pandas as pd
+
+from columnar_store import (TABLE_SCHEMAS, convert_csv_to_parquet, read_parquet_table,
+                            parquet_table_path, directory_size, require_pyarrow)
+
+def time_call(func, repeats):
+    """Best wall-clock time of func() over several runs"""
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def benchmark_storage(processed_data_dir="data/processed", repeats=5):
+    """Compare read time, file size and memory of the CSV and Parquet tables"""
+    require_pyarrow()
+    
+    print("🏏 PROCESSED TABLE STORAGE BENCHMARK")
+    print("=" * 80)
+    
+    # Always rebuild the Parquet copy from the current CSVs
+    convert_csv_to_parquet(processed_data_dir)
+    
+    header = f"{'table':<12}{'csv MB':>9}{'pq MB':>9}{'csv read s':>12}{'pq read s':>11}{'speedup':>9}{'csv mem MB':>12}{'pq mem MB':>11}"
+    print(header)
+    print("-" * len(header))
+    
+    results = []
+    
+    for table in TABLE_SCHEMAS:
+        csv_path = os.path.join(processed_data_dir, f"{table}.csv")
+        
+        csv_time, csv_df = time_call(lambda: pd.read_csv(csv_path), repeats)
+        pq_time, pq_df = time_call(lambda: read_parquet_table(processed_data_dir, table), repeats)
+        
+        row = {
+            'table': table,
+            'csv_mb': directory_size(csv_path) / 1e6,
+            'parquet_mb': directory_size(parquet_table_path(processed_data_dir, table)) / 1e6,
+            'csv_read_s': csv_time,
+            'parquet_read_s': pq_time,
+            'csv_memory_mb': csv_df.memory_usage(deep=True).sum() / 1e6,
+            'parquet_memory_mb': pq_df.memory_usage(deep=True).sum() / 1e6
+        }
+        results.append(row)
+        
+        print(f"{table:<12}{row['csv_mb']:>9.2f}{row['parquet_mb']:>9.2f}"
+              f"{row['csv_read_s']:>12.4f}{row['parquet_read_s']:>11.4f}"
+              f"{row['csv_read_s'] / row['parquet_read_s']:>8.1f}x"
+              f"{row['csv_memory_mb']:>12.2f}{row['parquet_memory_mb']:>11.2f}")
+    
+    return pd.DataFrame(results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs Parquet processed tables")
+    parser.add_argument("--processed-dir", default="data/processed")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    
+    benchmark_storage(args.processed_dir, args.repeats)
@@ -0,0 +1,211 @@
+import os
+import shutil
+import pandas as pd
+import logging
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+PARQUET_DIRNAME = "parquet"
+
+# Declared schema of the processed tables: column order and the dtype each
+# column is stored with in the columnar copy (None keeps the inferred dtype)
+TABLE_SCHEMAS = {
+    'matches': {
+        'match_id': None,
+        'format': 'category',
+        'city': 'category',
+        'venue': 'category',
+        'date': 'datetime64[ns]',
+        'match_type': 'category',
+        'season': 'category',
+        'team1': 'category',
+        'team2': 'category',
+        'toss_winner': 'category',
+        'toss_decision': 'category',
+        'winner': 'category',
+        'result_type': 'category',
+        'result_margin': 'float32',
+        'player_of_match': 'category',
+        'umpire1': 'category',
+        'umpire2': 'category',
+        'data_version': 'category',
+        'created': None,
+        'revision': None
+    },
+    'players': {
+        'match_id': None,
+        'team': 'category',
+        'player_name': 'category',
+        'player_id': 'category'
+    },
+    'innings': {
+        'match_id': None,
+        'innings_number': 'int8',
+        'batting_team': 'category',
+        'total_overs': 'int16',
+        'total_runs': 'int16',
+        'total_wickets': 'int8',
+        'extras': 'int16'
+    },
+    'deliveries': {
+        'match_id': None,
+        'innings_number': 'int8',
+        'over_number': 'int16',
+        'delivery_number': 'int16',
+        'batting_team': 'category',
+        'batter': 'category',
+        'non_striker': 'category',
+        'bowler': 'category',
+        'batter_runs': 'int8',
+        'extras_runs': 'int8',
+        'total_runs': 'int8',
+        'extras_type': 'category',
+        'wicket_type': 'category',
+        'player_dismissed': 'category',
+        'is_legal_ball': 'int8',
+        'is_batter_ball': 'int8',
+        'is_bowler_wicket': 'int8',
+        'wides': 'int8',
+        'noballs': 'int8',
+        'byes': 'int8',
+        'legbyes': 'int8',
+        'penalty': 'int8'
+    },
+    'wickets': {
+        'match_id': None,
+        'innings_number': 'int8',
+        'over_number': 'int16',
+        'delivery_number': 'int16',
+        'wicket_number': 'int8',
+        'kind': 'category',
+        'player_out': 'category',
+        'fielders': 'category'
+    }
+}
+
+def parquet_available():
+    return pq is not None
+
+def require_pyarrow():
+    """Fail with a clear message when the Parquet engine is missing"""
+    if pq is None:
+        raise ImportError("Parquet output requires pyarrow: pip install pyarrow")
+
+def parquet_table_path(processed_data_dir, table):
+    return os.path.join(processed_data_dir, PARQUET_DIRNAME, table)
+
+def parquet_table_exists(processed_data_dir, table):
+    return os.path.isdir(parquet_table_path(processed_data_dir, table))
+
+def remove_parquet_tables(processed_data_dir):
+    """Drop the Parquet copy, e.g. when the processed tables were rewritten as CSV only"""
+    path = os.path.join(processed_data_dir, PARQUET_DIRNAME)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+def parquet_table_columns(processed_data_dir, table):
+    """Column names of a Parquet table, from its schema alone"""
+    require_pyarrow()
+    return pq.ParquetDataset(parquet_table_path(processed_data_dir, table)).schema.names
+
+def apply_schema(table, df):
+    """Return a copy of df cast to the declared dtypes"""
+    df = df.copy()
+
+    for col, dtype in TABLE_SCHEMAS[table].items():
+        if col not in df.columns or dtype is None:
+            continue
+
+        if dtype == 'category':
+            # Mixed str/int columns (e.g. season) become uniform strings first
+            values = df[col]
+            if values.dtype == object:
+                values = values.where(values.isna(), values.astype(str))
+            df[col] = values.astype('category')
+        elif dtype.startswith('datetime'):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        else:
+            df[col] = df[col].astype(dtype)
+
+    return df
+
+def write_parquet_tables(frames, processed_data_dir):
+    """Write {table: DataFrame} as Parquet datasets partitioned by format
+
+    Tables without a format column get it from matches via match_id. Each
+    table is written to a temporary directory and swapped into place.
+    """
+    require_pyarrow()
+
+    match_formats = frames['matches'].set_index('match_id')['format']
+
+    for table, df in frames.items():
+        df = apply_schema(table, df)
+        if 'format' not in df.columns:
+            df['format'] = df['match_id'].map(match_formats).astype('category')
+
+        table_path = parquet_table_path(processed_data_dir, table)
+        tmp_path = table_path + '.tmp'
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+
+        df.to_parquet(tmp_path, engine='pyarrow', partition_cols=['format'], index=False)
+
+        if os.path.exists(table_path):
+            shutil.rmtree(table_path)
+        os.replace(tmp_path, table_path)
+
+        logger.info(f"Parquet {table}: {len(df):,} records")
+
+def read_parquet_table(processed_data_dir, table, columns=None, formats=None, keep_partition=None):
+    """Read a Parquet table, optionally only some columns / formats
+
+    The format partition column is kept for matches (where it is a real
+    column) and dropped elsewhere unless keep_partition=True, so frames have
+    the same columns as the CSV tables.
+    """
+    require_pyarrow()
+
+    filters = [('format', 'in', list(formats))] if formats else None
+    df = pd.read_parquet(parquet_table_path(processed_data_dir, table),
+                         engine='pyarrow', columns=columns, filters=filters)
+
+    if keep_partition is None:
+        keep_partition = table == 'matches'
+    if not keep_partition and 'format' in df.columns and (columns is None or 'format' not in columns):
+        df = df.drop(columns='format')
+
+    # Partition columns come back last; restore the declared column order
+    ordered = [col for col in TABLE_SCHEMAS[table] if col in df.columns]
+    ordered += [col for col in df.columns if col not in ordered]
+    return df[ordered]
+
+def directory_size(path):
+    """Total bytes under a file or directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for filename in files:
+            total += os.path.getsize(os.path.join(root, filename))
+    return total
+
+def convert_csv_to_parquet(processed_data_dir="data/processed"):
+    """Build the Parquet copy of the processed CSV tables"""
+    frames = {table: pd.read_csv(os.path.join(processed_data_dir, f"{table}.csv"),
+                                 dtype={'match_id': str})
+              for table in TABLE_SCHEMAS}
+    write_parquet_tables(frames, processed_data_dir)
+    return frames
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    convert_csv_to_parquet()
+    print(f"✅ Parquet tables written to data/processed/{PARQUET_DIRNAME}/")
@@ -4,18 +4,22 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 import os
-import requests
 from urllib.parse import urljoin
-import json
+
+from async_downloader import AsyncDownloader, INDEX_FILENAME, format_jobs, list_links
 
 class CricsheetScraper:
-    def __init__(self, download_dir="data/raw_json"):
+    def __init__(self, download_dir="data/raw_json", use_browser=False):
         self.download_dir = download_dir
         self.base_url = "https://cricsheet.org/matches/"
         self.driver = None
-        self.setup_driver()
+        
+        # The match pages are static HTML: links are listed with a plain GET
+        # unless use_browser=True asks for the Selenium/Chrome path
+        self.use_browser = use_browser
+        if use_browser:
+            self.setup_driver()
         
         # Create download directory if it doesn't exist
         os.makedirs(download_dir, exist_ok=True)
@@ -55,6 +59,12 @@ class CricsheetScraper:
             raise ValueError(f"Invalid format: {match_format}")
         
         print(f"Scraping {match_format.upper()} matches...")
+        
+        if not self.use_browser:
+            json_links = list_links(format_urls[match_format])
+            print(f"Found {len(json_links)} {match_format.upper()} matches")
+            return json_links
+        
         self.driver.get(format_urls[match_format])
         
         # Wait for page to load
@@ -80,31 +90,6 @@ class CricsheetScraper:
         
         return json_links
     
-    def download_json_file(self, url, match_format):
-        """Download a single JSON file"""
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Extract filename from URL
-            filename = url.split('/')[-1]
-            
-            # Create format-specific directory
-            format_dir = os.path.join(self.download_dir, match_format)
-            os.makedirs(format_dir, exist_ok=True)
-            
-            # Save file
-            filepath = os.path.join(format_dir, filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(response.json(), f, indent=2)
-            
-            print(f"Downloaded: {filename}")
-            return True
-            
-        except Exception as e:
-            print(f"Failed to download {url}: {str(e)}")
-            return False
-    
     def scrape_format(self, match_format, limit=None):
         """
         Scrape all matches for a specific format
@@ -116,19 +101,12 @@ class CricsheetScraper:
             json_links = json_links[:limit]
             print(f"Limiting to {limit} files for testing")
         
-        successful_downloads = 0
-        failed_downloads = 0
+        # Concurrent, rate-limited download with retries and conditional GETs
+        downloader = AsyncDownloader(index_path=os.path.join(self.download_dir, INDEX_FILENAME))
+        results = downloader.download_all(format_jobs(json_links, self.download_dir, match_format))
         
-        for i, link in enumerate(json_links, 1):
-            print(f"Downloading {i}/{len(json_links)}: ", end="")
-            
-            if self.download_json_file(link, match_format):
-                successful_downloads += 1
-            else:
-                failed_downloads += 1
-            
-            # Small delay to be respectful
-            time.sleep(0.5)
+        failed_downloads = sum(outcome == 'failed' for outcome in results.values())
+        successful_downloads = len(results) - failed_downloads
         
         print(f"\n{match_format.upper()} Summary:")
         print(f"✅ Successful: {successful_downloads}")
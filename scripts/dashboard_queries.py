@@ -0,0 +1,226 @@
+import threading
+import pandas as pd
+
+from stats_engine import rounded_ratio_sql
+
+FORMAT_OPTIONS = ["All", "tests", "odis", "t20s", "ipl"]
+
+class DashboardQueries:
+    """Panel data for the SQLite dashboard, filtered and aggregated in SQL
+
+    Every method takes the format selected in the sidebar ("All" or a format
+    name) and returns only the rows its panel shows. The format filter is a
+    bound parameter, so deliveries never leave SQLite unaggregated; they are
+    grouped by their integer player keys, and the per-player totals are
+    joined to dim_players for names. Top-N panels break ties by name (then
+    key), so the rows at the LIMIT do not depend on the query plan and match
+    the CSV panels. Pass a ResultCache to keep results across restarts.
+    """
+
+    def __init__(self, conn, cache=None):
+        self.conn = conn
+        self.cache = cache
+        # One connection shared by Streamlit's script threads
+        self.lock = threading.Lock()
+
+    def query(self, sql, params=()):
+        with self.lock:
+            if self.cache is not None:
+                return self.cache.read_sql(sql, self.conn, list(params))
+            return pd.read_sql_query(sql, self.conn, params=list(params))
+
+    def scalar(self, sql, params=()):
+        return self.query(sql, params).iloc[0, 0]
+
+    @staticmethod
+    def match_filter(match_format, alias):
+        """(JOIN/WHERE clause, params) restricting rows of alias to one format"""
+        if match_format in (None, "All"):
+            return "WHERE 1 = 1", []
+        return (f"JOIN matches m ON m.match_id = {alias}.match_id WHERE m.format = ?",
+                [match_format])
+
+    @staticmethod
+    def delivery_filter(match_format):
+        """(WHERE clause, params) restricting fact_deliveries d to one format by its key"""
+        if match_format in (None, "All"):
+            return "WHERE 1 = 1", []
+        return ("WHERE d.format_key = (SELECT format_key FROM dim_formats WHERE format = ?)",
+                [match_format])
+
+    @staticmethod
+    def format_filter(match_format):
+        """(WHERE clause, params) for queries on matches itself"""
+        if match_format in (None, "All"):
+            return "WHERE 1 = 1", []
+        return "WHERE format = ?", [match_format]
+
+    def kpis(self, match_format):
+        """Total matches, deliveries, runs, wickets and the average innings score"""
+        where, params = self.format_filter(match_format)
+        matches = self.scalar(f"SELECT COUNT(*) FROM matches {where}", params)
+
+        where, params = self.delivery_filter(match_format)
+        deliveries = self.query(f'''
+        SELECT COUNT(*) AS deliveries,
+               COALESCE(SUM(d.total_runs), 0) AS runs,
+               COUNT(d.wicket_type) AS wickets
+        FROM fact_deliveries d
+        {where}
+        ''', params).iloc[0]
+
+        where, params = self.match_filter(match_format, 'i')
+        avg_score = self.scalar(f"SELECT AVG(i.total_runs) FROM innings i {where}", params)
+
+        return {
+            'total_matches': int(matches),
+            'total_deliveries': int(deliveries['deliveries']),
+            'total_runs': int(deliveries['runs']),
+            'total_wickets': int(deliveries['wickets']),
+            'avg_score': None if pd.isna(avg_score) else float(avg_score)
+        }
+
+    def top_run_scorers(self, match_format, limit=10):
+        where, params = self.delivery_filter(match_format)
+        return self.query(f'''
+        SELECT p.player_name AS batter, s.batter_runs
+        FROM (
+            SELECT d.batter_key, SUM(d.batter_runs) AS batter_runs
+            FROM fact_deliveries d
+            {where} AND d.batter_key IS NOT NULL
+            GROUP BY d.batter_key
+        ) s
+        JOIN dim_players p ON p.player_key = s.batter_key
+        ORDER BY s.batter_runs DESC, p.player_name, s.batter_key
+        LIMIT ?
+        ''', params + [limit])
+
+    def top_wicket_takers(self, match_format, limit=10):
+        where, params = self.delivery_filter(match_format)
+        return self.query(f'''
+        SELECT p.player_name AS bowler, s.wickets
+        FROM (
+            SELECT d.bowler_key, COUNT(*) AS wickets
+            FROM fact_deliveries d
+            {where} AND d.is_bowler_wicket = 1 AND d.bowler_key IS NOT NULL
+            GROUP BY d.bowler_key
+        ) s
+        JOIN dim_players p ON p.player_key = s.bowler_key
+        ORDER BY s.wickets DESC, p.player_name, s.bowler_key
+        LIMIT ?
+        ''', params + [limit])
+
+    def format_comparison(self, match_format="All"):
+        """Innings scoring per format (the dashboard shows it for "All" only)"""
+        return self.query('''
+        SELECT m.format,
+               ROUND(AVG(i.total_runs), 2) AS "Avg Runs",
+               MAX(i.total_runs) AS "Highest Score",
+               COUNT(i.total_runs) AS "Innings Played",
+               ROUND(AVG(i.total_wickets), 2) AS "Avg Wickets"
+        FROM innings i
+        JOIN matches m ON m.match_id = i.match_id
+        GROUP BY m.format
+        ORDER BY m.format
+        ''')
+
+    def dismissal_types(self, match_format):
+        where, params = self.delivery_filter(match_format)
+        return self.query(f'''
+        SELECT d.wicket_type, COUNT(*) AS count
+        FROM fact_deliveries d
+        {where} AND d.wicket_type IS NOT NULL
+        GROUP BY d.wicket_type
+        ORDER BY count DESC, d.wicket_type
+        ''', params)
+
+    def team_wins(self, match_format, limit=8):
+        where, params = self.format_filter(match_format)
+        return self.query(f'''
+        SELECT winner, COUNT(*) AS wins
+        FROM matches
+        {where} AND winner IS NOT NULL
+        GROUP BY winner
+        ORDER BY wins DESC, winner
+        LIMIT ?
+        ''', params + [limit])
+
+    def batting_stats(self, match_format, min_balls=20, limit=15):
+        where, params = self.delivery_filter(match_format)
+        df = self.query(f'''
+        SELECT p.player_name AS batter, s."Total Runs", s."Scoring Shots", s."Balls Faced", s."Strike Rate"
+        FROM (
+            SELECT d.batter_key,
+                   SUM(d.batter_runs) AS "Total Runs",
+                   SUM(d.batter_runs > 0) AS "Scoring Shots",
+                   SUM(d.is_batter_ball) AS "Balls Faced",
+                   {rounded_ratio_sql('SUM(d.batter_runs)', 'SUM(d.is_batter_ball)', 100)} AS "Strike Rate"
+            FROM fact_deliveries d
+            {where} AND d.batter_key IS NOT NULL
+            GROUP BY d.batter_key
+            HAVING SUM(d.is_batter_ball) >= ?
+        ) s
+        JOIN dim_players p ON p.player_key = s.batter_key
+        ORDER BY s."Total Runs" DESC, p.player_name, s.batter_key
+        LIMIT ?
+        ''', params + [min_balls, limit])
+        return df.set_index('batter')
+
+    def bowling_stats(self, match_format, min_balls=30, limit=15):
+        where, params = self.delivery_filter(match_format)
+        df = self.query(f'''
+        SELECT p.player_name AS bowler, s."Runs Conceded", s."Balls Bowled", s."Wickets", s."Economy Rate"
+        FROM (
+            SELECT d.bowler_key,
+                   SUM(d.total_runs) AS "Runs Conceded",
+                   SUM(d.is_legal_ball) AS "Balls Bowled",
+                   SUM(d.is_bowler_wicket) AS "Wickets",
+                   {rounded_ratio_sql('SUM(d.total_runs)', 'SUM(d.is_legal_ball)', 6)} AS "Economy Rate"
+            FROM fact_deliveries d
+            {where} AND d.bowler_key IS NOT NULL
+            GROUP BY d.bowler_key
+            HAVING SUM(d.is_legal_ball) >= ?
+        ) s
+        JOIN dim_players p ON p.player_key = s.bowler_key
+        ORDER BY s."Wickets" DESC, p.player_name, s.bowler_key
+        LIMIT ?
+        ''', params + [min_balls, limit])
+        return df.set_index('bowler')
+
+    def match_results(self, match_format):
+        where, params = self.format_filter(match_format)
+        df = self.query(f'''
+        SELECT match_id, format, team1, team2, winner, venue, date
+        FROM matches
+        {where}
+        ORDER BY rowid
+        ''', params)
+        df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+        return df
+
+    def win_probability_matches(self, match_format, limit=200):
+        """Latest matches with stored per-ball win probabilities, for the match picker"""
+        where, params = self.format_filter(match_format)
+        return self.query(f'''
+        SELECT match_id, format, date, team1, team2, winner
+        FROM matches
+        {where} AND EXISTS (SELECT 1 FROM win_probability w WHERE w.match_id = matches.match_id)
+        ORDER BY date DESC, match_id
+        LIMIT ?
+        ''', params + [limit])
+
+    def win_probability(self, match_id):
+        """Per-ball win probability of one match, by primary-key lookup"""
+        return self.query('''
+        SELECT w.innings_number, w.over_number, w.delivery_number, i.batting_team,
+               w.runs, w.wickets, w.balls_left, w.runs_required, w.win_probability
+        FROM win_probability w
+        JOIN innings i ON i.match_id = w.match_id AND i.innings_number = w.innings_number
+        WHERE w.match_id = ?
+        ORDER BY w.innings_number, w.delivery_number
+        ''', [str(match_id)])
+
+    def totals(self):
+        """(deliveries, matches) in the whole database, for the footer"""
+        return (int(self.scalar("SELECT COUNT(*) FROM fact_deliveries")),
+                int(self.scalar("SELECT COUNT(*) FROM matches")))
@@ -1,19 +1,92 @@
 import pandas as pd
 import json
 import os
-import glob
+import argparse
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 import logging
 
+from ingest_manifest import IngestManifest
+from table_sinks import CsvTableSink
+from columnar_store import (TABLE_SCHEMAS, write_parquet_tables, read_parquet_table, parquet_table_exists,
+                            parquet_table_columns, remove_parquet_tables, parquet_available)
+from json_backend import get_json_parser
+from pending_delta import save_pending_delta
+from delivery_store import write_delivery_store, delivery_store_exists, remove_delivery_store
+from match_sources import (find_format_archive, list_archive_sources, list_file_sources,
+                           close_archives)
+from raw_store import raw_pack_exists, read_packed_file
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+FORMATS = ['tests', 'odis', 't20s', 'ipl']
+TABLES = ['matches', 'players', 'innings', 'deliveries', 'wickets']
+
+# Dismissals credited to the bowler; run outs, retirements etc. are not
+BOWLER_WICKET_KINDS = {'bowled', 'caught', 'caught and bowled', 'lbw', 'stumped', 'hit wicket'}
+
+# Column order of the tuples built by extract_innings_deliveries()
+DELIVERY_COLUMNS = list(TABLE_SCHEMAS['deliveries'])
+WICKET_COLUMNS = list(TABLE_SCHEMAS['wickets'])
+
+# Joins the names of the fielders involved in one dismissal
+FIELDER_SEPARATOR = '; '
+
+# Per-process extractor used by the process-pool ingest mode
+_worker_processor = None
+
+def _init_worker(processor_kwargs):
+    """Create the extractor once per worker process"""
+    global _worker_processor
+    _worker_processor = CricketDataProcessor(**processor_kwargs)
+
+def _extract_match_worker(task):
+    """Process-pool entry point: extract one match source into column batches"""
+    source, match_format = task
+    return _worker_processor.extract_match_batch(source, match_format)
+
+def rows_to_columns(rows):
+    """Convert a list of row dicts into a dict of column lists"""
+    if not rows:
+        return {}
+    return {col: [row[col] for row in rows] for col in rows[0]}
+
+def tuples_to_columns(rows, columns):
+    """Convert a list of row tuples (in columns order) into a dict of column lists"""
+    if not rows:
+        return {}
+    return dict(zip(columns, map(list, zip(*rows))))
+
 class CricketDataProcessor:
-    def __init__(self, raw_data_dir="data/raw_json", processed_data_dir="data/processed"):
+    def __init__(self, raw_data_dir="data/raw_json", processed_data_dir="data/processed",
+                 workers=1, chunksize=4, output_format="csv", json_backend="auto",
+                 archive_dir=None):
         self.raw_data_dir = raw_data_dir
         self.processed_data_dir = processed_data_dir
         
+        # Directory of Cricsheet ZIP archives (e.g. tests_json.zip) to read members
+        # from directly; formats without an archive fall back to raw_data_dir
+        self.archive_dir = archive_dir
+        
+        # JSON decoder: "auto" picks msgspec structs, then orjson, then stdlib json
+        self.json_backend = json_backend
+        self.json_parser = get_json_parser(json_backend)
+        
+        # Processed table format: "csv", "parquet" (typed, partitioned by format) or "both"
+        if output_format not in ("csv", "parquet", "both"):
+            raise ValueError(f"Invalid output format: {output_format}")
+        if output_format != "csv" and not parquet_available():
+            logger.warning(f"pyarrow is not installed - writing CSV instead of {output_format} "
+                           f"(pip install pyarrow)")
+            output_format = "csv"
+        self.output_format = output_format
+        
+        # Ingest parallelism: workers=1 keeps the serial path, None uses every core
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        
         # Create processed data directory
         os.makedirs(processed_data_dir, exist_ok=True)
         
@@ -22,16 +95,36 @@ class CricketDataProcessor:
         self.players_df = pd.DataFrame()
         self.innings_df = pd.DataFrame()
         self.deliveries_df = pd.DataFrame()
+        self.wickets_df = pd.DataFrame()
+    
+    def worker_kwargs(self):
+        """Constructor arguments that reproduce this extractor in a worker process"""
+        return {'raw_data_dir': self.raw_data_dir,
+                'processed_data_dir': self.processed_data_dir,
+                'json_backend': self.json_backend,
+                'archive_dir': self.archive_dir}
     
     def load_json_file(self, filepath):
-        """Load and parse a single JSON file"""
+        """Load and parse a single JSON file, from the format's raw pack once packed"""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            if not os.path.exists(filepath):
+                data = read_packed_file(filepath)
+                if data is not None:
+                    return self.json_parser.loads(data)
+            with open(filepath, 'rb') as f:
+                return self.json_parser.loads(f.read())
         except Exception as e:
             logger.error(f"Error loading {filepath}: {str(e)}")
             return None
     
+    def load_match_source(self, source):
+        """Load and parse a match from a file or archive member source"""
+        try:
+            return self.json_parser.loads(source.read_bytes())
+        except Exception as e:
+            logger.error(f"Error loading {source}: {str(e)}")
+            return None
+    
     def extract_match_info(self, match_data, filename, match_format):
         """Extract match-level information"""
         try:
@@ -68,18 +161,20 @@ class CricketDataProcessor:
             return None
     
     def extract_players_info(self, match_data, match_id):
-        """Extract player information"""
+        """Extract player information, with the Cricsheet registry id when the match has one"""
         try:
             players_data = []
             info = match_data.get('info', {})
             players = info.get('players', {})
+            registry = info.get('registry', {}).get('people', {})
             
             for team, team_players in players.items():
                 for player in team_players:
                     players_data.append({
                         'match_id': match_id,
                         'team': team,
-                        'player_name': player
+                        'player_name': player,
+                        'player_id': registry.get(player)
                     })
             
             return players_data
@@ -89,192 +184,575 @@ class CricketDataProcessor:
             return []
     
     def extract_innings_deliveries(self, match_data, match_id):
-        """Extract innings and delivery-level data"""
+        """Extract innings rows plus delivery and wicket columns in one pass
+        
+        Each delivery's runs, extras and wickets are looked up once. Extras are
+        kept per type and every wicket of a delivery (not only the first) is a
+        wickets row; deliveries and wickets are collected as tuples and
+        returned as {column: values} dicts.
+        """
         try:
             innings_data = []
-            deliveries_data = []
+            delivery_rows = []
+            wicket_rows = []
+            add_delivery = delivery_rows.append
+            add_wicket = wicket_rows.append
             
-            innings_list = match_data.get('innings', [])
-            
-            for innings_num, innings in enumerate(innings_list, 1):
+            for innings_num, innings in enumerate(match_data.get('innings', []), 1):
                 team = innings.get('team')
-                
-                # Innings summary
-                innings_info = {
-                    'match_id': match_id,
-                    'innings_number': innings_num,
-                    'batting_team': team,
-                    'total_overs': 0,
-                    'total_runs': 0,
-                    'total_wickets': 0,
-                    'extras': 0
-                }
-                
-                # Process overs and deliveries
                 overs = innings.get('overs', [])
                 delivery_count = 0
+                innings_runs = innings_extras = innings_wickets = 0
                 
                 for over_data in overs:
                     over_num = over_data.get('over', 0)
-                    deliveries = over_data.get('deliveries', [])
                     
-                    for delivery in deliveries:
+                    for delivery in over_data.get('deliveries', []):
                         delivery_count += 1
                         
-                        # Extract delivery details
                         runs = delivery.get('runs', {})
                         batter_runs = runs.get('batter', 0)
                         extras_runs = runs.get('extras', 0)
                         total_runs = runs.get('total', 0)
                         
-                        delivery_info = {
-                            'match_id': match_id,
-                            'innings_number': innings_num,
-                            'over_number': over_num,
-                            'delivery_number': delivery_count,
-                            'batting_team': team,
-                            'batter': delivery.get('batter'),
-                            'non_striker': delivery.get('non_striker'),
-                            'bowler': delivery.get('bowler'),
-                            'batter_runs': batter_runs,
-                            'extras_runs': extras_runs,
-                            'total_runs': total_runs,
-                            'extras_type': delivery.get('extras', {}).get('wides') and 'wide' or 
-                                         delivery.get('extras', {}).get('byes') and 'bye' or
-                                         delivery.get('extras', {}).get('legbyes') and 'legbye' or
-                                         delivery.get('extras', {}).get('noballs') and 'noball' or None,
-                            'wicket_type': delivery.get('wickets', [{}])[0].get('kind') if delivery.get('wickets') else None,
-                            'player_dismissed': delivery.get('wickets', [{}])[0].get('player_out') if delivery.get('wickets') else None
-                        }
+                        extras = delivery.get('extras')
+                        if extras:
+                            wides = extras.get('wides', 0)
+                            noballs = extras.get('noballs', 0)
+                            byes = extras.get('byes', 0)
+                            legbyes = extras.get('legbyes', 0)
+                            penalty = extras.get('penalty', 0)
+                            extras_type = (wides and 'wide' or byes and 'bye' or
+                                           legbyes and 'legbye' or noballs and 'noball' or None)
+                        else:
+                            wides = noballs = byes = legbyes = penalty = 0
+                            extras_type = None
                         
-                        deliveries_data.append(delivery_info)
+                        wickets = delivery.get('wickets')
+                        if wickets:
+                            wicket_type = wickets[0].get('kind')
+                            player_dismissed = wickets[0].get('player_out')
+                            bowler_wicket = 0
+                            for wicket_num, wicket in enumerate(wickets, 1):
+                                kind = wicket.get('kind')
+                                if kind in BOWLER_WICKET_KINDS:
+                                    bowler_wicket = 1
+                                fielders = wicket.get('fielders')
+                                if fielders:
+                                    fielders = FIELDER_SEPARATOR.join(
+                                        name for name in (fielder.get('name') for fielder in fielders) if name)
+                                add_wicket((match_id, innings_num, over_num, delivery_count, wicket_num,
+                                            kind, wicket.get('player_out'), fielders or None))
+                            innings_wickets += len(wickets)
+                        else:
+                            wicket_type = player_dismissed = None
+                            bowler_wicket = 0
                         
-                        # Update innings totals
-                        innings_info['total_runs'] += total_runs
-                        innings_info['extras'] += extras_runs
-                        if delivery.get('wickets'):
-                            innings_info['total_wickets'] += len(delivery['wickets'])
+                        # Ball accounting: wides and no-balls are not legal deliveries,
+                        # and only wides are not balls faced by the batter
+                        add_delivery((match_id, innings_num, over_num, delivery_count, team,
+                                      delivery.get('batter'), delivery.get('non_striker'), delivery.get('bowler'),
+                                      batter_runs, extras_runs, total_runs, extras_type, wicket_type,
+                                      player_dismissed,
+                                      0 if wides or noballs else 1, 0 if wides else 1, bowler_wicket,
+                                      wides, noballs, byes, legbyes, penalty))
+                        
+                        innings_runs += total_runs
+                        innings_extras += extras_runs
                 
-                innings_info['total_overs'] = len(overs)
-                innings_data.append(innings_info)
+                innings_data.append({
+                    'match_id': match_id,
+                    'innings_number': innings_num,
+                    'batting_team': team,
+                    'total_overs': len(overs),
+                    'total_runs': innings_runs,
+                    'total_wickets': innings_wickets,
+                    'extras': innings_extras
+                })
             
-            return innings_data, deliveries_data
+            return (innings_data, tuples_to_columns(delivery_rows, DELIVERY_COLUMNS),
+                    tuples_to_columns(wicket_rows, WICKET_COLUMNS))
             
         except Exception as e:
             logger.error(f"Error extracting innings/deliveries from {match_id}: {str(e)}")
-            return [], []
+            return [], {}, {}
     
-    def process_format(self, match_format):
-        """Process all files for a specific format"""
-        logger.info(f"Processing {match_format} matches...")
+    def extract_match_batch(self, source, match_format):
+        """Extract a single match source into compact per-table column batches"""
+        filename = source.filename
+        match_id = source.match_id
         
-        format_dir = os.path.join(self.raw_data_dir, match_format)
-        json_files = glob.glob(os.path.join(format_dir, "*.json"))
+        # Load JSON data
+        match_data = self.load_match_source(source)
+        if not match_data:
+            return None
         
-        matches_data = []
-        all_players_data = []
-        all_innings_data = []
-        all_deliveries_data = []
+        # Extract match info, players, innings and deliveries
+        match_info = self.extract_match_info(match_data, filename, match_format)
+        players_data = self.extract_players_info(match_data, match_id)
+        innings_data, deliveries_columns, wickets_columns = self.extract_innings_deliveries(match_data, match_id)
         
-        for filepath in json_files:
-            filename = os.path.basename(filepath)
-            match_id = filename.replace('.json', '')
-            
-            logger.info(f"Processing {filename}...")
-            
-            # Load JSON data
-            match_data = self.load_json_file(filepath)
-            if not match_data:
-                continue
-            
-            # Extract match info
-            match_info = self.extract_match_info(match_data, filename, match_format)
-            if match_info:
-                matches_data.append(match_info)
-            
-            # Extract players
-            players_data = self.extract_players_info(match_data, match_id)
-            all_players_data.extend(players_data)
+        return {
+            'matches': rows_to_columns([match_info] if match_info else []),
+            'players': rows_to_columns(players_data),
+            'innings': rows_to_columns(innings_data),
+            'deliveries': deliveries_columns,
+            'wickets': wickets_columns
+        }
+    
+    def frames_from_batches(self, batches):
+        """Combine per-match column batches into one DataFrame per table"""
+        frames = []
+        
+        for table in TABLES:
+            columns = {}
+            for batch in batches:
+                for col, values in batch[table].items():
+                    columns.setdefault(col, []).extend(values)
             
-            # Extract innings and deliveries
-            innings_data, deliveries_data = self.extract_innings_deliveries(match_data, match_id)
-            all_innings_data.extend(innings_data)
-            all_deliveries_data.extend(deliveries_data)
+            frames.append(pd.DataFrame(columns) if columns else pd.DataFrame())
         
-        # Convert to DataFrames
-        format_matches_df = pd.DataFrame(matches_data)
-        format_players_df = pd.DataFrame(all_players_data)
-        format_innings_df = pd.DataFrame(all_innings_data)
-        format_deliveries_df = pd.DataFrame(all_deliveries_data)
+        return tuple(frames)
+    
+    def list_format_sources(self, match_format):
+        """List the match sources for a format: archive members if an archive
+        is available in archive_dir, otherwise the raw JSON files"""
+        archive_path = find_format_archive(self.archive_dir, match_format)
+        if archive_path:
+            logger.info(f"Reading {match_format} matches from {archive_path}")
+            return list_archive_sources(archive_path)
+        
+        return list_file_sources(self.raw_data_dir, match_format)
+    
+    def list_all_sources(self):
+        """Map every available format to its match sources"""
+        formats = [match_format for match_format in FORMATS
+                   if os.path.exists(os.path.join(self.raw_data_dir, match_format))
+                   or raw_pack_exists(self.raw_data_dir, match_format)
+                   or find_format_archive(self.archive_dir, match_format)]
+        return {match_format: self.list_format_sources(match_format) for match_format in formats}
+    
+    def log_format_summary(self, match_format, frames):
+        """Log record counts for a processed format"""
+        format_matches_df, format_players_df, format_innings_df, format_deliveries_df, format_wickets_df = frames
         
         logger.info(f"{match_format} processing complete:")
         logger.info(f"  Matches: {len(format_matches_df)}")
         logger.info(f"  Player records: {len(format_players_df)}")
         logger.info(f"  Innings: {len(format_innings_df)}")
         logger.info(f"  Deliveries: {len(format_deliveries_df)}")
+        logger.info(f"  Wickets: {len(format_wickets_df)}")
+    
+    def process_format(self, match_format, sources=None):
+        """Process all files (or the given subset of sources) for a specific format"""
+        logger.info(f"Processing {match_format} matches...")
+        
+        if sources is None:
+            sources = self.list_format_sources(match_format)
+        
+        batches = []
+        
+        for source in sources:
+            logger.info(f"Processing {source.filename}...")
+            
+            batch = self.extract_match_batch(source, match_format)
+            if batch:
+                batches.append(batch)
+        
+        # Convert to DataFrames
+        frames = self.frames_from_batches(batches)
+        self.log_format_summary(match_format, frames)
+        
+        return frames
+    
+    def iter_match_batches(self, format_sources):
+        """Yield (format, source, batch) for every match source, in input order
+        
+        With workers > 1 sources are extracted on a process pool; tasks are
+        submitted in bounded windows so finished batches never pile up faster
+        than the consumer drains them.
+        """
+        if self.workers <= 1:
+            for match_format, sources in format_sources.items():
+                for source in sources:
+                    yield match_format, source, self.extract_match_batch(source, match_format)
+            return
+        
+        tasks = [(source, match_format)
+                 for match_format, sources in format_sources.items()
+                 for source in sources]
+        
+        logger.info(f"Processing {len(tasks)} files with {self.workers} workers "
+                    f"(chunksize={self.chunksize})...")
+        
+        processor_kwargs = self.worker_kwargs()
+        window = self.workers * self.chunksize * 4
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(processor_kwargs,)) as executor:
+            for start in range(0, len(tasks), window):
+                window_tasks = tasks[start:start + window]
+                # map() preserves task order, so the output matches the serial path
+                results = executor.map(_extract_match_worker, window_tasks, chunksize=self.chunksize)
+                for (source, match_format), batch in zip(window_tasks, results):
+                    yield match_format, source, batch
+    
+    def process_formats_parallel(self, format_sources):
+        """Process format -> sources on a process pool, returning frames per format in input order"""
+        format_batches = {match_format: [] for match_format in format_sources}
+        
+        for match_format, source, batch in self.iter_match_batches(format_sources):
+            if batch:
+                format_batches[match_format].append(batch)
+        
+        results = []
+        for match_format, batches in format_batches.items():
+            frames = self.frames_from_batches(batches)
+            self.log_format_summary(match_format, frames)
+            results.append(frames)
         
-        return format_matches_df, format_players_df, format_innings_df, format_deliveries_df
+        return results
     
-    def process_all_formats(self):
-        """Process all cricket formats"""
+    def extract_formats(self, format_sources):
+        """Extract format -> sources serially or on the process pool"""
+        try:
+            if self.workers > 1:
+                return self.process_formats_parallel(format_sources)
+            
+            return [self.process_format(match_format, sources)
+                    for match_format, sources in format_sources.items()]
+        finally:
+            close_archives()
+    
+    def process_all_formats(self, incremental=False, match_ids=None):
+        """Process all cricket formats
+        
+        With incremental=True only files that are new or changed since the last
+        run (per data/processed/manifest.json) are extracted; their rows replace
+        any earlier version in the processed tables and matches whose source file
+        was deleted are dropped. A caller that already knows what changed (e.g.
+        delta_sync) passes {format: [match ids]} as match_ids, and only those
+        sources are extracted without diffing the whole manifest.
+        """
         logger.info("Starting cricket data processing...")
         
         all_matches = []
         all_players = []
         all_innings = []
         all_deliveries = []
+        all_wickets = []
         
-        formats = ['tests', 'odis', 't20s', 'ipl']
+        format_sources = self.list_all_sources()
         
-        for match_format in formats:
-            format_dir = os.path.join(self.raw_data_dir, match_format)
+        manifest = IngestManifest(os.path.join(self.processed_data_dir, 'manifest.json'))
+        
+        if incremental and manifest.exists() and self.processed_data_exists() and self.processed_schema_current():
+            if match_ids is not None:
+                changed = {}
+                for match_format, ids in match_ids.items():
+                    ids = set(ids)
+                    changed[match_format] = [source for source in format_sources.get(match_format, [])
+                                             if source.match_id in ids]
+                removed = []
+            else:
+                changed, removed = manifest.diff(format_sources)
+            changed = {match_format: sources for match_format, sources in changed.items() if sources}
+            changed_sources = [source for sources in changed.values() for source in sources]
+            
+            logger.info(f"Incremental ingest: {len(changed_sources)} new/changed files, "
+                        f"{len(removed)} removed files")
             
-            if os.path.exists(format_dir):
-                matches_df, players_df, innings_df, deliveries_df = self.process_format(match_format)
+            if not changed_sources and not removed:
+                manifest.save()
+                self.load_processed_data()
+                logger.info("No changes detected - processed data is up to date")
                 
-                all_matches.append(matches_df)
-                all_players.append(players_df)
-                all_innings.append(innings_df)
-                all_deliveries.append(deliveries_df)
+                # Still materialise any requested output format that is missing
+                if ((self.output_format in ("csv", "both") and not self.csv_tables_exist()) or
+                        (self.output_format in ("parquet", "both") and not self.parquet_tables_exist()) or
+                        not delivery_store_exists(self.processed_data_dir)):
+                    self.save_processed_data()
+                self.show_summary()
+                return
+            
+            # Drop every row belonging to a re-extracted or deleted match
+            stale_ids = set(manifest.match_ids(changed_sources))
+            stale_ids.update(source.match_id for source in changed_sources)
+            stale_ids.update(entry['match_id'] for entry in removed)
+            
+            self.load_processed_data()
+            for existing_df, target in ((self.matches_df, all_matches), (self.players_df, all_players),
+                                        (self.innings_df, all_innings), (self.deliveries_df, all_deliveries),
+                                        (self.wickets_df, all_wickets)):
+                target.append(existing_df[~existing_df['match_id'].isin(stale_ids)])
+            
+            for entry in removed:
+                manifest.remove(entry)
+        else:
+            incremental = False
+            stale_ids = set()
+            manifest.clear()
+            changed = format_sources
+        
+        format_results = self.extract_formats(changed)
+        
+        for matches_df, players_df, innings_df, deliveries_df, wickets_df in format_results:
+            all_matches.append(matches_df)
+            all_players.append(players_df)
+            all_innings.append(innings_df)
+            all_deliveries.append(deliveries_df)
+            all_wickets.append(wickets_df)
+        
+        self.update_manifest(manifest, changed, [frames[0] for frames in format_results])
         
         # Combine all formats
         self.matches_df = pd.concat(all_matches, ignore_index=True)
         self.players_df = pd.concat(all_players, ignore_index=True)
         self.innings_df = pd.concat(all_innings, ignore_index=True)
         self.deliveries_df = pd.concat(all_deliveries, ignore_index=True)
+        self.wickets_df = pd.concat(all_wickets, ignore_index=True)
         
         # Clean and process data
         self.clean_data()
         
         # Save processed data
         self.save_processed_data()
+        manifest.save()
+        
+        # Hand the delta to the next database refresh (database_setup.py --refresh)
+        if incremental:
+            extracted_ids = set()
+            for frames in format_results:
+                for frame in frames:
+                    if not frame.empty:
+                        extracted_ids.update(frame['match_id'])
+            
+            delta_frames = {table: df[df['match_id'].isin(extracted_ids)]
+                            for table, df in zip(TABLES, (self.matches_df, self.players_df, self.innings_df,
+                                                          self.deliveries_df, self.wickets_df))}
+            save_pending_delta(self.processed_data_dir, extracted_ids, stale_ids - extracted_ids, delta_frames)
+        else:
+            save_pending_delta(self.processed_data_dir, full=True)
         
         # Show summary
         self.show_summary()
     
-    def clean_data(self):
-        """Clean and standardize the data"""
-        logger.info("Cleaning data...")
+    def update_manifest(self, manifest, format_sources, matches_frames):
+        """Record the sources whose match was extracted successfully"""
+        match_meta = {}
+        for matches_df in matches_frames:
+            for row in matches_df.to_dict('records'):
+                match_meta[row['match_id']] = row
+        
+        for match_format, sources in format_sources.items():
+            for source in sources:
+                match_id = source.match_id
+                row = match_meta.get(match_id)
+                if row is None:
+                    continue
+                
+                revision = row.get('revision')
+                data_version = row.get('data_version')
+                manifest.record(source, match_format, match_id,
+                                revision=None if pd.isna(revision) else int(revision),
+                                data_version=None if pd.isna(data_version) else str(data_version))
+    
+    def remove_csv_tables(self):
+        """Drop the processed CSVs, e.g. when the tables were rewritten as Parquet only"""
+        for table in TABLES:
+            csv_path = os.path.join(self.processed_data_dir, f"{table}.csv")
+            if os.path.exists(csv_path):
+                os.remove(csv_path)
+    
+    def csv_tables_exist(self):
+        return all(os.path.exists(os.path.join(self.processed_data_dir, f"{table}.csv"))
+                   for table in TABLES)
+    
+    def parquet_tables_exist(self):
+        return all(parquet_table_exists(self.processed_data_dir, table) for table in TABLES)
+    
+    def processed_source(self):
+        """The on-disk format previously processed tables can be loaded from, or None"""
+        csv_ready = self.csv_tables_exist()
+        parquet_ready = self.parquet_tables_exist()
+        
+        if csv_ready and (self.output_format != "parquet" or not parquet_ready):
+            return "csv"
+        if parquet_ready:
+            return "parquet"
+        return None
+    
+    def processed_data_exists(self):
+        """True when every processed table is on disk"""
+        return self.processed_source() is not None
+    
+    def processed_schema_current(self):
+        """True when the processed tables on disk have every declared column
+        
+        Tables written before a column was added (e.g. the ball flags) cannot
+        be extended incrementally; their matches are all re-extracted.
+        """
+        source = self.processed_source()
+        for table in TABLES:
+            if source == "parquet":
+                columns = parquet_table_columns(self.processed_data_dir, table)
+            else:
+                columns = pd.read_csv(os.path.join(self.processed_data_dir, f"{table}.csv"), nrows=0).columns
+            
+            missing = [col for col in TABLE_SCHEMAS[table] if col not in columns]
+            if missing:
+                logger.info(f"Processed {table} lacks {', '.join(missing)} - re-extracting every match")
+                return False
+        return True
+    
+    def load_processed_data(self):
+        """Load previously processed tables from disk"""
+        if self.processed_source() == "parquet":
+            frames = [read_parquet_table(self.processed_data_dir, table) for table in TABLES]
+        else:
+            frames = [pd.read_csv(os.path.join(self.processed_data_dir, f"{table}.csv"),
+                                  dtype={'match_id': str})
+                      for table in TABLES]
+        self.matches_df, self.players_df, self.innings_df, self.deliveries_df, self.wickets_df = frames
+    
+    def clean_frame(self, table, df):
+        """Clean and standardize one table's DataFrame (or batch) in place"""
+        if df.empty:
+            return df
         
         # Clean matches data
-        if not self.matches_df.empty:
-            self.matches_df['date'] = pd.to_datetime(self.matches_df['date'], errors='coerce')
-            self.matches_df['result_margin'] = pd.to_numeric(self.matches_df['result_margin'], errors='coerce')
+        if table == 'matches':
+            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+            df['result_margin'] = pd.to_numeric(df['result_margin'], errors='coerce')
         
         # Clean deliveries data
-        if not self.deliveries_df.empty:
+        if table == 'deliveries':
             numeric_cols = ['batter_runs', 'extras_runs', 'total_runs', 'over_number', 'delivery_number']
             for col in numeric_cols:
-                self.deliveries_df[col] = pd.to_numeric(self.deliveries_df[col], errors='coerce')
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        
+        return df
+    
+    def clean_data(self):
+        """Clean and standardize the data"""
+        logger.info("Cleaning data...")
+        
+        self.clean_frame('matches', self.matches_df)
+        self.clean_frame('deliveries', self.deliveries_df)
+    
+    def iter_table_batches(self, match_batches, batch_size):
+        """Regroup per-match column batches into (table, columns) batches of batch_size rows
+        
+        Only one partially filled buffer per table is held at a time, so memory
+        is bounded by batch_size (plus the largest single match), not the corpus.
+        """
+        buffers = {table: {} for table in TABLES}
+        counts = {table: 0 for table in TABLES}
+        
+        for batch in match_batches:
+            for table in TABLES:
+                columns = batch[table]
+                if not columns:
+                    continue
+                
+                buffer = buffers[table]
+                for col, values in columns.items():
+                    buffer.setdefault(col, []).extend(values)
+                counts[table] += len(next(iter(columns.values())))
+                
+                while counts[table] >= batch_size:
+                    yield table, {col: values[:batch_size] for col, values in buffer.items()}
+                    buffer = {col: values[batch_size:] for col, values in buffer.items()}
+                    buffers[table] = buffer
+                    counts[table] -= batch_size
+        
+        for table in TABLES:
+            if counts[table]:
+                yield table, buffers[table]
+    
+    def stream_all_formats(self, batch_size=50000, sink=None):
+        """Process all formats with bounded memory, flushing batches straight to a sink
+        
+        Unlike process_all_formats() no full DataFrame is ever built: matches are
+        extracted one at a time, regrouped into batch_size-row column batches,
+        cleaned and appended to the sink (CSV files in processed_data_dir by
+        default). The manifest is rebuilt so later incremental runs still work.
+        """
+        logger.info(f"Streaming cricket data processing (batch size {batch_size:,})...")
+        
+        if sink is None and self.output_format != "csv":
+            logger.warning("Streaming mode writes CSV; run columnar_store.py to build the Parquet copy")
+        
+        format_sources = self.list_all_sources()
+        
+        manifest = IngestManifest(os.path.join(self.processed_data_dir, 'manifest.json'))
+        manifest.clear()
+        
+        if sink is None:
+            sink = CsvTableSink(self.processed_data_dir, TABLES)
+        
+        # The memory-mapped store and a Parquet copy would describe the previous
+        # tables, and readers prefer both over the CSVs written here
+        remove_delivery_store(self.processed_data_dir)
+        remove_parquet_tables(self.processed_data_dir)
+        
+        def recorded_batches():
+            for match_format, source, batch in self.iter_match_batches(format_sources):
+                if not batch:
+                    continue
+                
+                match_columns = batch['matches']
+                if match_columns:
+                    manifest.record(source, match_format, match_columns['match_id'][0],
+                                    revision=match_columns['revision'][0],
+                                    data_version=match_columns['data_version'][0])
+                yield batch
+        
+        for table, columns in self.iter_table_batches(recorded_batches(), batch_size):
+            frame = self.clean_frame(table, pd.DataFrame(columns))
+            if table == 'matches':
+                # Keep margins float in every batch, as in the full-frame output
+                frame['result_margin'] = frame['result_margin'].astype('float64')
+            sink.write_batch(table, frame)
+        
+        close_archives()
+        sink.close()
+        manifest.save()
+        save_pending_delta(self.processed_data_dir, full=True)
+        
+        for table in TABLES:
+            logger.info(f"  {table}: {sink.row_counts[table]:,} records")
+        
+        return sink.row_counts
     
     def save_processed_data(self):
-        """Save processed DataFrames to CSV files"""
+        """Save processed DataFrames to CSV files and/or typed Parquet datasets,
+        plus the memory-mapped delivery store"""
         logger.info("Saving processed data...")
         
-        self.matches_df.to_csv(os.path.join(self.processed_data_dir, 'matches.csv'), index=False)
-        self.players_df.to_csv(os.path.join(self.processed_data_dir, 'players.csv'), index=False)
-        self.innings_df.to_csv(os.path.join(self.processed_data_dir, 'innings.csv'), index=False)
-        self.deliveries_df.to_csv(os.path.join(self.processed_data_dir, 'deliveries.csv'), index=False)
+        if self.output_format in ("csv", "both"):
+            self.matches_df.to_csv(os.path.join(self.processed_data_dir, 'matches.csv'), index=False)
+            self.players_df.to_csv(os.path.join(self.processed_data_dir, 'players.csv'), index=False)
+            self.innings_df.to_csv(os.path.join(self.processed_data_dir, 'innings.csv'), index=False)
+            self.deliveries_df.to_csv(os.path.join(self.processed_data_dir, 'deliveries.csv'), index=False)
+            self.wickets_df.to_csv(os.path.join(self.processed_data_dir, 'wickets.csv'), index=False)
+        
+        if self.output_format in ("parquet", "both"):
+            write_parquet_tables({'matches': self.matches_df,
+                                  'players': self.players_df,
+                                  'innings': self.innings_df,
+                                  'deliveries': self.deliveries_df,
+                                  'wickets': self.wickets_df},
+                                 self.processed_data_dir)
+        
+        # Only one format is written; a copy in the other left by an earlier run
+        # would be read (Parquet by the loaders, CSV as the incremental base) stale
+        if self.output_format == "csv":
+            remove_parquet_tables(self.processed_data_dir)
+        elif self.output_format == "parquet":
+            self.remove_csv_tables()
+        
+        write_delivery_store(self.deliveries_df, self.processed_data_dir)
         
         logger.info(f"Data saved to {self.processed_data_dir}")
     
@@ -289,6 +767,7 @@ class CricketDataProcessor:
         print(f"  • Players: {len(self.players_df):,} records") 
         print(f"  • Innings: {len(self.innings_df):,} records")
         print(f"  • Deliveries: {len(self.deliveries_df):,} records")
+        print(f"  • Wickets: {len(self.wickets_df):,} records")
         
         if not self.matches_df.empty:
             print(f"\n🏆 MATCH BREAKDOWN BY FORMAT:")
@@ -297,10 +776,12 @@ class CricketDataProcessor:
                 print(f"  • {format_name.upper()}: {count} matches")
         
         print(f"\n📁 FILES SAVED:")
-        print(f"  • data/processed/matches.csv")
-        print(f"  • data/processed/players.csv") 
-        print(f"  • data/processed/innings.csv")
-        print(f"  • data/processed/deliveries.csv")
+        for table in TABLES:
+            if self.output_format in ("csv", "both"):
+                print(f"  • {self.processed_data_dir}/{table}.csv")
+            if self.output_format in ("parquet", "both"):
+                print(f"  • {self.processed_data_dir}/parquet/{table}/ (partitioned by format)")
+        print(f"  • {self.processed_data_dir}/delivery_store/ (memory-mapped deliveries)")
         
         print(f"\n🎯 Next Steps:")
         print(f"  1. Set up SQL database")
@@ -308,5 +789,30 @@ class CricketDataProcessor:
         print(f"  3. Write analytical SQL queries")
 
 if __name__ == "__main__":
-    processor = CricketDataProcessor()
-    processor.process_all_formats()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Process Cricsheet JSON into processed tables")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for ingest (0 = all cores, 1 = serial)")
+    parser.add_argument("--chunksize", type=int, default=4,
+                        help="Match files handed to a worker per task")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only extract files that are new or changed since the last run")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream fixed-size batches to disk instead of building full DataFrames")
+    parser.add_argument("--batch-size", type=int, default=50000,
+                        help="Rows per table batch in --stream mode")
+    parser.add_argument("--output-format", choices=["csv", "parquet", "both"], default="csv",
+                        help="Processed table format (parquet is typed and partitioned by format)")
+    parser.add_argument("--json-backend", choices=["auto", "json", "orjson", "msgspec", "msgspec-struct"],
+                        default="auto", help="JSON decoder used to parse match files")
+    parser.add_argument("--archive-dir", default=None,
+                        help="Read matches straight from Cricsheet ZIPs here (e.g. data/downloads)")
+    args = parser.parse_args()
+    
+    processor = CricketDataProcessor(workers=args.workers, chunksize=args.chunksize,
+                                     output_format=args.output_format, json_backend=args.json_backend,
+                                     archive_dir=args.archive_dir)
+    
+    if args.stream:
+        processor.stream_all_formats(batch_size=args.batch_size)
+    else:
+        processor.process_all_formats(incremental=args.incremental)
\ No newline at end of file
@@ -1,12 +1,32 @@
 import sqlite3
 import pandas as pd
 import os
+import argparse
 import logging
 
+from frame_loader import read_processed_frame, plain_values
+from pending_delta import load_pending_delta, clear_pending_delta
+from index_advisor import WORKLOAD_INDEXES
+from result_cache import bump_generations
+from star_schema import (FACT_TABLES, STAR_TABLES, INTERN_STAGED, create_star_tables, star_schema_exists,
+                         drop_star_tables, begin_staging, intern_match_dimensions, stage_table,
+                         dimension_counts)
+from summary_tables import (SUMMARY_TABLES, summary_tables_exist, build_summary_tables,
+                            begin_summary_refresh, finish_summary_refresh)
+from win_probability import WIN_PROBABILITY_TABLES, build_win_probabilities
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class CricketDatabase:
+    TABLES_TO_LOAD = [
+        ('matches.csv', 'matches'),
+        ('players.csv', 'players'),
+        ('innings.csv', 'innings'),
+        ('deliveries.csv', 'deliveries'),
+        ('wickets.csv', 'wickets')
+    ]
+    
     def __init__(self, db_path="data/cricket_data.db", processed_data_dir="data/processed"):
         self.db_path = db_path
         self.processed_data_dir = processed_data_dir
@@ -58,17 +78,6 @@ class CricketDatabase:
             )
             ''')
             
-            # Players table
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS players (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                match_id TEXT,
-                team TEXT,
-                player_name TEXT,
-                FOREIGN KEY (match_id) REFERENCES matches (match_id)
-            )
-            ''')
-            
             # Innings table
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS innings (
@@ -84,28 +93,29 @@ class CricketDatabase:
             )
             ''')
             
-            # Deliveries table
+            # Wickets table: every dismissal of a delivery, with its fielders
             cursor.execute('''
-            CREATE TABLE IF NOT EXISTS deliveries (
+            CREATE TABLE IF NOT EXISTS wickets (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 match_id TEXT,
                 innings_number INTEGER,
                 over_number INTEGER,
                 delivery_number INTEGER,
-                batting_team TEXT,
-                batter TEXT,
-                non_striker TEXT,
-                bowler TEXT,
-                batter_runs INTEGER,
-                extras_runs INTEGER,
-                total_runs INTEGER,
-                extras_type TEXT,
-                wicket_type TEXT,
-                player_dismissed TEXT,
+                wicket_number INTEGER,
+                kind TEXT,
+                player_out TEXT,
+                fielders TEXT,
                 FOREIGN KEY (match_id) REFERENCES matches (match_id)
             )
             ''')
             
+            # Players and deliveries: integer-keyed facts over the dimension
+            # tables, exposed under their processed names as views. Databases
+            # from before the star schema have them as wide tables instead.
+            if not star_schema_exists(self.conn):
+                drop_star_tables(self.conn)
+            create_star_tables(self.conn)
+            
             self.conn.commit()
             logger.info("Database tables created successfully")
             return True
@@ -114,21 +124,29 @@ class CricketDatabase:
             logger.error(f"Error creating tables: {str(e)}")
             return False
     
+    def read_processed_table(self, csv_filename, table_name):
+        """Read a processed table as a typed frame, preferring the Parquet copy over the CSV"""
+        return read_processed_frame(self.processed_data_dir, table_name)
+    
     def load_csv_to_table(self, csv_filename, table_name):
-        """Load CSV data into database table"""
+        """Load processed data (Parquet or CSV) into database table"""
         try:
-            csv_path = os.path.join(self.processed_data_dir, csv_filename)
+            df = self.read_processed_table(csv_filename, table_name)
             
-            if not os.path.exists(csv_path):
-                logger.error(f"CSV file not found: {csv_path}")
+            if df is None:
                 return False
             
-            # Read CSV
-            df = pd.read_csv(csv_path)
+            # to_sql stores plain values, not pandas categoricals or timestamps
+            df = plain_values(df)
+            
             logger.info(f"Loading {len(df)} records into {table_name}...")
             
-            # Load to database
-            df.to_sql(table_name, self.conn, if_exists='replace', index=False)
+            # Load to database; players and deliveries are interned into their facts
+            if table_name in FACT_TABLES:
+                self.conn.execute(f"DELETE FROM {FACT_TABLES[table_name]}")
+                self.insert_rows(df, table_name)
+            else:
+                df.to_sql(table_name, self.conn, if_exists='replace', index=False)
             
             logger.info(f"✅ {table_name} table loaded successfully")
             return True
@@ -137,23 +155,269 @@ class CricketDatabase:
             logger.error(f"Error loading {table_name}: {str(e)}")
             return False
     
+    def table_columns(self, table_name):
+        """Declared columns of a table, in schema order"""
+        cursor = self.conn.execute(f"PRAGMA table_info({table_name})")
+        return [row[1] for row in cursor.fetchall()]
+    
+    def table_column_types(self, table_name):
+        """Declared column -> type of a table"""
+        cursor = self.conn.execute(f"PRAGMA table_info({table_name})")
+        return {row[1]: row[2].upper() for row in cursor.fetchall()}
+    
+    def drop_tables(self):
+        """Drop the data and summary tables (and with them their indexes) ahead of a full rebuild"""
+        for table in SUMMARY_TABLES + WIN_PROBABILITY_TABLES:
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        drop_star_tables(self.conn)
+        for table in ['wickets', 'innings', 'matches']:
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self.conn.commit()
+    
+    def drop_indexes(self):
+        """Drop user indexes so a bulk load does not maintain them row by row"""
+        cursor = self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")
+        for (index_name,) in cursor.fetchall():
+            self.conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+        self.conn.commit()
+    
+    @staticmethod
+    def iter_row_chunks(df, columns, chunk_size, text_columns=()):
+        """Yield lists of plain-Python row tuples (NaN -> NULL) for executemany
+        
+        Values are converted column by column with tolist(), and numeric
+        columns declared TEXT (e.g. match_id read from CSV) are stringified up
+        front so SQLite does not have to apply the column affinity per row.
+        """
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            values = []
+            
+            for col in columns:
+                series = chunk[col]
+                if pd.api.types.is_datetime64_any_dtype(series):
+                    series = series.dt.strftime('%Y-%m-%d')
+                elif col in text_columns and pd.api.types.is_numeric_dtype(series) and series.notna().all():
+                    series = series.astype(str)
+                
+                if series.isna().any():
+                    values.append(series.astype(object).where(series.notna(), None).tolist())
+                else:
+                    values.append(series.tolist())
+            
+            yield list(zip(*values))
+    
+    def insert_rows(self, df, table_name, chunk_size=100000):
+        """Insert a DataFrame into an existing table with executemany
+        
+        Runs inside the caller's transaction; columns not in the schema are
+        ignored and AUTOINCREMENT ids are assigned by SQLite. Players and
+        deliveries go through their staging table (see stage_rows()).
+        """
+        if df.empty:
+            return
+        
+        if table_name in FACT_TABLES:
+            return self.stage_rows(df, table_name, chunk_size)
+        
+        column_types = self.table_column_types(table_name)
+        columns = [col for col in df.columns if col in column_types]
+        text_columns = {col for col in columns if column_types[col] == 'TEXT'}
+        
+        insert_sql = (f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                      f"VALUES ({', '.join('?' for _ in columns)})")
+        
+        for rows in self.iter_row_chunks(df, columns, chunk_size, text_columns):
+            self.conn.executemany(insert_sql, rows)
+    
+    def stage_rows(self, df, table_name, chunk_size=100000):
+        """Insert players or deliveries as integer keys, one staged chunk at a time
+        
+        Each chunk is inserted with its text columns into the TEMP staging
+        table, then interned into the dimension and fact tables in SQL.
+        begin_staging() must have run earlier in the same load.
+        """
+        intern_match_dimensions(self.conn)
+        
+        for start in range(0, len(df), chunk_size):
+            self.insert_rows(df.iloc[start:start + chunk_size], stage_table(table_name), chunk_size)
+            INTERN_STAGED[table_name](self.conn)
+    
+    def bulk_load_table(self, df, table_name, chunk_size=100000):
+        """Replace a table's contents, keeping its declared schema"""
+        self.conn.execute(f"DELETE FROM {FACT_TABLES.get(table_name, table_name)}")
+        self.insert_rows(df, table_name, chunk_size)
+        
+        logger.info(f"✅ {table_name} table bulk loaded: {len(df):,} records")
+    
+    def data_tables(self):
+        """Every table a load or refresh writes"""
+        return ([table_name for csv_file, table_name in self.TABLES_TO_LOAD] + STAR_TABLES + SUMMARY_TABLES
+                + WIN_PROBABILITY_TABLES)
+    
+    def has_declared_schema(self):
+        """True when the data tables exist with the schema from create_tables()
+        
+        Databases built by the legacy to_sql loader lack the id/primary keys,
+        and older ones store players and deliveries as wide text tables or
+        have no wickets table.
+        """
+        return (star_schema_exists(self.conn) and 'id' in self.table_columns('innings')
+                and 'id' in self.table_columns('wickets'))
+    
+    def refresh_matches(self, delta):
+        """Replace the rows of changed matches and drop removed ones in one transaction
+        
+        delta is a pending delta from pending_delta.load_pending_delta(). Only
+        rows of the affected match_ids are deleted (through the match_id
+        indexes) and re-inserted, so the rest of the tables and their index
+        pages are left alone and WAL readers keep a consistent snapshot.
+        """
+        match_ids = delta['changed_ids'] | delta['removed_ids']
+        maintain_summaries = summary_tables_exist(self.conn)
+        logger.info(f"Refreshing {len(delta['changed_ids'])} changed and "
+                    f"{len(delta['removed_ids'])} removed matches...")
+        
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS refresh_ids (match_id TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM refresh_ids")
+            self.conn.executemany("INSERT INTO refresh_ids (match_id) VALUES (?)",
+                                  [(match_id,) for match_id in match_ids])
+            
+            if maintain_summaries:
+                begin_summary_refresh(self.conn)
+            begin_staging(self.conn)
+            
+            # Children first, then matches; dimension rows are kept
+            for table in ['wickets', 'deliveries', 'innings', 'players', 'matches']:
+                cursor = self.conn.execute(
+                    f"DELETE FROM {FACT_TABLES.get(table, table)} "
+                    f"WHERE match_id IN (SELECT match_id FROM refresh_ids)")
+                logger.info(f"  {table}: {cursor.rowcount:,} rows removed")
+            
+            for csv_file, table_name in self.TABLES_TO_LOAD:
+                df = delta['frames'][table_name]
+                self.insert_rows(df, table_name)
+                logger.info(f"  {table_name}: {len(df):,} rows inserted")
+            
+            if maintain_summaries:
+                finish_summary_refresh(self.conn)
+            
+            # Invalidates cached query results that read these tables
+            bump_generations(self.conn, self.data_tables())
+            
+            self.conn.commit()
+            
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Refresh failed, rolled back: {str(e)}")
+            return False
+        
+        # Databases built before the summary tables existed get them in full once
+        if not maintain_summaries and not self.build_summaries():
+            return False
+        
+        # Let SQLite refresh planner stats only where they went stale
+        self.conn.execute("PRAGMA optimize")
+        logger.info("✅ Incremental refresh committed")
+        return True
+    
+    def bulk_load_all_data(self):
+        """Load every processed table in one transaction, keeping the declared schema
+        
+        Indexes are dropped first (create_indexes() rebuilds them afterwards), and
+        the load runs with WAL journaling and synchronous=OFF, restored to NORMAL
+        once the transaction commits.
+        """
+        logger.info("Bulk loading all data into database...")
+        
+        self.drop_indexes()
+        
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.conn.execute("PRAGMA cache_size = -262144")
+        
+        try:
+            self.conn.execute("BEGIN")
+            begin_staging(self.conn)
+            
+            for csv_file, table_name in self.TABLES_TO_LOAD:
+                df = self.read_processed_table(csv_file, table_name)
+                if df is None:
+                    raise FileNotFoundError(f"No processed data for {table_name}")
+                self.bulk_load_table(df, table_name)
+            
+            self.conn.commit()
+            logger.info("Bulk load committed")
+            return True
+            
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Bulk load failed, rolled back: {str(e)}")
+            return False
+        
+        finally:
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+    
+    def build_summaries(self):
+        """Rebuild the pre-aggregated summary tables from the loaded data"""
+        logger.info("Building summary tables...")
+        
+        try:
+            self.conn.execute("BEGIN")
+            build_summary_tables(self.conn)
+            self.conn.commit()
+            logger.info("Summary tables built")
+            return True
+            
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Summary build failed, rolled back: {str(e)}")
+            return False
+    
+    def build_win_probabilities(self):
+        """Retrain the win-probability models and re-score every limited-overs ball"""
+        logger.info("Building win probabilities...")
+        
+        try:
+            self.conn.execute("BEGIN")
+            build_win_probabilities(self.conn)
+            self.conn.commit()
+            logger.info("Win probabilities built")
+            return True
+            
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Win probability build failed, rolled back: {str(e)}")
+            return False
+    
+    def analyze(self):
+        """Refresh the query planner statistics"""
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+        logger.info("Planner statistics updated (ANALYZE)")
+    
     def load_all_data(self):
         """Load all CSV files into database"""
         logger.info("Loading all data into database...")
         
-        tables_to_load = [
-            ('matches.csv', 'matches'),
-            ('players.csv', 'players'),
-            ('innings.csv', 'innings'),
-            ('deliveries.csv', 'deliveries')
-        ]
+        tables_to_load = self.TABLES_TO_LOAD
         
         success_count = 0
+        begin_staging(self.conn)
         
         for csv_file, table_name in tables_to_load:
             if self.load_csv_to_table(csv_file, table_name):
                 success_count += 1
         
+        self.conn.commit()
+        
         logger.info(f"Data loading complete: {success_count}/{len(tables_to_load)} tables loaded")
         return success_count == len(tables_to_load)
     
@@ -165,16 +429,20 @@ class CricketDatabase:
             cursor = self.conn.cursor()
             
             # Create indexes
+            # The single-column format/venue/match_id/batter/bowler indexes are
+            # leading prefixes of the workload indexes, which replace them
             indexes = [
-                "CREATE INDEX IF NOT EXISTS idx_matches_format ON matches(format)",
                 "CREATE INDEX IF NOT EXISTS idx_matches_date ON matches(date)",
-                "CREATE INDEX IF NOT EXISTS idx_matches_venue ON matches(venue)",
-                "CREATE INDEX IF NOT EXISTS idx_players_name ON players(player_name)",
-                "CREATE INDEX IF NOT EXISTS idx_deliveries_match ON deliveries(match_id)",
-                "CREATE INDEX IF NOT EXISTS idx_deliveries_batter ON deliveries(batter)",
-                "CREATE INDEX IF NOT EXISTS idx_deliveries_bowler ON deliveries(bowler)",
-                "CREATE INDEX IF NOT EXISTS idx_innings_match ON innings(match_id)"
-            ]
+                "CREATE INDEX IF NOT EXISTS idx_fact_players_player ON fact_players(player_key)",
+                "CREATE INDEX IF NOT EXISTS idx_fact_players_match ON fact_players(match_id)",
+                "CREATE INDEX IF NOT EXISTS idx_dim_players_name ON dim_players(player_name)",
+                # Refresh deletes and summary rebuilds select deliveries by match
+                "CREATE INDEX IF NOT EXISTS idx_fact_deliveries_match "
+                "ON fact_deliveries(match_id, innings_number, delivery_number)",
+                "CREATE INDEX IF NOT EXISTS idx_wickets_match "
+                "ON wickets(match_id, innings_number, delivery_number)",
+                "CREATE INDEX IF NOT EXISTS idx_wickets_player_out ON wickets(player_out, kind)"
+            ] + [create_sql for create_sql, query_numbers in WORKLOAD_INDEXES.values()]
             
             for index_sql in indexes:
                 cursor.execute(index_sql)
@@ -194,13 +462,16 @@ class CricketDatabase:
             print("🗄️  DATABASE SUMMARY")
             print("="*60)
             
-            tables = ['matches', 'players', 'innings', 'deliveries']
+            tables = ['matches', 'players', 'innings', 'deliveries', 'wickets']
             
             for table in tables:
                 cursor.execute(f"SELECT COUNT(*) FROM {table}")
                 count = cursor.fetchone()[0]
                 print(f"📊 {table.upper()}: {count:,} records")
             
+            dimensions = ', '.join(f"{table[4:]} {count:,}" for table, count in dimension_counts(self.conn).items())
+            print(f"📇 DIMENSIONS: {dimensions}")
+            
             # Show some sample data
             print(f"\n🏏 SAMPLE MATCHES:")
             cursor.execute("""
@@ -225,8 +496,12 @@ class CricketDatabase:
             self.conn.close()
             logger.info("Database connection closed")
 
-def setup_database():
-    """Main function to set up the database"""
+def setup_database(bulk=True):
+    """Main function to set up the database
+    
+    bulk=True rebuilds the declared schema and bulk loads it; bulk=False keeps
+    the original pandas to_sql(if_exists='replace') loader.
+    """
     db = CricketDatabase()
     
     try:
@@ -235,16 +510,37 @@ def setup_database():
             return False
         
         # Create tables
+        if bulk:
+            db.drop_tables()
         if not db.create_tables():
             return False
         
         # Load data
-        if not db.load_all_data():
+        loaded = db.bulk_load_all_data() if bulk else db.load_all_data()
+        if not loaded:
             return False
         
         # Create indexes
         db.create_indexes()
         
+        # Leaderboards read these instead of scanning deliveries
+        if not db.build_summaries():
+            return False
+        
+        # Per-ball win probability of every odis/t20s/ipl match, for the dashboard
+        if not db.build_win_probabilities():
+            return False
+        
+        # Invalidates cached query results built from the previous data
+        bump_generations(db.conn, db.data_tables())
+        db.conn.commit()
+        
+        if bulk:
+            db.analyze()
+        
+        # Everything processed so far is now in the database
+        clear_pending_delta(db.processed_data_dir)
+        
         # Show summary
         db.get_database_summary()
         
@@ -257,8 +553,59 @@ def setup_database():
     finally:
         db.close()
 
+def refresh_database():
+    """Apply the pending processing delta instead of rebuilding the database
+    
+    Falls back to a full setup_database() when the last processing run was a
+    full rebuild or the database does not have the declared schema yet.
+    """
+    db = CricketDatabase()
+    
+    delta = load_pending_delta(db.processed_data_dir)
+    if delta is None:
+        logger.info("No pending delta - database is up to date")
+        return True
+    
+    try:
+        if not db.connect():
+            return False
+        
+        full_rebuild = delta['full'] or not db.has_declared_schema()
+        
+        if not full_rebuild:
+            if not db.refresh_matches(delta):
+                return False
+            
+            # The models are retrained on the whole history, so every ball is re-scored
+            if not db.build_win_probabilities():
+                return False
+            
+            clear_pending_delta(db.processed_data_dir)
+            db.get_database_summary()
+            return True
+        
+    except Exception as e:
+        logger.error(f"Database refresh failed: {str(e)}")
+        return False
+    
+    finally:
+        db.close()
+    
+    logger.info("Full rebuild required")
+    return setup_database()
+
 if __name__ == "__main__":
-    success = setup_database()
+    parser = argparse.ArgumentParser(description="Build the SQLite database from processed data")
+    parser.add_argument("--legacy-load", action="store_true",
+                        help="Use the pandas to_sql loader instead of the bulk loader")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Only apply matches changed since the last load (after data_processor.py --incremental)")
+    args = parser.parse_args()
+    
+    if args.refresh:
+        success = refresh_database()
+    else:
+        success = setup_database(bulk=not args.legacy_load)
     
     if success:
         print(f"\n✅ Database setup completed successfully!")
@@ -0,0 +1,186 @@
+import os
+import json
+import shutil
+import logging
+import numpy as np
+import pandas as pd
+
+from columnar_store import TABLE_SCHEMAS, parquet_available, parquet_table_exists, read_parquet_table
+
+logger = logging.getLogger(__name__)
+
+STORE_DIRNAME = "delivery_store"
+META_FILENAME = "meta.json"
+
+# Text columns are stored as int32 codes into a per-column string dictionary
+# (-1 for missing, as in pandas categoricals); numeric columns as their
+# declared fixed-width dtype
+CODE_DTYPE = 'int32'
+
+def delivery_store_path(processed_data_dir):
+    return os.path.join(processed_data_dir, STORE_DIRNAME)
+
+def delivery_store_exists(processed_data_dir):
+    return os.path.exists(os.path.join(delivery_store_path(processed_data_dir), META_FILENAME))
+
+def remove_delivery_store(processed_data_dir):
+    """Drop the store, e.g. when the processed deliveries were rewritten without it"""
+    path = delivery_store_path(processed_data_dir)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+def column_file(store_path, col):
+    return os.path.join(store_path, f"{col}.bin")
+
+def encode_column(values, dtype):
+    """(fixed-width array, dictionary or None) of one deliveries column"""
+    if dtype is not None and dtype != 'category':
+        return np.ascontiguousarray(values.to_numpy(dtype=dtype)), None
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.cat.remove_unused_categories()
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, labels = pd.factorize(values)
+    return codes.astype(CODE_DTYPE), [str(label) for label in labels]
+
+def write_delivery_store(deliveries_df, processed_data_dir):
+    """Write deliveries as one fixed-width binary file per column plus a meta.json
+
+    Rows are kept grouped by match, and the row offset of every match is
+    stored, so a reader can slice any range of matches without scanning.
+    The store is built in a temporary directory and swapped into place.
+    """
+    schema = TABLE_SCHEMAS['deliveries']
+    df = deliveries_df
+
+    # Matches must be contiguous; a stable sort on first appearance keeps the ball order
+    match_codes, match_ids = pd.factorize(df['match_id'].astype(str))
+    if len(match_codes) and (np.diff(match_codes) < 0).any():
+        order = np.argsort(match_codes, kind='stable')
+        df = df.iloc[order]
+        match_codes = match_codes[order]
+    offsets = np.searchsorted(match_codes, np.arange(len(match_ids) + 1)).astype(np.int64)
+
+    store_path = delivery_store_path(processed_data_dir)
+    tmp_path = store_path + '.tmp'
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    columns = {}
+    for col, dtype in schema.items():
+        if col == 'match_id' or col not in df.columns:
+            continue
+        values, dictionary = encode_column(df[col], dtype)
+        values.tofile(column_file(tmp_path, col))
+        columns[col] = {'dtype': values.dtype.name, 'dictionary': dictionary}
+
+    offsets.tofile(column_file(tmp_path, 'match_offsets'))
+
+    with open(os.path.join(tmp_path, META_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump({'rows': len(df), 'match_ids': [str(match_id) for match_id in match_ids],
+                   'columns': columns}, f)
+
+    if os.path.exists(store_path):
+        shutil.rmtree(store_path)
+    os.replace(tmp_path, store_path)
+
+    logger.info(f"Delivery store: {len(df):,} records, {len(match_ids):,} matches")
+
+class DeliveryStore:
+    """Read-only, memory-mapped view of the delivery store
+
+    Opening reads only meta.json; each column is mapped with np.memmap on
+    first use, so processes reading the same store share the OS page cache
+    instead of holding their own copy. Arrays returned are views of the
+    mapping (read-only), and slicing a match range is two offset lookups.
+    """
+
+    def __init__(self, processed_data_dir="data/processed"):
+        self.path = delivery_store_path(processed_data_dir)
+        with open(os.path.join(self.path, META_FILENAME), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        self.rows = meta['rows']
+        self.match_ids = meta['match_ids']
+        self.columns = meta['columns']
+        self.match_index = {match_id: position for position, match_id in enumerate(self.match_ids)}
+        self.offsets = self.map('match_offsets', 'int64', len(self.match_ids) + 1)
+        self.arrays = {}
+        self.labels = {}
+
+    def __len__(self):
+        return self.rows
+
+    def map(self, name, dtype, length):
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(column_file(self.path, name), dtype=dtype, mode='r', shape=(length,))
+
+    def array(self, col):
+        """Memory-mapped values (or dictionary codes) of a column"""
+        if col not in self.arrays:
+            self.arrays[col] = self.map(col, self.columns[col]['dtype'], self.rows)
+        return self.arrays[col]
+
+    def dictionary(self, col):
+        """String labels of a coded column as an Index, None for numeric columns"""
+        if self.columns[col]['dictionary'] is None:
+            return None
+        if col not in self.labels:
+            self.labels[col] = pd.Index(self.columns[col]['dictionary'], dtype=object)
+        return self.labels[col]
+
+    def match_rows(self, start, stop=None):
+        """Row slice of the matches at positions [start, stop) in store order"""
+        stop = start + 1 if stop is None else stop
+        start, stop, _ = slice(start, stop).indices(len(self.match_ids))
+        return slice(int(self.offsets[start]), int(self.offsets[max(start, stop)]))
+
+    def match_slice(self, match_id):
+        """Row slice of one match by id"""
+        return self.match_rows(self.match_index[str(match_id)])
+
+    def frame(self, columns=None, rows=slice(None)):
+        """Typed deliveries frame over a row slice
+
+        Numeric columns wrap the mapped arrays without copying; coded columns
+        become categoricals over their dictionary, as frame_loader builds them.
+        """
+        columns = list(TABLE_SCHEMAS['deliveries']) if columns is None else columns
+        start, stop, _ = rows.indices(self.rows)
+
+        data = {}
+        for col in columns:
+            if col == 'match_id':
+                positions = np.searchsorted(self.offsets, np.arange(start, stop), side='right') - 1
+                data[col] = pd.Categorical.from_codes(positions, pd.Index(self.match_ids, dtype=object))
+            elif col in self.columns:
+                values = np.asarray(self.array(col)[start:stop])
+                labels = self.dictionary(col)
+                data[col] = values if labels is None else pd.Categorical.from_codes(values, labels, validate=False)
+
+        return pd.DataFrame(data, copy=False)
+
+def open_delivery_store(processed_data_dir="data/processed"):
+    """The DeliveryStore of a processed directory, or None when it has not been written"""
+    if not delivery_store_exists(processed_data_dir):
+        return None
+    return DeliveryStore(processed_data_dir)
+
+def build_delivery_store(processed_data_dir="data/processed"):
+    """Build the store from the processed deliveries (Parquet or CSV)"""
+    if parquet_available() and parquet_table_exists(processed_data_dir, 'deliveries'):
+        df = read_parquet_table(processed_data_dir, 'deliveries')
+    else:
+        df = pd.read_csv(os.path.join(processed_data_dir, "deliveries.csv"), dtype={'match_id': str})
+    write_delivery_store(df, processed_data_dir)
+    return open_delivery_store(processed_data_dir)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = build_delivery_store()
+    print(f"✅ Delivery store written to data/processed/{STORE_DIRNAME}/ "
+          f"({len(store):,} deliveries, {len(store.match_ids):,} matches)")
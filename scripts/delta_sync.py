@@ -0,0 +1,196 @@
+import os
+import json
+import zipfile
+import argparse
+import logging
+from datetime import date
+
+from async_downloader import atomic_write
+from match_sources import list_file_sources
+from raw_store import RawPack, raw_pack_exists
+from zip_scraper import CricsheetZipScraper
+
+logger = logging.getLogger(__name__)
+
+SYNC_FORMATS = ['tests', 'odis', 't20s', 'ipl']
+
+# Cricsheet's rolling bundles of the matches added in the last N days, smallest first
+RECENT_BUNDLES = [(2, "recently_added_2_json.zip"),
+                  (7, "recently_added_7_json.zip"),
+                  (30, "recently_added_30_json.zip")]
+
+CATALOGUE_FILENAME = "sync_catalogue.json"
+
+def match_format_of(info):
+    """Processed format of a match from its info block, None for matches we do not keep"""
+    match_type = info.get('match_type')
+    if match_type == 'Test':
+        return 'tests'
+    if match_type == 'ODI':
+        return 'odis'
+    if match_type == 'T20':
+        if info.get('team_type') == 'international':
+            return 't20s'
+        if (info.get('event') or {}).get('name') == 'Indian Premier League':
+            return 'ipl'
+    return None
+
+def pick_bundle(gap_days):
+    """Smallest recent bundle covering gap_days (plus a day of margin), None when none does"""
+    if gap_days is None:
+        return None
+    for window, filename in RECENT_BUNDLES:
+        if gap_days + 1 <= window:
+            return filename
+    return None
+
+class SyncCatalogue:
+    """Match ids already on disk, plus the ids of bundle matches of other formats
+
+    The ids of the kept formats come from the raw data directory itself; the
+    catalogue file only adds the date of the last sync and the skipped ids,
+    so they are not downloaded and classified again.
+    """
+
+    def __init__(self, path, raw_data_dir):
+        self.path = path
+        self.last_sync = None
+        self.skipped = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.last_sync = data.get('last_sync')
+            self.skipped = data.get('skipped', {})
+
+        self.ingested = {source.match_id for match_format in SYNC_FORMATS
+                         for source in list_file_sources(raw_data_dir, match_format)}
+
+    def known(self, match_id):
+        return match_id in self.ingested or match_id in self.skipped
+
+    def gap_days(self, today=None):
+        """Days since the last sync, None when there has not been one"""
+        if self.last_sync is None:
+            return None
+        return ((today or date.today()) - date.fromisoformat(self.last_sync)).days
+
+    def save(self, today=None):
+        self.last_sync = (today or date.today()).isoformat()
+        atomic_write(self.path, json.dumps({'last_sync': self.last_sync, 'skipped': self.skipped},
+                                           indent=2, sort_keys=True).encode('utf-8'))
+
+class DeltaSync:
+    """Pull only the matches missing locally from Cricsheet's recently added bundles
+
+    The smallest bundle covering the days since the last sync is downloaded
+    (streamed and cached by CricsheetZipScraper), and only its members whose
+    match id is not known yet are classified and written to raw_data_dir.
+    When the gap is wider than the largest bundle, or there has been no sync
+    yet, the full format archives are synced instead.
+    """
+
+    def __init__(self, raw_data_dir="data/raw_json", archive_dir="data/downloads",
+                 base_url="https://cricsheet.org"):
+        self.raw_data_dir = raw_data_dir
+        self.scraper = CricsheetZipScraper(download_dir=raw_data_dir, archive_dir=archive_dir, base_url=base_url)
+        self.catalogue = SyncCatalogue(os.path.join(archive_dir, CATALOGUE_FILENAME), raw_data_dir)
+
+    def bundle_url(self, filename):
+        return f"{self.scraper.base_url}/downloads/{filename}"
+
+    def sync_bundle(self, filename):
+        """{format: [new match ids]} added from one recent bundle"""
+        zip_path = self.scraper.download_archive(self.bundle_url(filename))
+        added = {match_format: [] for match_format in SYNC_FORMATS}
+        packs = {match_format: RawPack(self.raw_data_dir, match_format) for match_format in SYNC_FORMATS
+                 if raw_pack_exists(self.raw_data_dir, match_format)}
+
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            members = [info for info in zip_ref.infolist() if info.filename.endswith('.json')]
+            for info in members:
+                match_id = os.path.basename(info.filename)[:-len('.json')]
+                if self.catalogue.known(match_id):
+                    continue
+
+                data = zip_ref.read(info)
+                info_block = json.loads(data).get('info', {})
+                match_format = match_format_of(info_block)
+                if match_format is None:
+                    self.catalogue.skipped[match_id] = info_block.get('match_type')
+                    continue
+
+                # Packed formats take new matches into the pack, the others as loose files
+                if match_format in packs:
+                    packs[match_format].add(match_id, data)
+                else:
+                    atomic_write(os.path.join(self.raw_data_dir, match_format, f"{match_id}.json"), data)
+                self.catalogue.ingested.add(match_id)
+                added[match_format].append(match_id)
+
+        for pack in packs.values():
+            pack.save()
+
+        print(f"📦 {filename}: {len(members)} matches, "
+              f"{sum(len(ids) for ids in added.values())} new for {', '.join(SYNC_FORMATS)}")
+        return added
+
+    def sync_full(self):
+        """Fall back to the full format archives; {format: [new or changed match ids]}"""
+        added = {}
+        for match_format in SYNC_FORMATS:
+            self.scraper.extracted.pop(match_format, None)
+            self.scraper.download_and_extract_zip(self.bundle_url(f"{match_format}_json.zip"), match_format)
+            added[match_format] = self.scraper.extracted.get(match_format, [])
+            self.catalogue.ingested.update(added[match_format])
+        return added
+
+    def sync(self, today=None):
+        """Bring raw_data_dir up to date; returns {format: [new or changed ids]}"""
+        gap = self.catalogue.gap_days(today)
+        filename = pick_bundle(gap)
+
+        if filename is None:
+            print(f"🔄 {'No previous sync' if gap is None else f'{gap} days since the last sync'} "
+                  f"- syncing the full format archives")
+            added = self.sync_full()
+        else:
+            print(f"🔄 {gap} days since the last sync - using {filename}")
+            try:
+                added = self.sync_bundle(filename)
+            except Exception as e:
+                print(f"⚠️  Recent bundle failed ({str(e)}) - syncing the full format archives")
+                added = self.sync_full()
+
+        self.catalogue.save(today)
+        return added
+
+def sync_and_ingest(raw_data_dir="data/raw_json", archive_dir="data/downloads",
+                    base_url="https://cricsheet.org", ingest=True):
+    """Delta sync, then hand the new files to an incremental ingest"""
+    added = DeltaSync(raw_data_dir, archive_dir, base_url).sync()
+
+    for match_format, match_ids in added.items():
+        if match_ids:
+            print(f"  • {match_format}: {', '.join(sorted(match_ids))}")
+    if not any(added.values()):
+        print("✅ Already up to date")
+        return added
+
+    if ingest:
+        # Only the synced matches are extracted; the manifest is not diffed again
+        from data_processor import CricketDataProcessor
+        CricketDataProcessor(raw_data_dir=raw_data_dir).process_all_formats(incremental=True, match_ids=added)
+
+    return added
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Sync recently added Cricsheet matches and ingest them")
+    parser.add_argument("--raw-dir", default="data/raw_json")
+    parser.add_argument("--archive-dir", default="data/downloads")
+    parser.add_argument("--base-url", default="https://cricsheet.org")
+    parser.add_argument("--no-ingest", action="store_true", help="Only download, do not run the processor")
+    args = parser.parse_args()
+
+    sync_and_ingest(args.raw_dir, args.archive_dir, args.base_url, ingest=not args.no_ingest)
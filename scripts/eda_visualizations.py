@@ -8,24 +8,47 @@ import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
 
+from frame_loader import load_db_frames, load_processed_frames
+from delivery_store import delivery_store_exists
+from stats_engine import batting_stats, bowling_stats
+
 # Use non-interactive backend
 plt.switch_backend('Agg')
 plt.style.use('default')
 sns.set_palette("husl")
 
 class CricketEDAFixed:
-    def __init__(self, db_path="data/cricket_data.db"):
+    def __init__(self, db_path="data/cricket_data.db", processed_data_dir="data/processed"):
         self.conn = sqlite3.connect(db_path)
+        self.processed_data_dir = processed_data_dir
         self.load_data()
         
         import os
         os.makedirs("visualizations", exist_ok=True)
     
     def load_data(self):
-        """Load data from database"""
-        self.matches_df = pd.read_sql_query("SELECT * FROM matches", self.conn)
-        self.deliveries_df = pd.read_sql_query("SELECT * FROM deliveries", self.conn)
-        self.innings_df = pd.read_sql_query("SELECT * FROM innings", self.conn)
+        """Load data as categorical, downcast frames, all from one snapshot
+        
+        When the processed delivery store exists, deliveries are mapped from it
+        and matches and innings come from the same processed directory, so the
+        three tables were written by the same processing run. Otherwise all
+        three are read from the database.
+        """
+        if delivery_store_exists(self.processed_data_dir):
+            frames = load_processed_frames(self.processed_data_dir)
+        else:
+            frames = load_db_frames(self.conn)
+        self.matches_df = frames['matches']
+        self.deliveries_df = frames['deliveries']
+        self.innings_df = frames['innings']
+        
+        # Per-player aggregates shared by the leaderboard charts
+        self.batting = batting_stats(self.deliveries_df['batter'], self.deliveries_df['batter_runs'],
+                                     self.deliveries_df['player_dismissed'],
+                                     batter_ball=self.deliveries_df['is_batter_ball'])
+        self.bowling = bowling_stats(self.deliveries_df['bowler'], self.deliveries_df['total_runs'],
+                                     legal_ball=self.deliveries_df['is_legal_ball'],
+                                     bowler_wicket=self.deliveries_df['is_bowler_wicket'])
         
         print("📊 Data loaded for EDA:")
         print(f"  • Matches: {len(self.matches_df)}")
@@ -38,7 +61,7 @@ class CricketEDAFixed:
         
         # 1. Format Distribution
         plt.figure(figsize=(10, 6))
-        format_counts = self.matches_df['format'].value_counts()
+        format_counts = self.matches_df['format'].value_counts().loc[lambda counts: counts > 0]
         plt.pie(format_counts.values, labels=format_counts.index, autopct='%1.1f%%')
         plt.title('Distribution of Matches by Format')
         plt.savefig('visualizations/1_format_distribution.png', dpi=300, bbox_inches='tight')
@@ -46,7 +69,7 @@ class CricketEDAFixed:
         print("✅ 1. Format Distribution")
         
         # 2. Top Batsmen
-        top_batsmen = self.deliveries_df.groupby('batter')['batter_runs'].sum().nlargest(10)
+        top_batsmen = self.batting['runs'].nlargest(10)
         plt.figure(figsize=(12, 6))
         top_batsmen.plot(kind='bar', color='skyblue')
         plt.title('Top 10 Batsmen by Total Runs')
@@ -60,7 +83,7 @@ class CricketEDAFixed:
         
         # 3. Wicket Types
         wickets_data = self.deliveries_df[self.deliveries_df['wicket_type'].notna()]
-        wicket_counts = wickets_data['wicket_type'].value_counts()
+        wicket_counts = wickets_data['wicket_type'].value_counts().loc[lambda counts: counts > 0]
         plt.figure(figsize=(10, 8))
         plt.pie(wicket_counts.values, labels=wicket_counts.index, autopct='%1.1f%%')
         plt.title('Distribution of Dismissal Types')
@@ -80,8 +103,7 @@ class CricketEDAFixed:
         print("✅ 4. Runs by Format")
         
         # 5. Top Bowlers
-        bowler_wickets = self.deliveries_df[self.deliveries_df['wicket_type'].notna()]
-        top_bowlers = bowler_wickets['bowler'].value_counts().head(10)
+        top_bowlers = self.bowling['wickets'].loc[lambda counts: counts > 0].nlargest(10)
         plt.figure(figsize=(12, 6))
         top_bowlers.plot(kind='barh', color='lightcoral')
         plt.title('Top 10 Bowlers by Wickets Taken')
@@ -92,8 +114,7 @@ class CricketEDAFixed:
         print("✅ 5. Top Bowlers")
         
         # 6. Sixes Analysis
-        sixes_data = self.deliveries_df[self.deliveries_df['batter_runs'] == 6]
-        top_six_hitters = sixes_data['batter'].value_counts().head(8)
+        top_six_hitters = self.batting['sixes'].loc[lambda counts: counts > 0].nlargest(8)
         plt.figure(figsize=(10, 6))
         top_six_hitters.plot(kind='bar', color='orange')
         plt.title('Most Sixes Hit by Batsmen')
@@ -106,7 +127,7 @@ class CricketEDAFixed:
         print("✅ 6. Most Sixes")
         
         # 7. Format Scoring Comparison
-        format_stats = viz_data.groupby('format')['total_runs'].agg(['mean', 'max', 'min'])
+        format_stats = viz_data.groupby('format', observed=True)['total_runs'].agg(['mean', 'max', 'min'])
         plt.figure(figsize=(10, 6))
         format_stats['mean'].plot(kind='bar', color='green', alpha=0.7)
         plt.title('Average Score by Cricket Format')
@@ -122,7 +143,7 @@ class CricketEDAFixed:
         toss_data = self.matches_df[self.matches_df['toss_winner'].notna() & 
                                    self.matches_df['winner'].notna()]
         toss_data['toss_winner_won'] = (toss_data['toss_winner'] == toss_data['winner'])
-        toss_impact = toss_data.groupby('format')['toss_winner_won'].mean() * 100
+        toss_impact = toss_data.groupby('format', observed=True)['toss_winner_won'].mean() * 100
         
         plt.figure(figsize=(10, 6))
         bars = toss_impact.plot(kind='bar', color='purple', alpha=0.7)
@@ -138,7 +159,7 @@ class CricketEDAFixed:
         print("✅ 8. Toss Impact")
         
         # 9. Venue Analysis
-        venue_data = viz_data.groupby('venue')['total_runs'].mean().sort_values(ascending=False).head(8)
+        venue_data = viz_data.groupby('venue', observed=True)['total_runs'].mean().sort_values(ascending=False).head(8)
         plt.figure(figsize=(12, 6))
         venue_data.plot(kind='barh', color='teal')
         plt.title('Highest Scoring Venues (Average Runs)')
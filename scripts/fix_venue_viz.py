@@ -2,6 +2,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import sqlite3
 
+from frame_loader import read_db_frame
+
 # Use non-interactive backend
 plt.switch_backend('Agg')
 
@@ -9,8 +11,8 @@ def fix_venue_visualization():
     conn = sqlite3.connect("data/cricket_data.db")
     
     # Load data
-    matches_df = pd.read_sql_query("SELECT * FROM matches", conn)
-    innings_df = pd.read_sql_query("SELECT * FROM innings", conn)
+    matches_df = read_db_frame(conn, 'matches', ['match_id', 'format', 'venue'])
+    innings_df = read_db_frame(conn, 'innings', ['match_id', 'total_runs'])
     
     # Merge data and handle missing venues
     viz_data = innings_df.merge(matches_df[['match_id', 'format', 'venue']], on='match_id')
@@ -19,7 +21,7 @@ def fix_venue_visualization():
     venue_data = viz_data[viz_data['venue'].notna()]
     
     if len(venue_data) > 0:
-        venue_stats = venue_data.groupby('venue')['total_runs'].mean().sort_values(ascending=False)
+        venue_stats = venue_data.groupby('venue', observed=True)['total_runs'].mean().sort_values(ascending=False)
         
         # Take top 8 venues
         top_venues = venue_stats.head(8)
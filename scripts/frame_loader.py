@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import logging
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from columnar_store import TABLE_SCHEMAS, parquet_available, parquet_table_exists, read_parquet_table
+from delivery_store import open_delivery_store
+
+logger = logging.getLogger(__name__)
+
+# In-memory dtypes: the stored schema, with match_id as a category in the
+# tables that repeat it on every row
+FRAME_SCHEMAS = {table: dict(schema) for table, schema in TABLE_SCHEMAS.items()}
+for _table in ['players', 'deliveries', 'wickets']:
+    FRAME_SCHEMAS[_table]['match_id'] = 'category'
+
+# Columns holding the same kind of value share one category vocabulary, so
+# e.g. toss_winner == winner or batting_team == winner compare codes directly
+CATEGORY_GROUPS = {
+    'team': {
+        'matches': ['team1', 'team2', 'toss_winner', 'winner'],
+        'players': ['team'],
+        'innings': ['batting_team'],
+        'deliveries': ['batting_team']
+    },
+    'player': {
+        'matches': ['player_of_match'],
+        'players': ['player_name'],
+        'deliveries': ['batter', 'non_striker', 'bowler', 'player_dismissed'],
+        'wickets': ['player_out']
+    }
+}
+
+def optimise_frame(table, df):
+    """Cast df in place to the declared dtypes; undeclared columns are downcast
+
+    Integer columns with missing values become nullable integers, and
+    undeclared text columns become categories when they repeat.
+    """
+    schema = FRAME_SCHEMAS.get(table, {})
+
+    for col in df.columns:
+        dtype = schema.get(col)
+        values = df[col]
+
+        if dtype == 'category':
+            if values.dtype == object:
+                # Mixed str/int columns (e.g. season) become uniform strings first
+                values = values.where(values.isna(), values.astype(str))
+            elif pd.api.types.is_numeric_dtype(values.dtype) and col == 'match_id':
+                values = values.astype(str)
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                df[col] = values.astype('category')
+        elif dtype is not None and dtype.startswith('datetime'):
+            df[col] = pd.to_datetime(values, errors='coerce')
+        elif dtype is not None:
+            if dtype.startswith('int') and values.isna().any():
+                dtype = dtype.capitalize()
+            df[col] = values.astype(dtype)
+        elif col == 'match_id':
+            df[col] = values.where(values.isna(), values.astype(str))
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            df[col] = pd.to_numeric(values, downcast='integer')
+        elif (values.dtype == object or pd.api.types.is_string_dtype(values.dtype)) \
+                and len(values) > 0 and values.nunique() < len(values) // 2:
+            df[col] = values.astype('category')
+
+    return df
+
+def concat_frames(frames):
+    """pd.concat for typed chunks, keeping categoricals whose categories differ"""
+    frames = [df for df in frames if df is not None]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    combined = {}
+    for col in frames[0].columns:
+        if all(isinstance(df[col].dtype, pd.CategoricalDtype) for df in frames):
+            combined[col] = union_categoricals([df[col] for df in frames], ignore_order=True)
+    df = pd.concat(frames, ignore_index=True)
+    for col, values in combined.items():
+        df[col] = values
+    return df
+
+def unify_categories(frames):
+    """Give the columns of each CATEGORY_GROUPS group one shared vocabulary
+
+    frames maps table name -> DataFrame and is modified in place.
+    """
+    for group in CATEGORY_GROUPS.values():
+        columns = [(table, col) for table, cols in group.items() if table in frames
+                   for col in cols if col in frames[table].columns
+                   and isinstance(frames[table][col].dtype, pd.CategoricalDtype)]
+        if len(columns) < 2:
+            continue
+
+        categories = set()
+        for table, col in columns:
+            categories.update(frames[table][col].cat.categories)
+        categories = sorted(categories)
+
+        for table, col in columns:
+            frames[table][col] = frames[table][col].cat.set_categories(categories)
+    return frames
+
+def read_csv_frame(csv_path, table, columns=None):
+    """Read a processed CSV straight into its declared dtypes
+
+    Categories and match_id are parsed as such, so no object column of the
+    full table is ever materialised; numbers are downcast afterwards.
+    """
+    schema = FRAME_SCHEMAS[table]
+    dtype = {col: 'category' for col, col_dtype in schema.items() if col_dtype == 'category'}
+    dtype.setdefault('match_id', str)
+    if columns is not None:
+        dtype = {col: col_dtype for col, col_dtype in dtype.items() if col in columns}
+
+    df = pd.read_csv(csv_path, usecols=columns, dtype=dtype)
+    return optimise_frame(table, df)
+
+def read_processed_frame(processed_data_dir, table, columns=None):
+    """One processed table, from the typed Parquet copy when present, else the CSV
+
+    Deliveries come from the memory-mapped store when it has been written:
+    their numeric columns are views of the mapping rather than copies.
+    """
+    if table == 'deliveries':
+        store = open_delivery_store(processed_data_dir)
+        if store is not None:
+            return store.frame(columns)
+
+    if parquet_available() and parquet_table_exists(processed_data_dir, table):
+        return optimise_frame(table, read_parquet_table(processed_data_dir, table, columns=columns))
+
+    csv_path = os.path.join(processed_data_dir, f"{table}.csv")
+    if not os.path.exists(csv_path):
+        logger.error(f"CSV file not found: {csv_path}")
+        return None
+    return read_csv_frame(csv_path, table, columns)
+
+def read_db_frame(conn, table, columns=None, chunksize=200000):
+    """One SQLite table as a typed frame, converted chunk by chunk"""
+    select = ', '.join(columns) if columns else '*'
+    chunks = pd.read_sql_query(f"SELECT {select} FROM {table}", conn, chunksize=chunksize)
+    return concat_frames([optimise_frame(table, chunk) for chunk in chunks])
+
+def load_processed_frames(processed_data_dir="data/processed", tables=('matches', 'deliveries', 'innings')):
+    """{table: typed frame} from the processed tables, with shared categories"""
+    return unify_categories({table: read_processed_frame(processed_data_dir, table) for table in tables})
+
+def load_db_frames(conn, tables=('matches', 'deliveries', 'innings')):
+    """{table: typed frame} from a SQLite connection or path, with shared categories"""
+    if isinstance(conn, str):
+        path_conn = sqlite3.connect(conn)
+        try:
+            return load_db_frames(path_conn, tables)
+        finally:
+            path_conn.close()
+    return unify_categories({table: read_db_frame(conn, table) for table in tables})
+
+def plain_values(df):
+    """Categoricals to objects and timestamps to dates, as SQLite's to_sql expects"""
+    df = df.copy()
+    for col in df.select_dtypes(include='category').columns:
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+    for col in df.select_dtypes(include='datetime').columns:
+        df[col] = df[col].dt.strftime('%Y-%m-%d')
+    return df
+
+def frame_memory(df):
+    """Bytes held by df, including the strings behind object columns"""
+    return int(df.memory_usage(deep=True).sum())
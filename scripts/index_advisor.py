@@ -0,0 +1,254 @@
+import re
+import json
+import time
+import sqlite3
+import argparse
+import logging
+
+from query_file import QUERY_FILE, parse_query_file
+
+logger = logging.getLogger(__name__)
+
+# Composite / covering indexes for the analysis_queries.sql workload.
+# Each entry: index name -> (CREATE INDEX statement, queries it serves)
+WORKLOAD_INDEXES = {
+    # GROUP BY batter_key[, match_id, innings_number] over batter_runs and balls faced,
+    # read from the index alone; format_key last so per-format leaderboards stay covered
+    'idx_fact_deliveries_batter_innings': (
+        "CREATE INDEX IF NOT EXISTS idx_fact_deliveries_batter_innings "
+        "ON fact_deliveries(batter_key, match_id, innings_number, batter_runs, is_batter_ball, format_key)",
+        [1, 5, 10, 17]),
+    # Bowler leaderboards and best innings figures: legal balls, runs and bowler
+    # wickets per bowler[, innings] without touching the table
+    'idx_fact_deliveries_bowler_innings': (
+        "CREATE INDEX IF NOT EXISTS idx_fact_deliveries_bowler_innings "
+        "ON fact_deliveries(bowler_key, match_id, innings_number, total_runs, is_legal_ball, "
+        "is_bowler_wicket, format_key)",
+        [2, 6, 16]),
+    'idx_fact_deliveries_wicket_type': (
+        "CREATE INDEX IF NOT EXISTS idx_fact_deliveries_wicket_type "
+        "ON fact_deliveries(wicket_type) WHERE wicket_type IS NOT NULL",
+        [9]),
+    # Pair-per-innings grouping for partnerships
+    'idx_fact_deliveries_pairs': (
+        "CREATE INDEX IF NOT EXISTS idx_fact_deliveries_pairs "
+        "ON fact_deliveries(batter_key, non_striker_key, batting_team_key, match_id, innings_number, "
+        "total_runs, is_legal_ball)",
+        [14]),
+    # Per-format delivery aggregates straight from the fact's format_key
+    'idx_fact_deliveries_format_over': (
+        "CREATE INDEX IF NOT EXISTS idx_fact_deliveries_format_over "
+        "ON fact_deliveries(format_key, match_id, over_number, total_runs, batter_runs, "
+        "extras_runs, is_legal_ball, is_batter_ball, wicket_type)",
+        [13, 19]),
+    'idx_innings_match_number': (
+        "CREATE INDEX IF NOT EXISTS idx_innings_match_number "
+        "ON innings(match_id, innings_number, total_runs, total_overs, batting_team)",
+        [7, 15, 20]),
+    'idx_innings_number_runs': (
+        "CREATE INDEX IF NOT EXISTS idx_innings_number_runs "
+        "ON innings(innings_number, total_runs)",
+        [4]),
+    'idx_matches_format_match': (
+        "CREATE INDEX IF NOT EXISTS idx_matches_format_match "
+        "ON matches(format, match_id, toss_winner, winner)",
+        [8, 15]),
+    'idx_matches_format_team1': (
+        "CREATE INDEX IF NOT EXISTS idx_matches_format_team1 "
+        "ON matches(format, team1, winner)",
+        [3]),
+    'idx_matches_format_team2': (
+        "CREATE INDEX IF NOT EXISTS idx_matches_format_team2 "
+        "ON matches(format, team2, winner)",
+        [3]),
+    'idx_matches_venue_winner': (
+        "CREATE INDEX IF NOT EXISTS idx_matches_venue_winner "
+        "ON matches(venue, winner, city)",
+        [7, 18]),
+    'idx_matches_winner_result': (
+        "CREATE INDEX IF NOT EXISTS idx_matches_winner_result "
+        "ON matches(winner, result_type, result_margin)",
+        [11]),
+    'idx_matches_player_of_match': (
+        "CREATE INDEX IF NOT EXISTS idx_matches_player_of_match "
+        "ON matches(player_of_match, format)",
+        [12])
+}
+
+# "SCAN t" or "SCAN t USING INDEX i" visits every row; covering-index scans read the index only
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: USING INDEX (\w+))?$')
+TEMP_BTREE = re.compile(r'USE TEMP B-TREE FOR (.+)$')
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN detail lines for a query"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+def plan_issues(plan):
+    """Full table scans and temp B-trees in a query plan"""
+    issues = {'scans': [], 'temp_btrees': []}
+
+    for detail in plan:
+        scan = FULL_SCAN.match(detail)
+        if scan:
+            issues['scans'].append(detail)
+            continue
+
+        temp = TEMP_BTREE.search(detail)
+        if temp:
+            issues['temp_btrees'].append(temp.group(1))
+
+    return issues
+
+def time_query(conn, sql, repeat=3):
+    """Best wall time of repeat runs, fetching every row"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def analyse_workload(conn, queries, repeat=3):
+    """Plan issues and timings for every query"""
+    results = {}
+    for query in queries:
+        plan = explain(conn, query['sql'])
+        results[query['number']] = {
+            'title': query['title'],
+            'plan': plan,
+            **plan_issues(plan),
+            'seconds': time_query(conn, query['sql'], repeat)
+        }
+    return results
+
+def index_columns(conn):
+    """{index name: (table, [columns])} for the droppable (non-unique, full) user indexes"""
+    indexes = {}
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+    for table in tables:
+        for seq, name, unique, origin, partial in conn.execute(f"PRAGMA index_list({table})"):
+            if unique or partial or origin != 'c':
+                continue
+            columns = [row[2] for row in conn.execute(f"PRAGMA index_info({name})")]
+            indexes[name] = (table, columns)
+
+    return indexes
+
+def redundant_indexes(conn):
+    """Indexes whose columns are a leading prefix of another index on the same table"""
+    indexes = index_columns(conn)
+    redundant = {}
+
+    for name, (table, columns) in sorted(indexes.items()):
+        for other, (other_table, other_columns) in sorted(indexes.items()):
+            if other == name or other in redundant or other_table != table:
+                continue
+            if other_columns[:len(columns)] == columns:
+                redundant[name] = other
+                break
+
+    return redundant
+
+def database_size(conn):
+    """Bytes in use (free pages left by dropped indexes are not counted)"""
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return (page_count - free_pages) * page_size
+
+def create_workload_indexes(conn):
+    """Create the workload indexes, drop the ones they make redundant, refresh planner statistics"""
+    for name, (create_sql, query_numbers) in WORKLOAD_INDEXES.items():
+        start = time.perf_counter()
+        conn.execute(create_sql)
+        logger.info(f"  {name} ({time.perf_counter() - start:.2f}s) for queries {query_numbers}")
+
+    for name, covered_by in redundant_indexes(conn).items():
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+        logger.info(f"  dropped {name} (prefix of {covered_by})")
+
+    conn.execute("ANALYZE")
+    conn.commit()
+
+def print_report(before, after, size_before, size_after):
+    """Before/after table of timings, database size and remaining plan issues"""
+    print("\n" + "=" * 78)
+    print("📇 INDEX ADVISOR REPORT")
+    print("=" * 78)
+    print(f"{'#':>3}  {'before':>9}  {'after':>9}  {'speedup':>7}  {'scans':>9}  {'temp b-trees':>12}  title")
+
+    total_before = total_after = 0.0
+    for number, b in before.items():
+        a = after[number]
+        total_before += b['seconds']
+        total_after += a['seconds']
+        speedup = b['seconds'] / a['seconds'] if a['seconds'] else float('inf')
+        print(f"{number:>3}  {b['seconds'] * 1000:>7.1f}ms  {a['seconds'] * 1000:>7.1f}ms  {speedup:>6.1f}x  "
+              f"{len(b['scans']):>4} → {len(a['scans']):<2}  {len(b['temp_btrees']):>5} → {len(a['temp_btrees']):<4}  "
+              f"{b['title'][:40]}")
+
+    print("-" * 78)
+    print(f"⏱️  Workload total: {total_before:.2f}s → {total_after:.2f}s "
+          f"({total_before / total_after:.1f}x)")
+    print(f"💾 Database size: {size_before / 1e6:,.1f} MB → {size_after / 1e6:,.1f} MB")
+
+    remaining = {number: a['scans'] for number, a in after.items() if a['scans']}
+    if remaining:
+        print("\n🔍 Full scans still in the plans:")
+        for number, scans in remaining.items():
+            for scan in scans:
+                print(f"  • Q{number}: {scan}")
+
+def advise_indexes(db_path="data/cricket_data.db", query_file=QUERY_FILE, apply=True,
+                   repeat=3, report_path=None):
+    """Explain and time the workload, create the workload indexes, then measure again"""
+    queries = parse_query_file(query_file)
+    conn = sqlite3.connect(db_path)
+
+    try:
+        logger.info(f"Analysing {len(queries)} queries from {query_file}...")
+        before = analyse_workload(conn, queries, repeat)
+
+        if not apply:
+            for number, result in before.items():
+                issues = result['scans'] + [f"TEMP B-TREE FOR {t}" for t in result['temp_btrees']]
+                print(f"Q{number:<3} {result['seconds'] * 1000:8.1f}ms  {result['title']}")
+                for issue in issues:
+                    print(f"       ⚠️  {issue}")
+            return before
+
+        size_before = database_size(conn)
+        logger.info("Creating workload indexes...")
+        create_workload_indexes(conn)
+        size_after = database_size(conn)
+
+        after = analyse_workload(conn, queries, repeat)
+        print_report(before, after, size_before, size_after)
+
+        if report_path:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump({'before': before, 'after': after,
+                           'size_before': size_before, 'size_after': size_after}, f, indent=2)
+            print(f"\n📁 Report saved to {report_path}")
+
+        return before, after
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    
+    parser = argparse.ArgumentParser(description="Tune indexes to the analysis query workload")
+    parser.add_argument("--db", default="data/cricket_data.db", help="SQLite database to tune")
+    parser.add_argument("--queries", default=QUERY_FILE, help="SQL file with the workload")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report scans, temp B-trees and timings")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per query (best is kept)")
+    parser.add_argument("--report", help="Write the before/after report as JSON")
+    args = parser.parse_args()
+
+    advise_indexes(args.db, args.queries, apply=not args.dry_run,
+                   repeat=args.repeat, report_path=args.report)
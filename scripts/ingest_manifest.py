@@ -0,0 +1,115 @@
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IngestManifest:
+    """Per-file record of what has already been ingested from data/raw_json.
+
+    Each entry is keyed by the source key (the file path relative to the raw
+    data directory, or <archive>/<member> for ZIP sources) and holds the
+    size, mtime, content hash (SHA-256, or the member CRC-32 for archives),
+    match id, format and the Cricsheet meta.revision / data_version seen
+    when the match was extracted.
+    """
+
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.entries = {}
+        self.pending_hashes = {}
+
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('files', {})
+            except Exception as e:
+                logger.error(f"Error loading manifest {manifest_path}: {str(e)}")
+                self.entries = {}
+
+    def exists(self):
+        """True when a previous run recorded at least one file"""
+        return bool(self.entries)
+
+    def clear(self):
+        """Drop every entry ahead of a full rebuild"""
+        self.entries = {}
+        self.pending_hashes = {}
+
+    def diff(self, format_sources):
+        """Compare the raw match sources against the manifest.
+
+        format_sources maps format -> list of match sources (see
+        match_sources). Returns a tuple of (changed, removed): changed maps
+        format -> list of new or modified sources, removed is the list of
+        manifest entries whose source is gone. Sources whose size/mtime moved
+        but whose content hash is unchanged are refreshed in place and not
+        reported.
+        """
+        changed = {match_format: [] for match_format in format_sources}
+        seen = set()
+        self.pending_hashes = {}
+
+        for match_format, sources in format_sources.items():
+            for source in sources:
+                seen.add(source.key)
+
+                size, mtime = source.stat()
+                entry = self.entries.get(source.key)
+
+                if entry and entry['size'] == size and entry['mtime'] == mtime:
+                    continue
+
+                content_hash = source.content_hash()
+
+                if entry and entry['sha256'] == content_hash:
+                    entry['size'] = size
+                    entry['mtime'] = mtime
+                    continue
+
+                self.pending_hashes[source.key] = content_hash
+                changed[match_format].append(source)
+
+        removed = [entry for key, entry in self.entries.items() if key not in seen]
+
+        return changed, removed
+
+    def record(self, source, match_format, match_id, revision=None, data_version=None):
+        """Record a successfully extracted source"""
+        size, mtime = source.stat()
+        content_hash = self.pending_hashes.pop(source.key, None) or source.content_hash()
+
+        self.entries[source.key] = {
+            'path': source.key,
+            'format': match_format,
+            'match_id': match_id,
+            'size': size,
+            'mtime': mtime,
+            'sha256': content_hash,
+            'revision': revision,
+            'data_version': data_version
+        }
+
+    def remove(self, entry):
+        """Forget a file whose source was deleted"""
+        self.entries.pop(entry['path'], None)
+
+    def match_ids(self, sources):
+        """Match ids previously recorded for the given sources"""
+        ids = []
+        for source in sources:
+            entry = self.entries.get(source.key)
+            if entry:
+                ids.append(entry['match_id'])
+        return ids
+
+    def save(self):
+        """Write the manifest atomically"""
+        os.makedirs(os.path.dirname(self.manifest_path) or '.', exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.entries}, f, indent=2, sort_keys=True)
+
+        os.replace(tmp_path, self.manifest_path)
+        logger.info(f"Manifest saved: {len(self.entries)} files tracked")
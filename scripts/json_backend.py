@@ -0,0 +1,199 @@
+import json
+import logging
+from typing import Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+class StdlibJsonParser:
+    """Decode with the standard library json module"""
+    name = "json"
+
+    def loads(self, data):
+        return json.loads(data)
+
+class OrjsonParser:
+    """Decode with orjson into plain dicts and lists"""
+    name = "orjson"
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+class MsgspecParser:
+    """Decode with msgspec into plain dicts and lists"""
+    name = "msgspec"
+
+    def __init__(self):
+        self.decoder = msgspec.json.Decoder()
+
+    def loads(self, data):
+        return self.decoder.decode(data)
+
+if msgspec is not None:
+    class CricsheetStruct(msgspec.Struct):
+        """Typed Cricsheet node that also answers dict-style get()/[] lookups
+
+        Only the fields the processor reads are declared; everything else in
+        the file is skipped by the decoder. Absent fields are None, and get()
+        then returns the caller's default exactly like dict.get() on a
+        missing key, so the existing extractors work unchanged.
+        """
+
+        def get(self, key, default=None):
+            value = getattr(self, key, None)
+            return default if value is None else value
+
+        def __getitem__(self, key):
+            value = getattr(self, key, None)
+            if value is None:
+                raise KeyError(key)
+            return value
+
+    class Meta(CricsheetStruct):
+        data_version: Optional[str] = None
+        created: Optional[str] = None
+        revision: Optional[int] = None
+
+    class Toss(CricsheetStruct):
+        winner: Optional[str] = None
+        decision: Optional[str] = None
+
+    class OutcomeBy(CricsheetStruct):
+        runs: Optional[int] = None
+        wickets: Optional[int] = None
+        innings: Optional[int] = None
+
+    class Outcome(CricsheetStruct):
+        winner: Optional[str] = None
+        result: Optional[str] = None
+        method: Optional[str] = None
+        eliminator: Optional[str] = None
+        by: Optional[OutcomeBy] = None
+
+    class Officials(CricsheetStruct):
+        umpires: Optional[List[str]] = None
+        tv_umpires: Optional[List[str]] = None
+        match_referees: Optional[List[str]] = None
+
+    class Registry(CricsheetStruct):
+        people: Optional[Dict[str, str]] = None
+
+    class Info(CricsheetStruct):
+        city: Optional[str] = None
+        venue: Optional[str] = None
+        dates: Optional[List[str]] = None
+        match_type: Optional[str] = None
+        season: Optional[Union[str, int]] = None
+        teams: Optional[List[str]] = None
+        toss: Optional[Toss] = None
+        outcome: Optional[Outcome] = None
+        player_of_match: Optional[List[str]] = None
+        officials: Optional[Officials] = None
+        players: Optional[Dict[str, List[str]]] = None
+        registry: Optional[Registry] = None
+        balls_per_over: Optional[int] = None
+
+    class Runs(CricsheetStruct):
+        batter: int = 0
+        extras: int = 0
+        total: int = 0
+
+    class Extras(CricsheetStruct):
+        wides: Optional[int] = None
+        noballs: Optional[int] = None
+        byes: Optional[int] = None
+        legbyes: Optional[int] = None
+        penalty: Optional[int] = None
+
+    class Fielder(CricsheetStruct):
+        name: Optional[str] = None
+        substitute: Optional[bool] = None
+
+    class Wicket(CricsheetStruct):
+        kind: Optional[str] = None
+        player_out: Optional[str] = None
+        fielders: Optional[List[Fielder]] = None
+
+    class Delivery(CricsheetStruct):
+        batter: Optional[str] = None
+        non_striker: Optional[str] = None
+        bowler: Optional[str] = None
+        runs: Optional[Runs] = None
+        extras: Optional[Extras] = None
+        wickets: Optional[List[Wicket]] = None
+
+    class Over(CricsheetStruct):
+        over: int = 0
+        deliveries: Optional[List[Delivery]] = None
+
+    class Innings(CricsheetStruct):
+        team: Optional[str] = None
+        overs: Optional[List[Over]] = None
+
+    class Match(CricsheetStruct):
+        meta: Optional[Meta] = None
+        info: Optional[Info] = None
+        innings: Optional[List[Innings]] = None
+
+class MsgspecStructParser:
+    """Decode straight into typed Cricsheet structs with msgspec
+
+    Files that do not fit the declared schema are decoded generically instead.
+    """
+    name = "msgspec-struct"
+
+    def __init__(self):
+        self.decoder = msgspec.json.Decoder(Match)
+        self.fallback = msgspec.json.Decoder()
+
+    def loads(self, data):
+        try:
+            return self.decoder.decode(data)
+        except msgspec.ValidationError as e:
+            logger.warning(f"Schema mismatch, decoding generically: {str(e)}")
+            return self.fallback.decode(data)
+
+JSON_BACKENDS = {
+    'json': lambda: StdlibJsonParser(),
+    'orjson': lambda: OrjsonParser() if orjson is not None else None,
+    'msgspec': lambda: MsgspecParser() if msgspec is not None else None,
+    'msgspec-struct': lambda: MsgspecStructParser() if msgspec is not None else None
+}
+
+# Preference order for backend="auto"
+AUTO_ORDER = ['msgspec-struct', 'orjson', 'json']
+
+def available_backends():
+    """Names of the JSON backends usable in this environment"""
+    return [name for name, factory in JSON_BACKENDS.items() if factory() is not None]
+
+def get_json_parser(backend="auto"):
+    """Return a parser for the named backend, or the fastest installed one for "auto"
+
+    Requesting a backend whose library is not installed falls back to the
+    stdlib parser with a warning.
+    """
+    if backend == "auto":
+        for name in AUTO_ORDER:
+            parser = JSON_BACKENDS[name]()
+            if parser is not None:
+                return parser
+
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Invalid JSON backend: {backend}")
+
+    parser = JSON_BACKENDS[backend]()
+    if parser is None:
+        logger.warning(f"JSON backend {backend} is not installed, using stdlib json")
+        parser = StdlibJsonParser()
+
+    return parser
@@ -0,0 +1,153 @@
+import os
+import glob
+import time
+import hashlib
+import zipfile
+import logging
+
+from raw_store import open_raw_pack, read_pack_member, close_packs
+
+logger = logging.getLogger(__name__)
+
+# Cricsheet archive names, e.g. tests_json.zip, plus the scraper's older <format>.zip
+ARCHIVE_PATTERNS = ["{format}_json.zip", "{format}.zip"]
+
+# ZipFile handles opened by this process, keyed by archive path
+_open_archives = {}
+
+def open_archive(archive_path):
+    """Open an archive once per process and reuse the handle"""
+    archive = _open_archives.get(archive_path)
+    if archive is None:
+        archive = zipfile.ZipFile(archive_path, 'r')
+        _open_archives[archive_path] = archive
+    return archive
+
+def file_sha256(filepath, block_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def close_archives():
+    """Close every archive (and raw pack) handle opened by this process"""
+    for archive in _open_archives.values():
+        archive.close()
+    _open_archives.clear()
+    close_packs()
+
+class FileSource:
+    """A match stored as a JSON file under the raw data directory"""
+
+    def __init__(self, path, raw_data_dir):
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.match_id = self.filename.replace('.json', '')
+        self.key = os.path.relpath(path, raw_data_dir).replace(os.sep, '/')
+
+    def __repr__(self):
+        return self.path
+
+    def stat(self):
+        """(size, mtime) used for the cheap unchanged check"""
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_mtime
+
+    def read_bytes(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def content_hash(self):
+        return file_sha256(self.path)
+
+class ZipMemberSource:
+    """A match stored as a member of a Cricsheet ZIP archive
+
+    Size, mtime and CRC-32 come from the archive's central directory, so
+    unchanged members can be recognised without decompressing them.
+    """
+
+    def __init__(self, archive_path, info):
+        self.archive_path = archive_path
+        self.member = info.filename
+        self.filename = os.path.basename(info.filename)
+        self.match_id = self.filename.replace('.json', '')
+        self.key = f"{os.path.basename(archive_path)}/{info.filename}"
+        self.size = info.file_size
+        self.mtime = time.mktime(info.date_time + (0, 0, -1))
+        self.crc = info.CRC
+
+    def __repr__(self):
+        return f"{self.archive_path}:{self.member}"
+
+    def stat(self):
+        return self.size, self.mtime
+
+    def read_bytes(self):
+        return open_archive(self.archive_path).read(self.member)
+
+    def content_hash(self):
+        return f"crc32:{self.crc:08x}"
+
+class PackMemberSource:
+    """A match stored compact and compressed in a format's raw pack (see raw_store)
+
+    Size, mtime and SHA-256 are those of the match file as it was packed,
+    so moving a file into the pack leaves its manifest entry unchanged.
+    """
+
+    def __init__(self, pack, match_id):
+        entry = pack.entries[match_id]
+        self.pack_path = pack.path
+        self.codec = pack.codec
+        self.offset = entry['offset']
+        self.length = entry['length']
+        self.filename = f"{match_id}.json"
+        self.match_id = match_id
+        self.key = f"{pack.match_format}/{self.filename}"
+        self.size = entry['size']
+        self.mtime = entry['mtime']
+        self.sha256 = entry['sha256']
+
+    def __repr__(self):
+        return f"{self.pack_path}:{self.match_id}"
+
+    def stat(self):
+        return self.size, self.mtime
+
+    def read_bytes(self):
+        return read_pack_member(self.pack_path, self.codec, self.offset, self.length)
+
+    def content_hash(self):
+        return self.sha256
+
+def find_format_archive(archive_dir, match_format):
+    """Path of the archive for a format in archive_dir, or None"""
+    if not archive_dir:
+        return None
+
+    for pattern in ARCHIVE_PATTERNS:
+        archive_path = os.path.join(archive_dir, pattern.format(format=match_format))
+        if os.path.exists(archive_path):
+            return archive_path
+    return None
+
+def list_archive_sources(archive_path):
+    """One source per JSON member of an archive, in archive order"""
+    with zipfile.ZipFile(archive_path, 'r') as archive:
+        return [ZipMemberSource(archive_path, info) for info in archive.infolist()
+                if info.filename.endswith('.json') and not info.is_dir()]
+
+def list_file_sources(raw_data_dir, match_format):
+    """One source per JSON file in a format directory, in glob order, then the
+    packed matches without a loose file, in pack order"""
+    format_dir = os.path.join(raw_data_dir, match_format)
+    sources = [FileSource(path, raw_data_dir) for path in glob.glob(os.path.join(format_dir, "*.json"))]
+
+    pack = open_raw_pack(raw_data_dir, match_format)
+    if pack is not None:
+        loose = {source.match_id for source in sources}
+        sources.extend(PackMemberSource(pack, match_id) for match_id in pack.match_ids() if match_id not in loose)
+    return sources
@@ -0,0 +1,214 @@
+import os
+import pickle
+import sqlite3
+import hashlib
+import argparse
+import logging
+import pandas as pd
+from datetime import datetime
+
+from columnar_store import parquet_table_path
+from dashboard_queries import DashboardQueries, FORMAT_OPTIONS
+from frame_loader import load_processed_frames
+from result_cache import data_generation
+from stats_engine import batting_stats, bowling_stats
+
+logger = logging.getLogger(__name__)
+
+DB_PANEL_CACHE = "data/panel_cache.pkl"
+PROCESSED_PANEL_CACHE = "data/processed/panel_cache.pkl"
+
+# Same names and shapes as the DashboardQueries methods
+PANEL_NAMES = ['kpis', 'top_run_scorers', 'top_wicket_takers', 'format_comparison',
+               'dismissal_types', 'team_wins', 'batting_stats', 'bowling_stats', 'match_results']
+
+def top_rows(data, column=None, limit=None):
+    """Rows of a Series/frame by descending value (of column), ties by ascending index
+
+    The same order as the SQL panels' ORDER BY value DESC, name, so tied rows
+    at the limit are the same ones in both dashboards.
+    """
+    data = data.copy()
+    data.index = data.index.astype(object)
+    data = data.sort_index(kind='stable')
+    if column is None:
+        data = data.sort_values(ascending=False, kind='stable')
+    else:
+        data = data.sort_values(column, ascending=False, kind='stable')
+    return data if limit is None else data.head(limit)
+
+def value_counts_frame(values, label, count_label, limit=None):
+    """value_counts() as a two-column frame, without the zero rows categoricals produce"""
+    counts = values.dropna().value_counts()
+    counts = top_rows(counts[counts > 0], limit=limit)
+    return pd.DataFrame({label: counts.index, count_label: counts.values})
+
+def frame_panels(matches_df, deliveries_df, innings_df, match_format):
+    """Every dashboard panel for one format, computed with pandas from the processed tables"""
+    # Innings scoring per format always covers every format
+    format_data = innings_df.merge(matches_df[['match_id', 'format']], on='match_id')
+
+    if match_format not in (None, "All"):
+        matches_df = matches_df[matches_df['format'] == match_format]
+        match_ids = matches_df['match_id']
+        deliveries_df = deliveries_df[deliveries_df['match_id'].isin(match_ids)]
+        innings_df = innings_df[innings_df['match_id'].isin(match_ids)]
+
+    wickets = deliveries_df[deliveries_df['wicket_type'].notna()]
+    panels = {}
+
+    panels['kpis'] = {
+        'total_matches': len(matches_df),
+        'total_deliveries': len(deliveries_df),
+        'total_runs': int(deliveries_df['total_runs'].sum()),
+        'total_wickets': len(wickets),
+        'avg_score': float(innings_df['total_runs'].mean()) if len(innings_df) > 0 else None
+    }
+
+    # Ball flags are absent from tables processed before they existed; get() then counts every delivery
+    batting = batting_stats(deliveries_df['batter'], deliveries_df['batter_runs'],
+                            batter_ball=deliveries_df.get('is_batter_ball'))
+    bowling = bowling_stats(deliveries_df['bowler'], deliveries_df['total_runs'], deliveries_df['wicket_type'],
+                            legal_ball=deliveries_df.get('is_legal_ball'),
+                            bowler_wicket=deliveries_df.get('is_bowler_wicket'))
+
+    top_run_scorers = top_rows(batting['runs'], limit=10)
+    panels['top_run_scorers'] = pd.DataFrame({'batter': top_run_scorers.index,
+                                              'batter_runs': top_run_scorers.values})
+
+    top_wicket_takers = top_rows(bowling['wickets'][bowling['wickets'] > 0], limit=10)
+    panels['top_wicket_takers'] = pd.DataFrame({'bowler': top_wicket_takers.index,
+                                                'wickets': top_wicket_takers.values})
+    panels['dismissal_types'] = value_counts_frame(wickets['wicket_type'], 'wicket_type', 'count')
+    panels['team_wins'] = value_counts_frame(matches_df['winner'], 'winner', 'wins', 8)
+
+    format_stats = format_data.groupby('format', observed=True).agg({
+        'total_runs': ['mean', 'max', 'count'],
+        'total_wickets': 'mean'
+    }).round(2)
+    format_stats.columns = ['Avg Runs', 'Highest Score', 'Innings Played', 'Avg Wickets']
+    format_stats = format_stats.reset_index()
+    format_stats['format'] = format_stats['format'].astype(object)
+    panels['format_comparison'] = format_stats
+
+    # Same columns as DashboardQueries.batting_stats()
+    batting_table = pd.DataFrame({
+        'Total Runs': batting['runs'],
+        'Scoring Shots': batting['balls'] - batting['dots'],
+        'Balls Faced': batting['balls'],
+        'Strike Rate': batting['strike_rate']
+    })
+    panels['batting_stats'] = top_rows(batting_table[batting_table['Balls Faced'] >= 20], 'Total Runs', 15)
+
+    bowling_table = pd.DataFrame({
+        'Runs Conceded': bowling['runs_conceded'],
+        'Balls Bowled': bowling['balls'],
+        'Wickets': bowling['wickets'],
+        'Economy Rate': bowling['economy_rate']
+    })
+    panels['bowling_stats'] = top_rows(bowling_table[bowling_table['Balls Bowled'] >= 30], 'Wickets', 15)
+
+    match_results = matches_df[['match_id', 'format', 'team1', 'team2', 'winner', 'venue', 'date']].copy()
+    match_results['date'] = pd.to_datetime(match_results['date'], errors='coerce').dt.strftime('%Y-%m-%d')
+    panels['match_results'] = match_results.astype(object).reset_index(drop=True)
+
+    return panels
+
+def db_panels(queries, match_format):
+    """Every dashboard panel for one format, from SQLite through DashboardQueries"""
+    return {name: getattr(queries, name)(match_format) for name in PANEL_NAMES}
+
+def processed_fingerprint(processed_data_dir="data/processed"):
+    """Hash of the processed tables' contents (CSV and Parquet), stable across checkouts"""
+    paths = []
+    for table in ['matches', 'deliveries', 'innings']:
+        paths.append(os.path.join(processed_data_dir, f"{table}.csv"))
+        for root, dirs, files in os.walk(parquet_table_path(processed_data_dir, table)):
+            paths.extend(os.path.join(root, filename) for filename in files)
+
+    digest = hashlib.sha256()
+    found = False
+    for path in sorted(paths):
+        if not os.path.isfile(path):
+            continue
+        found = True
+        digest.update(os.path.relpath(path, processed_data_dir).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(hashlib.file_digest(f, 'sha256').digest())
+
+    return digest.hexdigest()[:16] if found else None
+
+def write_panel_cache(panels, totals, source, token, output_path):
+    """Atomically write {format: {panel: data}} with the token of the data it was built from"""
+    artifact = {
+        'source': source,
+        'token': token,
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        'totals': totals,
+        'panels': panels
+    }
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, output_path)
+    logger.info(f"Panel cache written to {output_path} ({os.path.getsize(output_path) / 1024:.1f} KB)")
+
+def read_panel_cache(path, token):
+    """The cached artifact if it was built from data with this token, else None"""
+    if token is None or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            artifact = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Unreadable panel cache {path}: {str(e)}")
+        return None
+    if artifact.get('token') != token:
+        return None
+    return artifact
+
+def build_db_panel_cache(db_path="data/cricket_data.db", output_path=DB_PANEL_CACHE):
+    """Precompute every panel of every format from the SQLite database"""
+    token = data_generation(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        queries = DashboardQueries(conn)
+        panels = {fmt: db_panels(queries, fmt) for fmt in FORMAT_OPTIONS}
+        totals = queries.totals()
+    finally:
+        conn.close()
+    write_panel_cache(panels, totals, 'db', token, output_path)
+    return output_path
+
+def build_processed_panel_cache(processed_data_dir="data/processed", output_path=PROCESSED_PANEL_CACHE):
+    """Precompute every panel of every format from the processed tables"""
+    token = processed_fingerprint(processed_data_dir)
+    frames = load_processed_frames(processed_data_dir)
+    panels = {fmt: frame_panels(frames['matches'], frames['deliveries'], frames['innings'], fmt)
+              for fmt in FORMAT_OPTIONS}
+    totals = (len(frames['deliveries']), len(frames['matches']))
+    write_panel_cache(panels, totals, 'processed', token, output_path)
+    return output_path
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Precompute the dashboard panels for every format")
+    parser.add_argument("--source", choices=["all", "db", "processed"], default="all",
+                        help="Build from the SQLite database, the processed tables, or both")
+    parser.add_argument("--db", default="data/cricket_data.db", help="SQLite database")
+    parser.add_argument("--processed-dir", default="data/processed", help="Processed tables directory")
+    args = parser.parse_args()
+
+    built = []
+    if args.source in ("all", "db") and os.path.exists(args.db):
+        built.append(build_db_panel_cache(args.db))
+    if args.source in ("all", "processed") and processed_fingerprint(args.processed_dir):
+        built.append(build_processed_panel_cache(args.processed_dir,
+                                                 os.path.join(args.processed_dir, "panel_cache.pkl")))
+
+    if built:
+        print(f"✅ Panel caches built: {', '.join(built)}")
+    else:
+        print("❌ No database or processed data found")
@@ -0,0 +1,97 @@
+import os
+import json
+import shutil
+import pandas as pd
+import logging
+
+from frame_loader import read_csv_frame
+
+logger = logging.getLogger(__name__)
+
+DELTA_DIRNAME = "delta"
+DELTA_TABLES = ['matches', 'players', 'innings', 'deliveries', 'wickets']
+
+def delta_dir(processed_data_dir):
+    return os.path.join(processed_data_dir, DELTA_DIRNAME)
+
+def load_pending_delta(processed_data_dir):
+    """Load the delta not yet applied to the database, or None
+
+    Returns a dict with 'full' (a full rebuild happened since the last
+    refresh), 'changed_ids', 'removed_ids' and 'frames' (table -> rows of
+    the changed matches).
+    """
+    path = os.path.join(delta_dir(processed_data_dir), "delta.json")
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    frames = {}
+    for table in DELTA_TABLES:
+        csv_path = os.path.join(delta_dir(processed_data_dir), f"{table}.csv")
+        if os.path.exists(csv_path) and os.path.getsize(csv_path) > 1:
+            frames[table] = read_csv_frame(csv_path, table)
+        else:
+            frames[table] = pd.DataFrame()
+
+    return {
+        'full': meta.get('full', False),
+        'changed_ids': set(meta.get('changed_ids', [])),
+        'removed_ids': set(meta.get('removed_ids', [])),
+        'frames': frames
+    }
+
+def save_pending_delta(processed_data_dir, changed_ids=(), removed_ids=(), frames=None, full=False):
+    """Record a processing delta for the next database refresh
+
+    A pending delta that has not been applied yet is merged with the new one,
+    so several incremental ingests can be followed by a single refresh. A
+    full rebuild replaces everything with a full=True marker.
+    """
+    changed_ids = set(changed_ids)
+    removed_ids = set(removed_ids)
+    frames = frames or {}
+
+    pending = load_pending_delta(processed_data_dir)
+    if full:
+        pending = None
+    elif pending is not None:
+        if pending['full']:
+            return
+
+        touched = changed_ids | removed_ids
+        changed_ids |= pending['changed_ids'] - touched
+        removed_ids |= pending['removed_ids'] - touched
+
+        merged = {}
+        for table in DELTA_TABLES:
+            previous = pending['frames'][table]
+            if not previous.empty:
+                previous = previous[~previous['match_id'].isin(touched)]
+            merged[table] = pd.concat([previous, frames.get(table, pd.DataFrame())], ignore_index=True)
+        frames = merged
+
+    clear_pending_delta(processed_data_dir)
+    os.makedirs(delta_dir(processed_data_dir), exist_ok=True)
+
+    if not full:
+        for table in DELTA_TABLES:
+            frames.get(table, pd.DataFrame()).to_csv(
+                os.path.join(delta_dir(processed_data_dir), f"{table}.csv"), index=False)
+
+    with open(os.path.join(delta_dir(processed_data_dir), "delta.json"), 'w', encoding='utf-8') as f:
+        json.dump({'full': full,
+                   'changed_ids': sorted(changed_ids),
+                   'removed_ids': sorted(removed_ids)}, f, indent=2)
+
+    if full:
+        logger.info("Pending database delta: full rebuild")
+    else:
+        logger.info(f"Pending database delta: {len(changed_ids)} changed, {len(removed_ids)} removed matches")
+
+def clear_pending_delta(processed_data_dir):
+    """Forget the pending delta once it has been applied"""
+    if os.path.exists(delta_dir(processed_data_dir)):
+        shutil.rmtree(delta_dir(processed_data_dir))
@@ -2,6 +2,56 @@ import pandas as pd
 import sqlite3
 import os
 
+from frame_loader import load_db_frames
+from result_cache import ResultCache
+from stats_engine import batting_stats, bowling_stats
+from summary_tables import summary_tables_exist
+
+def format_player_stats(conn):
+    """(batting, bowling) per (player, format) from the deliveries, through the stats engine"""
+    frames = load_db_frames(conn, tables=('matches', 'deliveries'))
+    deliveries_df = frames['deliveries']
+    formats = deliveries_df['match_id'].map(frames['matches'].set_index('match_id')['format']).rename('format')
+    
+    batting = batting_stats(deliveries_df['batter'], deliveries_df['batter_runs'],
+                            deliveries_df['player_dismissed'], by=[formats],
+                            batter_ball=deliveries_df['is_batter_ball'])
+    bowling = bowling_stats(deliveries_df['bowler'], deliveries_df['total_runs'], by=[formats],
+                            legal_ball=deliveries_df['is_legal_ball'],
+                            bowler_wicket=deliveries_df['is_bowler_wicket'])
+    return batting, bowling
+
+def batting_csv_frame(batting, min_balls=20):
+    """player_batting_stats.csv columns from batting_stats() output"""
+    batting = batting[batting['balls'] >= min_balls]
+    return pd.DataFrame({
+        'player_name': batting.index.get_level_values(0).astype(object),
+        'format': batting.index.get_level_values(1).astype(object),
+        'balls_faced': batting['balls'].values,
+        'total_runs': batting['runs'].values,
+        'avg_runs_per_ball': (batting['runs'] / batting['balls']).round(2).values,
+        'strike_rate': batting['strike_rate'].values,
+        'fours': batting['fours'].values,
+        'sixes': batting['sixes'].values,
+        'boundaries': (batting['fours'] + batting['sixes']).values
+    })
+
+def bowling_csv_frame(bowling, min_balls=30):
+    """player_bowling_stats.csv columns from bowling_stats() output
+
+    bowling_average is balls per wicket, as in the summary-table export.
+    """
+    bowling = bowling[bowling['balls'] >= min_balls]
+    return pd.DataFrame({
+        'player_name': bowling.index.get_level_values(0).astype(object),
+        'format': bowling.index.get_level_values(1).astype(object),
+        'balls_bowled': bowling['balls'].values,
+        'runs_conceded': bowling['runs_conceded'].values,
+        'wickets': bowling['wickets'].values,
+        'economy_rate': bowling['economy_rate'].values,
+        'bowling_average': bowling['bowling_strike_rate'].values
+    })
+
 def prepare_powerbi_data():
     """Prepare CSV files optimized for Power BI"""
     
@@ -9,6 +59,8 @@ def prepare_powerbi_data():
     
     # Connect to database
     conn = sqlite3.connect("data/cricket_data.db")
+    use_summaries = summary_tables_exist(conn)
+    cache = ResultCache()
     
     # Create PowerBI data directory
     powerbi_dir = "data/powerbi"
@@ -37,50 +89,53 @@ def prepare_powerbi_data():
     WHERE team1 IS NOT NULL AND team2 IS NOT NULL
     """
     
-    matches_df = pd.read_sql_query(matches_query, conn)
+    matches_df = cache.read_sql(matches_query, conn)
     matches_df['date'] = pd.to_datetime(matches_df['date'])
     matches_df.to_csv(f"{powerbi_dir}/matches.csv", index=False)
     
     # 2. Player Performance Summary
-    player_stats_query = """
-    SELECT 
-        d.batter as player_name,
-        m.format,
-        COUNT(*) as balls_faced,
-        SUM(d.batter_runs) as total_runs,
-        ROUND(AVG(d.batter_runs), 2) as avg_runs_per_ball,
-        ROUND(SUM(d.batter_runs) * 100.0 / COUNT(*), 2) as strike_rate,
-        COUNT(CASE WHEN d.batter_runs = 4 THEN 1 END) as fours,
-        COUNT(CASE WHEN d.batter_runs = 6 THEN 1 END) as sixes,
-        COUNT(CASE WHEN d.batter_runs >= 4 THEN 1 END) as boundaries
-    FROM deliveries d
-    JOIN matches m ON d.match_id = m.match_id
-    WHERE d.batter IS NOT NULL
-    GROUP BY d.batter, m.format
-    HAVING balls_faced >= 20
-    """
+    if use_summaries:
+        player_stats_query = """
+        SELECT 
+            p.player_name,
+            s.format,
+            s.balls as balls_faced,
+            s.runs as total_runs,
+            ROUND(s.runs * 1.0 / s.balls, 2) as avg_runs_per_ball,
+            s.strike_rate,
+            s.fours,
+            s.sixes,
+            s.fours + s.sixes as boundaries
+        FROM batter_format_stats s
+        JOIN dim_players p ON p.player_key = s.batter_key
+        WHERE s.balls >= 20
+        """
+        player_stats_df = cache.read_sql(player_stats_query, conn)
+    else:
+        batting, bowling = format_player_stats(conn)
+        player_stats_df = batting_csv_frame(batting)
     
-    player_stats_df = pd.read_sql_query(player_stats_query, conn)
     player_stats_df.to_csv(f"{powerbi_dir}/player_batting_stats.csv", index=False)
     
     # 3. Bowling Statistics
-    bowling_stats_query = """
-    SELECT 
-        d.bowler as player_name,
-        m.format,
-        COUNT(*) as balls_bowled,
-        SUM(d.total_runs) as runs_conceded,
-        COUNT(CASE WHEN d.wicket_type IS NOT NULL THEN 1 END) as wickets,
-        ROUND(SUM(d.total_runs) * 6.0 / COUNT(*), 2) as economy_rate,
-        ROUND(COUNT(*) * 1.0 / COUNT(CASE WHEN d.wicket_type IS NOT NULL THEN 1 END), 2) as bowling_average
-    FROM deliveries d
-    JOIN matches m ON d.match_id = m.match_id
-    WHERE d.bowler IS NOT NULL
-    GROUP BY d.bowler, m.format
-    HAVING balls_bowled >= 30
-    """
+    if use_summaries:
+        bowling_stats_query = """
+        SELECT 
+            p.player_name,
+            s.format,
+            s.balls as balls_bowled,
+            s.runs_conceded,
+            s.wickets,
+            s.economy_rate,
+            s.bowling_strike_rate as bowling_average
+        FROM bowler_format_stats s
+        JOIN dim_players p ON p.player_key = s.bowler_key
+        WHERE s.balls >= 30
+        """
+        bowling_stats_df = cache.read_sql(bowling_stats_query, conn)
+    else:
+        bowling_stats_df = bowling_csv_frame(bowling)
     
-    bowling_stats_df = pd.read_sql_query(bowling_stats_query, conn)
     bowling_stats_df.to_csv(f"{powerbi_dir}/player_bowling_stats.csv", index=False)
     
     # 4. Team Performance by Format
@@ -119,7 +174,7 @@ def prepare_powerbi_data():
     HAVING total_matches >= 2
     """
     
-    team_performance_df = pd.read_sql_query(team_performance_query, conn)
+    team_performance_df = cache.read_sql(team_performance_query, conn)
     team_performance_df.to_csv(f"{powerbi_dir}/team_performance.csv", index=False)
     
     # 5. Venue Analysis
@@ -140,7 +195,7 @@ def prepare_powerbi_data():
     GROUP BY m.venue, m.city, m.format
     """
     
-    venue_analysis_df = pd.read_sql_query(venue_analysis_query, conn)
+    venue_analysis_df = cache.read_sql(venue_analysis_query, conn)
     venue_analysis_df.to_csv(f"{powerbi_dir}/venue_analysis.csv", index=False)
     
     # 6. Match Outcomes Analysis
@@ -164,7 +219,7 @@ def prepare_powerbi_data():
     WHERE winner IS NOT NULL
     """
     
-    outcomes_df = pd.read_sql_query(outcomes_query, conn)
+    outcomes_df = cache.read_sql(outcomes_query, conn)
     outcomes_df.to_csv(f"{powerbi_dir}/match_outcomes.csv", index=False)
     
     conn.close()
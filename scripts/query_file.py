@@ -0,0 +1,36 @@
+import re
+
+QUERY_FILE = "sql_queries/analysis_queries.sql"
+
+# Queries are introduced by a "-- N. Title" comment line
+QUERY_HEADER = re.compile(r'^--\s*(\d+)\.\s*(.+?)\s*$')
+
+def slugify(title):
+    """'Top 10 batsmen by total runs' -> 'top_10_batsmen_by_total_runs'"""
+    return re.sub(r'[^a-z0-9]+', '_', title.lower()).strip('_')
+
+def parse_query_file(path=QUERY_FILE):
+    """Split a .sql file into [{'number', 'name', 'title', 'sql'}] in file order
+
+    Each query runs from its "-- N. Title" header to the next header; other
+    comment lines and the trailing semicolon are dropped.
+    """
+    queries = []
+    current = None
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            header = QUERY_HEADER.match(line)
+            if header:
+                current = {'number': int(header.group(1)),
+                           'name': slugify(header.group(2)),
+                           'title': header.group(2),
+                           'lines': []}
+                queries.append(current)
+            elif current is not None and not line.lstrip().startswith('--'):
+                current['lines'].append(line.rstrip())
+
+    for query in queries:
+        query['sql'] = '\n'.join(query.pop('lines')).strip().rstrip(';').strip()
+
+    return [query for query in queries if query['sql']]
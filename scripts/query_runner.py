@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import queue
+import sqlite3
+import argparse
+import logging
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from query_file import QUERY_FILE, parse_query_file
+from result_cache import ResultCache, database_fingerprint, data_generation
+
+logger = logging.getLogger(__name__)
+
+class QueryRunner:
+    """Run the named queries of a .sql file in parallel on read-only connections
+
+    sqlite3 releases the GIL while a statement executes, so a thread pool
+    with one connection per worker runs independent queries concurrently.
+    Results go through a ResultCache, so a rerun on unchanged tables only
+    reads the cache.
+    """
+
+    def __init__(self, db_path="data/cricket_data.db", query_file=QUERY_FILE,
+                 workers=None, cache_dir="data/query_cache", use_cache=True):
+        self.db_path = db_path
+        self.query_file = query_file
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.queries = parse_query_file(query_file)
+        self.connections = queue.Queue()
+        self.cache = ResultCache(db_path, cache_dir) if use_cache else None
+
+    def connect_readonly(self):
+        """Read-only connection usable from any pool thread"""
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def open_pool(self):
+        for _ in range(self.workers):
+            self.connections.put(self.connect_readonly())
+
+    def close_pool(self):
+        while not self.connections.empty():
+            self.connections.get_nowait().close()
+
+    def execute(self, sql):
+        """(DataFrame, served from cache?) for one statement on a pooled connection"""
+        conn = self.connections.get()
+        try:
+            if self.cache is not None:
+                return self.cache.fetch(sql, conn)
+            return pd.read_sql_query(sql, conn), False
+        finally:
+            self.connections.put(conn)
+
+    def run_query(self, query):
+        """(DataFrame, timing record) for one parsed query"""
+        start = time.perf_counter()
+        record = {'number': query['number'], 'name': query['name'], 'cached': False}
+
+        try:
+            df, record['cached'] = self.execute(query['sql'])
+            record['rows'] = len(df)
+        except Exception as e:
+            logger.error(f"Query {query['number']} ({query['name']}) failed: {str(e)}")
+            df = None
+            record['error'] = str(e)
+
+        record['seconds'] = round(time.perf_counter() - start, 6)
+        return df, record
+
+    def run_all(self, numbers=None):
+        """Run the selected queries (all by default); returns (results, report)
+
+        results maps query name -> DataFrame (None on error), in file order.
+        """
+        queries = [q for q in self.queries if numbers is None or q['number'] in numbers]
+        start = time.perf_counter()
+        self.open_pool()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                outcomes = list(executor.map(self.run_query, queries))
+        finally:
+            self.close_pool()
+
+        results = {q['name']: df for q, (df, record) in zip(queries, outcomes)}
+        records = [record for df, record in outcomes]
+
+        report = {
+            'database': self.db_path,
+            'fingerprint': database_fingerprint(self.db_path),
+            'generation': data_generation(self.db_path),
+            'query_file': self.query_file,
+            'workers': self.workers,
+            'run_at': datetime.now().isoformat(timespec='seconds'),
+            'total_seconds': round(time.perf_counter() - start, 6),
+            'query_seconds': round(sum(r['seconds'] for r in records), 6),
+            'cache_hits': sum(r['cached'] for r in records),
+            'queries': records
+        }
+        return results, report
+
+    @staticmethod
+    def save_report(report, report_path):
+        """Write the timing report as JSON"""
+        report_dir = os.path.dirname(report_path)
+        if report_dir:
+            os.makedirs(report_dir, exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    def clear_cache(self):
+        """Remove every cached result"""
+        if self.cache is not None:
+            self.cache.clear()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Run the analysis SQL file in parallel with result caching")
+    parser.add_argument("--db", default="data/cricket_data.db", help="SQLite database to query")
+    parser.add_argument("--queries", default=QUERY_FILE, help="SQL file of '-- N. Title' queries")
+    parser.add_argument("--only", type=int, nargs='+', help="Query numbers to run (default: all)")
+    parser.add_argument("--workers", type=int, help="Parallel read-only connections (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the result cache")
+    parser.add_argument("--clear-cache", action="store_true", help="Empty the result cache first")
+    parser.add_argument("--report", default="data/query_report.json", help="JSON timing report path")
+    parser.add_argument("--show", action="store_true", help="Print every result table")
+    args = parser.parse_args()
+
+    runner = QueryRunner(args.db, args.queries, workers=args.workers, use_cache=not args.no_cache)
+    if args.clear_cache:
+        runner.clear_cache()
+
+    results, report = runner.run_all(args.only)
+    runner.save_report(report, args.report)
+
+    print("\n🏏 ANALYSIS QUERY RUN")
+    print("=" * 60)
+    for query, record in zip([q for q in runner.queries if q['name'] in results], report['queries']):
+        status = "cache" if record['cached'] else "ran"
+        rows = record.get('rows', 'ERROR')
+        print(f"  {record['number']:>2}. {query['title'][:38]:<38} {record['seconds'] * 1000:>8.1f}ms  {rows:>5} rows  ({status})")
+        if args.show and results[query['name']] is not None:
+            print(results[query['name']].to_string(index=False))
+            print()
+
+    print("-" * 60)
+    print(f"⏱️  Wall time: {report['total_seconds']:.3f}s "
+          f"(sum of queries {report['query_seconds']:.3f}s, {report['workers']} workers)")
+    print(f"💾 Cache hits: {report['cache_hits']}/{len(report['queries'])}")
+    print(f"📁 Report saved to {args.report}")
@@ -0,0 +1,236 @@
+import os
+import json
+import zlib
+import glob
+import time
+import hashlib
+import argparse
+import logging
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# One pack per format next to the format directory: <raw_data_dir>/<format>.pack
+# holds the compressed matches back to back and <format>.pack.json their index
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".pack.json"
+
+# Index entry fields; size, mtime and sha256 describe the match file as it was
+# received, so a file moved into the pack keeps its ingest manifest entry
+ENTRY_FIELDS = ('offset', 'length', 'size', 'mtime', 'sha256')
+
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 19
+
+# Read handles opened by this process, keyed by pack path
+_open_packs = {}
+
+# Indexes loaded by read_packed_file(), keyed by index path: (index mtime, RawPack)
+_loaded_packs = {}
+
+def default_codec():
+    """zstd when the zstandard package is installed, otherwise zlib (the gzip codec)"""
+    return 'zstd' if zstandard is not None else 'zlib'
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zlib.compress(data, ZLIB_LEVEL)
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("This pack is zstd-compressed; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+def compact_json(data):
+    """Match JSON re-encoded without indentation or spaces after separators"""
+    return json.dumps(json.loads(data), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def pack_path(raw_data_dir, match_format):
+    return os.path.join(raw_data_dir, match_format + PACK_SUFFIX)
+
+def pack_index_path(raw_data_dir, match_format):
+    return os.path.join(raw_data_dir, match_format + INDEX_SUFFIX)
+
+def raw_pack_exists(raw_data_dir, match_format):
+    return os.path.exists(pack_index_path(raw_data_dir, match_format))
+
+def read_pack_member(path, codec, offset, length):
+    """Decompressed bytes of one match, read with a single positioned read"""
+    fd = _open_packs.get(path)
+    if fd is None:
+        fd = os.open(path, os.O_RDONLY)
+        _open_packs[path] = fd
+    return decompress(os.pread(fd, length, offset), codec)
+
+def close_packs():
+    """Close every pack handle opened by this process"""
+    for fd in _open_packs.values():
+        os.close(fd)
+    _open_packs.clear()
+
+class RawPack:
+    """Append-only pack of the compact, compressed matches of one format
+
+    Matches are appended as individually compressed blobs, so any one can
+    be read back with one positioned read, and reading a whole format in
+    offset order is a single sequential scan of one file. The index is
+    rewritten atomically by save(); bytes appended without a saved index
+    are simply ignored, and replaced matches leave dead bytes behind until
+    repack().
+    """
+
+    def __init__(self, raw_data_dir, match_format, codec=None):
+        self.match_format = match_format
+        self.path = pack_path(raw_data_dir, match_format)
+        self.index_path = pack_index_path(raw_data_dir, match_format)
+        self.codec = codec or default_codec()
+        self.entries = {}
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.codec = index['codec']
+            self.entries = {match_id: dict(zip(ENTRY_FIELDS, entry)) for match_id, entry in index['entries'].items()}
+
+    def __contains__(self, match_id):
+        return match_id in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def match_ids(self):
+        """Packed match ids in file order"""
+        return sorted(self.entries, key=lambda match_id: self.entries[match_id]['offset'])
+
+    def add(self, match_id, data, mtime=None):
+        """Append a match (raw JSON bytes); False when the same content is already packed"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        entry = self.entries.get(match_id)
+        if entry and entry['sha256'] == sha256:
+            return False
+
+        blob = compress(compact_json(data), self.codec)
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(blob)
+
+        self.entries[match_id] = {'offset': offset, 'length': len(blob), 'size': len(data),
+                                  'mtime': time.time() if mtime is None else mtime, 'sha256': sha256}
+        return True
+
+    def read(self, match_id):
+        """Compact JSON bytes of a packed match"""
+        entry = self.entries[match_id]
+        return read_pack_member(self.path, self.codec, entry['offset'], entry['length'])
+
+    def save(self):
+        index = {'codec': self.codec,
+                 'entries': {match_id: [self.entries[match_id][field] for field in ENTRY_FIELDS]
+                             for match_id in self.match_ids()}}
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    def dead_bytes(self):
+        """Bytes of the pack no longer referenced by the index"""
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) - sum(entry['length'] for entry in self.entries.values())
+
+    def repack(self):
+        """Rewrite the pack with only the live matches, in their current order
+
+        Offline maintenance: processes holding the old pack open keep reading
+        the old file, as with a replaced ZIP archive.
+        """
+        tmp_path = self.path + '.tmp'
+        offset = 0
+        with open(self.path, 'rb') as source, open(tmp_path, 'wb') as target:
+            for match_id in self.match_ids():
+                entry = self.entries[match_id]
+                source.seek(entry['offset'])
+                target.write(source.read(entry['length']))
+                entry['offset'] = offset
+                offset += entry['length']
+
+        fd = _open_packs.pop(self.path, None)
+        if fd is not None:
+            os.close(fd)
+        os.replace(tmp_path, self.path)
+        self.save()
+
+def open_raw_pack(raw_data_dir, match_format):
+    """The format's RawPack, loaded once per process until its index changes; None if not packed"""
+    index_path = pack_index_path(raw_data_dir, match_format)
+    if not os.path.exists(index_path):
+        return None
+
+    mtime = os.path.getmtime(index_path)
+    cached = _loaded_packs.get(index_path)
+    if cached is None or cached[0] != mtime:
+        cached = _loaded_packs[index_path] = (mtime, RawPack(raw_data_dir, match_format))
+    return cached[1]
+
+def read_packed_file(filepath):
+    """Bytes of <raw_data_dir>/<format>/<id>.json from the format's pack, None if not packed"""
+    raw_data_dir, match_format = os.path.split(os.path.dirname(os.path.abspath(filepath)))
+    match_id = os.path.basename(filepath)[:-len('.json')]
+    pack = open_raw_pack(raw_data_dir, match_format)
+    return pack.read(match_id) if pack is not None and match_id in pack else None
+
+def pack_format(raw_data_dir, match_format, remove=False):
+    """Move a format's loose JSON files into its pack; returns (packed, skipped as unchanged)
+
+    With remove=True the loose files are deleted once the index is saved.
+    """
+    pack = RawPack(raw_data_dir, match_format)
+    paths = sorted(glob.glob(os.path.join(raw_data_dir, match_format, "*.json")))
+    packed = 0
+
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        packed += pack.add(os.path.basename(path)[:-len('.json')], data, os.path.getmtime(path))
+
+    pack.save()
+
+    if remove:
+        for path in paths:
+            os.remove(path)
+
+    return packed, len(paths) - packed
+
+def directory_size(path):
+    return sum(os.path.getsize(filepath) for filepath in glob.glob(os.path.join(path, "*.json")))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Pack raw match JSON into compact, compressed per-format packs")
+    parser.add_argument("--raw-dir", default="data/raw_json")
+    parser.add_argument("--formats", nargs="+", default=['tests', 'odis', 't20s', 'ipl'])
+    parser.add_argument("--remove", action="store_true", help="Delete the loose JSON files once packed")
+    parser.add_argument("--repack", action="store_true", help="Drop the bytes of replaced matches")
+    args = parser.parse_args()
+
+    print(f"🗜️  Packing raw JSON ({default_codec()})")
+    for match_format in args.formats:
+        loose_bytes = directory_size(os.path.join(args.raw_dir, match_format))
+        packed, unchanged = pack_format(args.raw_dir, match_format, remove=args.remove)
+
+        pack = RawPack(args.raw_dir, match_format)
+        if args.repack and pack.dead_bytes():
+            pack.repack()
+        pack_bytes = os.path.getsize(pack.path) if os.path.exists(pack.path) else 0
+
+        ratio = f" ({loose_bytes / pack_bytes:.1f}x smaller)" if pack_bytes and loose_bytes else ""
+        print(f"  • {match_format}: {packed} packed, {unchanged} unchanged, {len(pack)} in pack - "
+              f"{loose_bytes / 1e6:.1f} MB loose -> {pack_bytes / 1e6:.1f} MB packed{ratio}")
@@ -0,0 +1,246 @@
+import os
+import re
+import json
+import pickle
+import sqlite3
+import hashlib
+import uuid
+import threading
+import logging
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+GENERATION_TABLE = "table_generations"
+
+# One random id per database, created with the counters: a fresh database
+# starts its counters at 1 again, so the counters alone do not tell databases apart
+DATABASE_ID_TABLE = "database_identity"
+
+# Quoted literals/identifiers are kept verbatim; everything else is normalised
+SQL_TOKENS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?\*/|\s+)""", re.S)
+
+def normalise_sql(sql):
+    """Drop comments, collapse whitespace and trailing semicolons outside quoted literals"""
+    parts = []
+    for token in SQL_TOKENS.split(sql):
+        if not token:
+            continue
+        if token.startswith(('--', '/*')) or token.isspace():
+            if parts and parts[-1] != ' ':
+                parts.append(' ')
+        else:
+            parts.append(token)
+    return ''.join(parts).strip().rstrip(';').strip()
+
+def ensure_generation_table(conn):
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS {GENERATION_TABLE} (
+        table_name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL,
+        updated_at TEXT
+    )
+    ''')
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {DATABASE_ID_TABLE} (database_id TEXT NOT NULL)")
+    conn.execute(f"INSERT INTO {DATABASE_ID_TABLE} (database_id) "
+                 f"SELECT ? WHERE NOT EXISTS (SELECT 1 FROM {DATABASE_ID_TABLE})", [uuid.uuid4().hex])
+
+def bump_generations(conn, tables):
+    """Mark tables as changed (inside the caller's transaction)
+
+    Every cached result that read one of these tables becomes stale.
+    """
+    ensure_generation_table(conn)
+    updated_at = datetime.now().isoformat(timespec='seconds')
+    conn.executemany(f'''
+    INSERT INTO {GENERATION_TABLE} (table_name, generation, updated_at) VALUES (?, 1, ?)
+    ON CONFLICT(table_name) DO UPDATE SET generation = generation + 1, updated_at = excluded.updated_at
+    ''', [(table, updated_at) for table in tables])
+
+def table_generations(conn):
+    """{table: generation}, or None for databases built before the counters existed"""
+    try:
+        return dict(conn.execute(f"SELECT table_name, generation FROM {GENERATION_TABLE}").fetchall())
+    except sqlite3.OperationalError:
+        return None
+
+def database_id(conn):
+    """The database's random id, or None for databases built before it existed"""
+    try:
+        row = conn.execute(f"SELECT database_id FROM {DATABASE_ID_TABLE}").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+def connection_path(conn):
+    """Absolute path of the main database file of a connection"""
+    for seq, name, path in conn.execute("PRAGMA database_list").fetchall():
+        if name == 'main':
+            return os.path.abspath(path) if path else ':memory:'
+    return None
+
+def database_identity(conn):
+    """Path and id of the database behind a connection, part of every cache entry's versions"""
+    return f"{connection_path(conn)}#{database_id(conn)}"
+
+def database_fingerprint(db_path):
+    """Changes whenever the database (or its WAL) is written"""
+    parts = []
+    for path in [db_path, db_path + '-wal']:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+def data_generation(db_path):
+    """One token for the state of the whole database, e.g. to key st.cache_data"""
+    if not os.path.exists(db_path):
+        return None
+
+    conn = sqlite3.connect(db_path)
+    try:
+        generations = table_generations(conn)
+        identity = database_identity(conn)
+    finally:
+        conn.close()
+
+    if generations is None:
+        return database_fingerprint(db_path)
+    return json.dumps({'database': identity, 'generations': generations}, sort_keys=True)
+
+def referenced_tables(conn, sql, params=None):
+    """Tables a statement reads, as reported by SQLite's authorizer while compiling it"""
+    tables = set()
+
+    def authorizer(action, arg1, arg2, db_name, trigger):
+        if action == sqlite3.SQLITE_READ and db_name == 'main':
+            tables.add(arg1)
+        return sqlite3.SQLITE_OK
+
+    conn.set_authorizer(authorizer)
+    try:
+        conn.execute(f"EXPLAIN {sql}", params or ()).fetchall()
+    finally:
+        conn.set_authorizer(None)
+
+    return sorted(tables)
+
+class ResultCache:
+    """Memory (LRU) + disk cache of query results, invalidated per table
+
+    Entries are keyed by normalised SQL and parameters and remember the
+    generation of every table the query read, plus the path and id of the
+    database. A hit is only served from the same database while all of
+    those generations are unchanged, so setup_database() or an incremental
+    refresh, which bump the counters of the tables they write, invalidate
+    exactly the affected results, and databases sharing a cache directory
+    never see each other's entries. Databases without the counter table
+    fall back to a fingerprint of the database file.
+    """
+
+    def __init__(self, db_path="data/cricket_data.db", cache_dir="data/query_cache", max_entries=64):
+        self.db_path = db_path
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.tables = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(sql, params=None):
+        payload = json.dumps([normalise_sql(sql), params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def current_versions(self, conn, sql, params=None):
+        """Generation of each table the query reads (or the database fingerprint)"""
+        normalised = normalise_sql(sql)
+        tables = self.tables.get(normalised)
+        if tables is None:
+            tables = referenced_tables(conn, sql, params)
+            self.tables[normalised] = tables
+
+        generations = table_generations(conn)
+        if generations is None:
+            return {'__database__': database_fingerprint(connection_path(conn))}
+        versions = {table: generations.get(table, 0) for table in tables}
+        versions['__database__'] = database_identity(conn)
+        return versions
+
+    def get(self, key, versions):
+        """Cached DataFrame for key if still valid, else None"""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+
+        if entry is None and self.cache_dir and os.path.exists(self.disk_path(key)):
+            try:
+                with open(self.disk_path(key), 'rb') as f:
+                    entry = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"Unreadable cache entry {key[:12]}: {str(e)}")
+                entry = None
+            if entry is not None:
+                self.remember(key, entry)
+
+        if entry is None or entry['versions'] != versions:
+            return None
+        return entry['df']
+
+    def remember(self, key, entry):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def put(self, key, versions, df):
+        entry = {'versions': versions, 'df': df}
+        self.remember(key, entry)
+
+        if self.cache_dir:
+            path = self.disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+    def fetch(self, sql, conn, params=None):
+        """(DataFrame, served from cache?) for a query run on conn"""
+        key = self.cache_key(sql, params)
+        versions = self.current_versions(conn, sql, params)
+
+        df = self.get(key, versions)
+        if df is not None:
+            self.hits += 1
+            return df.copy(), True
+
+        self.misses += 1
+        df = pd.read_sql_query(sql, conn, params=params)
+        self.put(key, versions, df)
+        return df.copy(), False
+
+    def read_sql(self, sql, conn, params=None):
+        """pd.read_sql_query through the cache; returns a DataFrame the caller may modify"""
+        return self.fetch(sql, conn, params)[0]
+
+    def clear(self):
+        """Drop every cached result, in memory and on disk"""
+        with self.lock:
+            self.memory.clear()
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, filename))
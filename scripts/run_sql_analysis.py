@@ -2,15 +2,22 @@ import sqlite3
 import pandas as pd
 import os
 
+from result_cache import ResultCache
+from summary_tables import summary_tables_exist
+
 class CricketAnalysis:
     def __init__(self, db_path="data/cricket_data.db"):
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
+        self.cache = ResultCache(db_path)
+        
+        # Leaderboards read the pre-aggregated tables when the database has them
+        self.use_summaries = summary_tables_exist(self.conn)
     
     def execute_query(self, query_name, sql_query):
         """Execute a SQL query and return results as DataFrame"""
         try:
-            df = pd.read_sql_query(sql_query, self.conn)
+            df = self.cache.read_sql(sql_query, self.conn)
             return df
         except Exception as e:
             print(f"❌ Error in {query_name}: {str(e)}")
@@ -29,9 +36,9 @@ class CricketAnalysis:
         query1 = """
         SELECT 
             batter,
-            COUNT(*) as balls_faced,
+            SUM(is_batter_ball) as balls_faced,
             SUM(batter_runs) as total_runs,
-            ROUND(SUM(batter_runs) * 100.0 / COUNT(*), 2) as strike_rate,
+            ROUND(SUM(batter_runs) * 100.0 / SUM(is_batter_ball), 2) as strike_rate,
             COUNT(CASE WHEN batter_runs = 4 THEN 1 END) as fours,
             COUNT(CASE WHEN batter_runs = 6 THEN 1 END) as sixes
         FROM deliveries 
@@ -41,6 +48,32 @@ class CricketAnalysis:
         LIMIT 10;
         """
         
+        if self.use_summaries:
+            query1 = """
+            SELECT 
+                p.player_name as batter,
+                s.balls_faced,
+                s.total_runs,
+                s.strike_rate,
+                s.fours,
+                s.sixes
+            FROM (
+                SELECT 
+                    batter_key,
+                    SUM(balls) as balls_faced,
+                    SUM(runs) as total_runs,
+                    ROUND(SUM(runs) * 100.0 / SUM(balls), 2) as strike_rate,
+                    SUM(fours) as fours,
+                    SUM(sixes) as sixes
+                FROM batter_format_stats
+                GROUP BY batter_key
+                ORDER BY total_runs DESC
+                LIMIT 10
+            ) s
+            JOIN dim_players p ON p.player_key = s.batter_key
+            ORDER BY s.total_runs DESC;
+            """
+        
         result1 = self.execute_query("Top Batsmen", query1)
         if result1 is not None:
             print(result1.to_string(index=False))
@@ -52,10 +85,10 @@ class CricketAnalysis:
         query2 = """
         SELECT 
             bowler,
-            COUNT(*) as balls_bowled,
+            SUM(is_legal_ball) as balls_bowled,
             SUM(total_runs) as runs_conceded,
-            COUNT(CASE WHEN wicket_type IS NOT NULL THEN 1 END) as wickets,
-            ROUND(SUM(total_runs) * 6.0 / COUNT(*), 2) as economy_rate
+            SUM(is_bowler_wicket) as wickets,
+            ROUND(SUM(total_runs) * 6.0 / SUM(is_legal_ball), 2) as economy_rate
         FROM deliveries 
         WHERE bowler IS NOT NULL
         GROUP BY bowler
@@ -64,6 +97,31 @@ class CricketAnalysis:
         LIMIT 10;
         """
         
+        if self.use_summaries:
+            query2 = """
+            SELECT 
+                p.player_name as bowler,
+                s.balls_bowled,
+                s.runs_conceded,
+                s.wickets,
+                s.economy_rate
+            FROM (
+                SELECT 
+                    bowler_key,
+                    SUM(balls) as balls_bowled,
+                    SUM(runs_conceded) as runs_conceded,
+                    SUM(wickets) as wickets,
+                    ROUND(SUM(runs_conceded) * 6.0 / SUM(balls), 2) as economy_rate
+                FROM bowler_format_stats
+                GROUP BY bowler_key
+                HAVING SUM(wickets) > 0
+                ORDER BY SUM(wickets) DESC, economy_rate ASC
+                LIMIT 10
+            ) s
+            JOIN dim_players p ON p.player_key = s.bowler_key
+            ORDER BY s.wickets DESC, s.economy_rate ASC;
+            """
+        
         result2 = self.execute_query("Top Bowlers", query2)
         if result2 is not None:
             print(result2.to_string(index=False))
@@ -104,6 +162,19 @@ class CricketAnalysis:
         ORDER BY format, win_percentage DESC;
         """
         
+        if self.use_summaries:
+            query3 = """
+            SELECT 
+                format,
+                team,
+                matches_played as total_matches,
+                wins as total_wins,
+                win_percentage
+            FROM team_format_stats
+            WHERE matches_played >= 2
+            ORDER BY format, win_percentage DESC;
+            """
+        
         result3 = self.execute_query("Team Win Rates", query3)
         if result3 is not None:
             print(result3.to_string(index=False))
@@ -147,6 +218,27 @@ class CricketAnalysis:
         LIMIT 10;
         """
         
+        if self.use_summaries:
+            query5 = """
+            SELECT 
+                p.player_name as batter,
+                s.sixes,
+                s.runs_from_sixes
+            FROM (
+                SELECT 
+                    batter_key,
+                    SUM(sixes) as sixes,
+                    SUM(sixes) * 6 as runs_from_sixes
+                FROM batter_format_stats
+                GROUP BY batter_key
+                HAVING SUM(sixes) > 0
+                ORDER BY SUM(sixes) DESC
+                LIMIT 10
+            ) s
+            JOIN dim_players p ON p.player_key = s.batter_key
+            ORDER BY s.sixes DESC;
+            """
+        
         result5 = self.execute_query("Most Sixes", query5)
         if result5 is not None:
             print(result5.to_string(index=False))
@@ -219,9 +311,9 @@ class CricketAnalysis:
         query9 = """
         SELECT 
             batter,
-            COUNT(*) as balls_faced,
+            SUM(is_batter_ball) as balls_faced,
             SUM(batter_runs) as runs_scored,
-            ROUND(SUM(batter_runs) * 100.0 / COUNT(*), 2) as strike_rate
+            ROUND(SUM(batter_runs) * 100.0 / SUM(is_batter_ball), 2) as strike_rate
         FROM deliveries 
         WHERE batter IS NOT NULL
         GROUP BY batter
@@ -230,6 +322,29 @@ class CricketAnalysis:
         LIMIT 10;
         """
         
+        if self.use_summaries:
+            query9 = """
+            SELECT 
+                p.player_name as batter,
+                s.balls_faced,
+                s.runs_scored,
+                s.strike_rate
+            FROM (
+                SELECT 
+                    batter_key,
+                    SUM(balls) as balls_faced,
+                    SUM(runs) as runs_scored,
+                    ROUND(SUM(runs) * 100.0 / SUM(balls), 2) as strike_rate
+                FROM batter_format_stats
+                GROUP BY batter_key
+                HAVING balls_faced >= 50
+                ORDER BY strike_rate DESC
+                LIMIT 10
+            ) s
+            JOIN dim_players p ON p.player_key = s.batter_key
+            ORDER BY s.strike_rate DESC;
+            """
+        
         result9 = self.execute_query("Strike Rates", query9)
         if result9 is not None:
             print(result9.to_string(index=False))
@@ -1,9 +1,9 @@
 import requests
 from bs4 import BeautifulSoup
-import json
 import os
-import time
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
+
+from async_downloader import AsyncDownloader, INDEX_FILENAME, format_jobs
 
 class SimpleCricsheetScraper:
     def __init__(self, download_dir="data/raw_json"):
@@ -44,37 +44,6 @@ class SimpleCricsheetScraper:
         
         return json_links
     
-    def download_json_file(self, url, match_format):
-        """Download a single JSON file"""
-        try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # Extract filename from URL
-            filename = os.path.basename(urlparse(url).path)
-            if not filename.endswith('.json'):
-                filename += '.json'
-            
-            # Create format-specific directory
-            format_dir = os.path.join(self.download_dir, match_format)
-            os.makedirs(format_dir, exist_ok=True)
-            
-            # Save file
-            filepath = os.path.join(format_dir, filename)
-            
-            # Try to parse JSON to ensure it's valid
-            json_data = response.json()
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2)
-            
-            print(f"✅ Downloaded: {filename}")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Failed to download {url}: {str(e)}")
-            return False
-    
     def scrape_format(self, match_format, limit=None):
         """Scrape matches for a specific format"""
         format_urls = {
@@ -104,19 +73,12 @@ class SimpleCricsheetScraper:
         
         print(f"Found {len(json_links)} JSON files to download")
         
-        successful = 0
-        failed = 0
+        # Concurrent, rate-limited download with retries and conditional GETs
+        downloader = AsyncDownloader(index_path=os.path.join(self.download_dir, INDEX_FILENAME))
+        results = downloader.download_all(format_jobs(json_links, self.download_dir, match_format))
         
-        for i, link in enumerate(json_links, 1):
-            print(f"({i}/{len(json_links)}) ", end="")
-            
-            if self.download_json_file(link, match_format):
-                successful += 1
-            else:
-                failed += 1
-            
-            # Be respectful with delays
-            time.sleep(1)
+        failed = sum(outcome == 'failed' for outcome in results.values())
+        successful = len(results) - failed
         
         print(f"\n📊 {match_format.upper()} Summary: ✅ {successful} | ❌ {failed}")
         return successful, failed
@@ -155,30 +117,13 @@ def download_sample_files():
     
     print("📥 Downloading sample files directly...")
     
-    os.makedirs("data/raw_json/sample", exist_ok=True)
+    jobs = [(url, os.path.join("data/raw_json/sample", f"sample_match_{i}.json"))
+            for i, url in enumerate(sample_urls, 1)]
     
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-    })
-    
-    for i, url in enumerate(sample_urls, 1):
-        try:
-            response = session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            filename = f"sample_match_{i}.json"
-            filepath = os.path.join("data/raw_json/sample", filename)
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(response.json(), f, indent=2)
-            
-            print(f"✅ Downloaded: {filename}")
-            
-        except Exception as e:
-            print(f"❌ Failed to download sample {i}: {str(e)}")
-        
-        time.sleep(1)
+    # One request per second, as before; the downloader checks the JSON before writing
+    downloader = AsyncDownloader(rate=1.0, burst=1, index_path=os.path.join("data/raw_json", INDEX_FILENAME))
+    for url, outcome in downloader.download_all(jobs).items():
+        print(f"{'❌' if outcome == 'failed' else '✅'} {os.path.basename(url)}: {outcome}")
 
 if __name__ == "__main__":
     scraper = SimpleCricsheetScraper()
@@ -0,0 +1,333 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIMENSION_TABLES = ['dim_formats', 'dim_venues', 'dim_teams', 'dim_players']
+
+# Processed table -> integer-keyed fact table that stores it; the processed
+# name is kept as a view with the original text columns
+FACT_TABLES = {
+    'players': 'fact_players',
+    'deliveries': 'fact_deliveries'
+}
+
+STAR_TABLES = DIMENSION_TABLES + list(FACT_TABLES.values())
+
+# Per-delivery 0/1 classification set at ingest, summed by the aggregates
+DELIVERY_FLAG_COLUMNS = ['is_legal_ball', 'is_batter_ball', 'is_bowler_wicket']
+
+# Runs of each extras type on a delivery (0 when absent)
+DELIVERY_EXTRAS_COLUMNS = ['wides', 'noballs', 'byes', 'legbyes', 'penalty']
+
+CREATE_STAR_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS dim_formats (
+        format_key INTEGER PRIMARY KEY,
+        format TEXT NOT NULL UNIQUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS dim_venues (
+        venue_key INTEGER PRIMARY KEY,
+        venue TEXT NOT NULL UNIQUE,
+        city TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS dim_teams (
+        team_key INTEGER PRIMARY KEY,
+        team_name TEXT NOT NULL UNIQUE
+    )
+    ''',
+    # One row per Cricsheet registry id; players without one are keyed by name
+    '''
+    CREATE TABLE IF NOT EXISTS dim_players (
+        player_key INTEGER PRIMARY KEY,
+        registry_id TEXT UNIQUE,
+        player_name TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS fact_players (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        match_id TEXT,
+        team_key INTEGER,
+        player_key INTEGER,
+        FOREIGN KEY (match_id) REFERENCES matches (match_id),
+        FOREIGN KEY (team_key) REFERENCES dim_teams (team_key),
+        FOREIGN KEY (player_key) REFERENCES dim_players (player_key)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS fact_deliveries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        match_id TEXT,
+        format_key INTEGER,
+        venue_key INTEGER,
+        innings_number INTEGER,
+        over_number INTEGER,
+        delivery_number INTEGER,
+        batting_team_key INTEGER,
+        batter_key INTEGER,
+        non_striker_key INTEGER,
+        bowler_key INTEGER,
+        batter_runs INTEGER,
+        extras_runs INTEGER,
+        total_runs INTEGER,
+        extras_type TEXT,
+        wicket_type TEXT,
+        player_dismissed_key INTEGER,
+        is_legal_ball INTEGER,
+        is_batter_ball INTEGER,
+        is_bowler_wicket INTEGER,
+        wides INTEGER,
+        noballs INTEGER,
+        byes INTEGER,
+        legbyes INTEGER,
+        penalty INTEGER,
+        FOREIGN KEY (match_id) REFERENCES matches (match_id),
+        FOREIGN KEY (format_key) REFERENCES dim_formats (format_key),
+        FOREIGN KEY (venue_key) REFERENCES dim_venues (venue_key),
+        FOREIGN KEY (batting_team_key) REFERENCES dim_teams (team_key),
+        FOREIGN KEY (batter_key) REFERENCES dim_players (player_key),
+        FOREIGN KEY (non_striker_key) REFERENCES dim_players (player_key),
+        FOREIGN KEY (bowler_key) REFERENCES dim_players (player_key),
+        FOREIGN KEY (player_dismissed_key) REFERENCES dim_players (player_key)
+    )
+    ''',
+    # The processed tables as views: existing queries keep working unchanged
+    '''
+    CREATE VIEW IF NOT EXISTS players AS
+    SELECT fp.id, fp.match_id, t.team_name AS team, p.player_name, p.registry_id AS player_id
+    FROM fact_players fp
+    LEFT JOIN dim_teams t ON t.team_key = fp.team_key
+    LEFT JOIN dim_players p ON p.player_key = fp.player_key
+    ''',
+    '''
+    CREATE VIEW IF NOT EXISTS deliveries AS
+    SELECT d.id, d.match_id, d.innings_number, d.over_number, d.delivery_number,
+           t.team_name AS batting_team,
+           b.player_name AS batter,
+           ns.player_name AS non_striker,
+           bw.player_name AS bowler,
+           d.batter_runs, d.extras_runs, d.total_runs, d.extras_type, d.wicket_type,
+           pd.player_name AS player_dismissed,
+           d.is_legal_ball, d.is_batter_ball, d.is_bowler_wicket,
+           d.wides, d.noballs, d.byes, d.legbyes, d.penalty
+    FROM fact_deliveries d
+    LEFT JOIN dim_teams t ON t.team_key = d.batting_team_key
+    LEFT JOIN dim_players b ON b.player_key = d.batter_key
+    LEFT JOIN dim_players ns ON ns.player_key = d.non_striker_key
+    LEFT JOIN dim_players bw ON bw.player_key = d.bowler_key
+    LEFT JOIN dim_players pd ON pd.player_key = d.player_dismissed_key
+    '''
+]
+
+# Rows are staged with their text columns, then interned into the facts
+CREATE_STAGE_SQL = {
+    'players': '''
+    CREATE TEMP TABLE IF NOT EXISTS stage_players (
+        match_id TEXT,
+        team TEXT,
+        player_name TEXT,
+        player_id TEXT
+    )
+    ''',
+    'deliveries': '''
+    CREATE TEMP TABLE IF NOT EXISTS stage_deliveries (
+        match_id TEXT,
+        innings_number INTEGER,
+        over_number INTEGER,
+        delivery_number INTEGER,
+        batting_team TEXT,
+        batter TEXT,
+        non_striker TEXT,
+        bowler TEXT,
+        batter_runs INTEGER,
+        extras_runs INTEGER,
+        total_runs INTEGER,
+        extras_type TEXT,
+        wicket_type TEXT,
+        player_dismissed TEXT,
+        is_legal_ball INTEGER,
+        is_batter_ball INTEGER,
+        is_bowler_wicket INTEGER,
+        wides INTEGER,
+        noballs INTEGER,
+        byes INTEGER,
+        legbyes INTEGER,
+        penalty INTEGER
+    )
+    '''
+}
+
+# Player key of a name in a delivery, from the squad of that match
+PLAYER_KEY_SQL = ("(SELECT q.player_key FROM stage_squad q "
+                  "WHERE q.match_id = s.match_id AND q.player_name = s.{column})")
+
+DELIVERY_PLAYER_COLUMNS = ['batter', 'non_striker', 'bowler', 'player_dismissed']
+
+def stage_table(table):
+    return f"stage_{table}"
+
+def create_star_tables(conn):
+    """Create the dimension and fact tables and the compatibility views"""
+    for sql in CREATE_STAR_SQL:
+        conn.execute(sql)
+
+def star_schema_exists(conn):
+    """True when the facts exist, with the ball flags and extras columns, and
+    players/deliveries are views over them"""
+    objects = dict(conn.execute("SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view')").fetchall())
+    if not (all(objects.get(table) == 'table' for table in STAR_TABLES) and
+            all(objects.get(view) == 'view' for view in FACT_TABLES)):
+        return False
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(fact_deliveries)")}
+    return all(col in columns for col in DELIVERY_FLAG_COLUMNS + DELIVERY_EXTRAS_COLUMNS)
+
+def drop_star_tables(conn):
+    """Drop the views (or the wide tables of older databases), facts and dimensions"""
+    for name in list(FACT_TABLES) + STAR_TABLES:
+        row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            conn.execute(f"DROP {row[0].upper()} {name}")
+
+def begin_staging(conn):
+    """Create empty staging tables and the squad lookup for one load or refresh"""
+    for table, sql in CREATE_STAGE_SQL.items():
+        conn.execute(sql)
+        conn.execute(f"DELETE FROM {stage_table(table)}")
+
+    conn.execute('''
+    CREATE TEMP TABLE IF NOT EXISTS stage_squad (
+        match_id TEXT,
+        player_name TEXT,
+        player_key INTEGER,
+        PRIMARY KEY (match_id, player_name)
+    ) WITHOUT ROWID
+    ''')
+    conn.execute("DELETE FROM stage_squad")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS stage_unlisted (match_id TEXT, player_name TEXT)")
+
+    # Recreated here because drop_indexes() removes it before a bulk load
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_dim_players_unregistered "
+                 "ON dim_players(player_name) WHERE registry_id IS NULL")
+
+def intern_match_dimensions(conn):
+    """Add the formats, venues and teams of every match to the dimensions"""
+    conn.execute("INSERT OR IGNORE INTO dim_formats (format) "
+                 "SELECT DISTINCT format FROM matches WHERE format IS NOT NULL")
+    conn.execute("INSERT OR IGNORE INTO dim_venues (venue, city) "
+                 "SELECT venue, MIN(city) FROM matches WHERE venue IS NOT NULL GROUP BY venue")
+    conn.execute('''
+    INSERT OR IGNORE INTO dim_teams (team_name)
+    SELECT team1 FROM matches WHERE team1 IS NOT NULL
+    UNION
+    SELECT team2 FROM matches WHERE team2 IS NOT NULL
+    ''')
+
+def intern_staged_players(conn):
+    """Move stage_players into fact_players, registering new players and teams
+
+    Also fills stage_squad, which resolves the names in the deliveries of
+    these matches to the same registry ids.
+    """
+    conn.execute("INSERT OR IGNORE INTO dim_teams (team_name) "
+                 "SELECT DISTINCT team FROM stage_players WHERE team IS NOT NULL")
+
+    conn.execute('''
+    INSERT OR IGNORE INTO dim_players (registry_id, player_name)
+    SELECT player_id, MIN(player_name) FROM stage_players
+    WHERE player_id IS NOT NULL AND player_name IS NOT NULL
+    GROUP BY player_id
+    ''')
+    conn.execute('''
+    INSERT OR IGNORE INTO dim_players (registry_id, player_name)
+    SELECT DISTINCT NULL, player_name FROM stage_players
+    WHERE player_id IS NULL AND player_name IS NOT NULL
+    ''')
+
+    conn.execute('''
+    INSERT OR IGNORE INTO stage_squad (match_id, player_name, player_key)
+    SELECT s.match_id, s.player_name, p.player_key
+    FROM stage_players s
+    JOIN dim_players p ON p.registry_id = s.player_id
+    ''')
+    conn.execute('''
+    INSERT OR IGNORE INTO stage_squad (match_id, player_name, player_key)
+    SELECT s.match_id, s.player_name, p.player_key
+    FROM stage_players s
+    JOIN dim_players p ON p.registry_id IS NULL AND p.player_name = s.player_name
+    WHERE s.player_id IS NULL
+    ''')
+
+    conn.execute('''
+    INSERT INTO fact_players (match_id, team_key, player_key)
+    SELECT s.match_id, t.team_key, q.player_key
+    FROM stage_players s
+    LEFT JOIN dim_teams t ON t.team_name = s.team
+    LEFT JOIN stage_squad q ON q.match_id = s.match_id AND q.player_name = s.player_name
+    ORDER BY s.rowid
+    ''')
+    conn.execute("DELETE FROM stage_players")
+
+def intern_staged_deliveries(conn):
+    """Move stage_deliveries into fact_deliveries as integer keys"""
+    conn.execute("INSERT OR IGNORE INTO dim_teams (team_name) "
+                 "SELECT DISTINCT batting_team FROM stage_deliveries WHERE batting_team IS NOT NULL")
+
+    # Names outside the match squad (e.g. matches without player lists) are
+    # keyed by name alone and added to the squad lookup
+    names = '\n        UNION\n        '.join(
+        f"SELECT match_id, {column} AS name FROM stage_deliveries WHERE {column} IS NOT NULL"
+        for column in DELIVERY_PLAYER_COLUMNS)
+    conn.execute("DELETE FROM stage_unlisted")
+    conn.execute(f'''
+    INSERT INTO stage_unlisted (match_id, player_name)
+    SELECT n.match_id, n.name
+    FROM (
+        {names}
+    ) n
+    WHERE NOT EXISTS (SELECT 1 FROM stage_squad q WHERE q.match_id = n.match_id AND q.player_name = n.name)
+    ''')
+    conn.execute('''
+    INSERT OR IGNORE INTO dim_players (registry_id, player_name)
+    SELECT DISTINCT NULL, player_name FROM stage_unlisted
+    ''')
+    conn.execute('''
+    INSERT OR IGNORE INTO stage_squad (match_id, player_name, player_key)
+    SELECT u.match_id, u.player_name, p.player_key
+    FROM stage_unlisted u
+    JOIN dim_players p ON p.registry_id IS NULL AND p.player_name = u.player_name
+    ''')
+
+    player_keys = ',\n           '.join(PLAYER_KEY_SQL.format(column=column) for column in DELIVERY_PLAYER_COLUMNS)
+    conn.execute(f'''
+    INSERT INTO fact_deliveries (
+        match_id, format_key, venue_key, innings_number, over_number, delivery_number,
+        batting_team_key, batter_runs, extras_runs, total_runs, extras_type, wicket_type,
+        is_legal_ball, is_batter_ball, is_bowler_wicket, wides, noballs, byes, legbyes, penalty,
+        batter_key, non_striker_key, bowler_key, player_dismissed_key
+    )
+    SELECT s.match_id, f.format_key, v.venue_key, s.innings_number, s.over_number, s.delivery_number,
+           t.team_key, s.batter_runs, s.extras_runs, s.total_runs, s.extras_type, s.wicket_type,
+           s.is_legal_ball, s.is_batter_ball, s.is_bowler_wicket,
+           s.wides, s.noballs, s.byes, s.legbyes, s.penalty,
+           {player_keys}
+    FROM stage_deliveries s
+    LEFT JOIN matches m ON m.match_id = s.match_id
+    LEFT JOIN dim_formats f ON f.format = m.format
+    LEFT JOIN dim_venues v ON v.venue = m.venue
+    LEFT JOIN dim_teams t ON t.team_name = s.batting_team
+    ORDER BY s.rowid
+    ''')
+    conn.execute("DELETE FROM stage_deliveries")
+
+INTERN_STAGED = {
+    'players': intern_staged_players,
+    'deliveries': intern_staged_deliveries
+}
+
+def dimension_counts(conn):
+    """{dimension table: rows}"""
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in DIMENSION_TABLES}
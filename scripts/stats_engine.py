@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+# Output columns, named as in batter_format_stats / bowler_format_stats
+BATTING_COLUMNS = ['runs', 'balls', 'fours', 'sixes', 'dots', 'dismissals',
+                   'strike_rate', 'batting_average']
+BOWLING_COLUMNS = ['balls', 'runs_conceded', 'wickets', 'dots',
+                   'economy_rate', 'bowling_average', 'bowling_strike_rate']
+
+def key_codes(values):
+    """(int64 codes with -1 for missing, labels) of one key column
+
+    Categorical columns reuse their codes, so typed frames are not factorised again.
+    """
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(np.int64), pd.Index(values.cat.categories)
+    codes, labels = pd.factorize(np.asarray(values, dtype=object))
+    return codes.astype(np.int64), pd.Index(labels)
+
+def codes_in(values, labels):
+    """Codes of values in an existing label index, -1 where absent or missing"""
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        mapping = labels.get_indexer(values.cat.categories)
+        codes = values.cat.codes.to_numpy(np.int64)
+        return np.where(codes >= 0, mapping[np.maximum(codes, 0)], -1)
+    return labels.get_indexer(np.asarray(values, dtype=object)).astype(np.int64)
+
+def flat_codes(codes, sizes):
+    """Row-major group number of each row over several key codes, -1 where any key is missing"""
+    valid = np.logical_and.reduce([c >= 0 for c in codes])
+    flat = np.ravel_multi_index(tuple(np.where(valid, c, 0) for c in codes), sizes)
+    return np.where(valid, flat, -1)
+
+def dense_groups(flats):
+    """Renumber the groups present in several flat_codes() arrays to 0..n-1, together"""
+    groups = np.unique(np.concatenate([flat[flat >= 0] for flat in flats]))
+    return groups, [np.where(flat >= 0, np.searchsorted(groups, flat), -1) for flat in flats]
+
+def group_index(groups, sizes, labels, names):
+    """Index (or MultiIndex for several keys) of the dense groups"""
+    levels = np.unravel_index(groups, sizes)
+    if len(labels) == 1:
+        return pd.Index(labels[0].take(levels[0]), name=names[0])
+    return pd.MultiIndex.from_arrays([label.take(level) for label, level in zip(labels, levels)], names=names)
+
+def numeric(values):
+    """float64 array of a numeric column, missing as 0"""
+    return np.nan_to_num(np.asarray(values, dtype=np.float64))
+
+def key_name(values, default):
+    return getattr(values, 'name', None) or default
+
+def flag(values, size):
+    """bool array of a 0/1 flag column, all True when the column is not given"""
+    if values is None:
+        return np.ones(size, dtype=bool)
+    return np.asarray(values) == 1
+
+def rounded_ratio(numerator, denominator, scale=1):
+    """numerator * scale / denominator to 2 decimals, halves rounded up, NaN where denominator is 0
+
+    Rounded in integer arithmetic, as rounded_ratio_sql() does in SQLite, so
+    pandas and SQL panels agree to the last digit; np.round and SQLite ROUND
+    of the same float ratio can differ by 0.01.
+    """
+    numerator = np.asarray(numerator, dtype=np.int64)
+    denominator = np.asarray(denominator, dtype=np.int64)
+    safe = np.where(denominator > 0, denominator, 1)
+    hundredths = (numerator * (scale * 200) + safe) // (2 * safe)
+    return np.where(denominator > 0, hundredths / 100, np.nan)
+
+def rounded_ratio_sql(numerator, denominator, scale=1):
+    """SQLite expression of rounded_ratio() over integer expressions (NULL where denominator is 0)"""
+    return f"((({numerator}) * {scale * 200} + ({denominator})) / (2 * NULLIF({denominator}, 0)) / 100.0)"
+
+def batting_stats(batter, batter_runs, player_dismissed=None, by=(), batter_ball=None):
+    """Per-batter runs, balls, 4s, 6s, dots, dismissals, strike rate and average
+
+    Every argument is a deliveries column (array or Series); by holds extra
+    key columns (e.g. format) to group on as well. Rows are grouped by
+    np.bincount over the factorised keys. Balls are the is_batter_ball
+    deliveries when that flag is given (every delivery otherwise), so wides
+    are not balls faced. Dismissals count player_dismissed, so a non-striker
+    run out is charged to the non-striker.
+    """
+    batter_codes, batter_labels = key_codes(batter)
+    by_keys = [key_codes(values) for values in by]
+    by_codes = [codes for codes, labels in by_keys]
+    labels = [batter_labels] + [labels for codes, labels in by_keys]
+    sizes = [len(label) for label in labels]
+
+    flats = [flat_codes([batter_codes] + by_codes, sizes)]
+    if player_dismissed is not None:
+        flats.append(flat_codes([codes_in(player_dismissed, batter_labels)] + by_codes, sizes))
+    groups, dense = dense_groups(flats)
+    n = len(groups)
+
+    keyed = dense[0] >= 0
+    codes = dense[0][keyed]
+    runs = numeric(batter_runs)[keyed]
+    faced = flag(batter_ball, len(keyed))[keyed]
+
+    stats = pd.DataFrame({
+        'runs': np.bincount(codes, weights=runs, minlength=n).astype(np.int64),
+        'balls': np.bincount(codes[faced], minlength=n),
+        'fours': np.bincount(codes[runs == 4], minlength=n),
+        'sixes': np.bincount(codes[runs == 6], minlength=n),
+        'dots': np.bincount(codes[faced & (runs == 0)], minlength=n),
+        'dismissals': (np.bincount(dense[1][dense[1] >= 0], minlength=n) if player_dismissed is not None
+                       else np.zeros(n, dtype=np.int64))
+    }, index=group_index(groups, sizes, labels, [key_name(batter, 'batter')] + [key_name(v, None) for v in by]))
+
+    stats['strike_rate'] = rounded_ratio(stats['runs'], stats['balls'], 100)
+    stats['batting_average'] = rounded_ratio(stats['runs'], stats['dismissals'])
+    return stats[BATTING_COLUMNS]
+
+def bowling_stats(bowler, total_runs, wicket_type=None, by=(), legal_ball=None, bowler_wicket=None):
+    """Per-bowler balls, runs conceded, wickets, dots, economy, average and strike rate
+
+    Same conventions as batting_stats(). Balls are the is_legal_ball
+    deliveries and wickets the is_bowler_wicket ones when those flags are
+    given; otherwise every delivery is a ball and every wicket_type a wicket.
+    """
+    bowler_codes, bowler_labels = key_codes(bowler)
+    by_keys = [key_codes(values) for values in by]
+    labels = [bowler_labels] + [labels for codes, labels in by_keys]
+    sizes = [len(label) for label in labels]
+
+    groups, dense = dense_groups([flat_codes([bowler_codes] + [codes for codes, labels in by_keys], sizes)])
+    n = len(groups)
+
+    keyed = dense[0] >= 0
+    codes = dense[0][keyed]
+    runs = numeric(total_runs)[keyed]
+    legal = flag(legal_ball, len(keyed))[keyed]
+    if bowler_wicket is not None:
+        wickets = flag(bowler_wicket, len(keyed))[keyed]
+    else:
+        wickets = np.asarray(pd.notna(wicket_type))[keyed]
+
+    stats = pd.DataFrame({
+        'balls': np.bincount(codes[legal], minlength=n),
+        'runs_conceded': np.bincount(codes, weights=runs, minlength=n).astype(np.int64),
+        'wickets': np.bincount(codes[wickets], minlength=n),
+        'dots': np.bincount(codes[legal & (runs == 0)], minlength=n)
+    }, index=group_index(groups, sizes, labels, [key_name(bowler, 'bowler')] + [key_name(v, None) for v in by]))
+
+    stats['economy_rate'] = rounded_ratio(stats['runs_conceded'], stats['balls'], 6)
+    stats['bowling_average'] = rounded_ratio(stats['runs_conceded'], stats['wickets'])
+    stats['bowling_strike_rate'] = rounded_ratio(stats['balls'], stats['wickets'])
+    return stats[BOWLING_COLUMNS]
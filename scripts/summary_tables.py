@@ -0,0 +1,382 @@
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-match summaries: rebuilt for a match whenever its deliveries change
+MATCH_SUMMARY_TABLES = ['batter_innings', 'bowler_innings', 'partnerships']
+
+# Per-(key, format) aggregates: recomputed only for the keys a refresh touches
+FORMAT_SUMMARY_TABLES = ['batter_format_stats', 'bowler_format_stats',
+                         'venue_format_stats', 'team_format_stats']
+
+SUMMARY_TABLES = MATCH_SUMMARY_TABLES + FORMAT_SUMMARY_TABLES
+
+CREATE_SUMMARY_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS batter_innings (
+        match_id TEXT,
+        innings_number INTEGER,
+        format TEXT,
+        batter_key INTEGER,
+        batting_team TEXT,
+        runs INTEGER,
+        balls INTEGER,
+        fours INTEGER,
+        sixes INTEGER,
+        dots INTEGER,
+        dismissed INTEGER,
+        PRIMARY KEY (match_id, innings_number, batter_key)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS bowler_innings (
+        match_id TEXT,
+        innings_number INTEGER,
+        format TEXT,
+        bowler_key INTEGER,
+        balls INTEGER,
+        runs_conceded INTEGER,
+        wickets INTEGER,
+        dots INTEGER,
+        PRIMARY KEY (match_id, innings_number, bowler_key)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS partnerships (
+        match_id TEXT,
+        innings_number INTEGER,
+        wicket_number INTEGER,
+        format TEXT,
+        batting_team TEXT,
+        player1 TEXT,
+        player2 TEXT,
+        runs INTEGER,
+        balls INTEGER,
+        PRIMARY KEY (match_id, innings_number, wicket_number)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS batter_format_stats (
+        batter_key INTEGER,
+        format TEXT,
+        innings INTEGER,
+        runs INTEGER,
+        balls INTEGER,
+        fours INTEGER,
+        sixes INTEGER,
+        dots INTEGER,
+        dismissals INTEGER,
+        highest_score INTEGER,
+        fifties INTEGER,
+        hundreds INTEGER,
+        strike_rate REAL,
+        batting_average REAL,
+        PRIMARY KEY (batter_key, format)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS bowler_format_stats (
+        bowler_key INTEGER,
+        format TEXT,
+        innings INTEGER,
+        balls INTEGER,
+        runs_conceded INTEGER,
+        wickets INTEGER,
+        dots INTEGER,
+        economy_rate REAL,
+        bowling_average REAL,
+        bowling_strike_rate REAL,
+        PRIMARY KEY (bowler_key, format)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS venue_format_stats (
+        venue TEXT,
+        format TEXT,
+        matches_played INTEGER,
+        innings INTEGER,
+        total_runs INTEGER,
+        avg_runs_per_innings REAL,
+        highest_score INTEGER,
+        lowest_score INTEGER,
+        chose_to_bat INTEGER,
+        chose_to_field INTEGER,
+        PRIMARY KEY (venue, format)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS team_format_stats (
+        team TEXT,
+        format TEXT,
+        matches_played INTEGER,
+        wins INTEGER,
+        tosses_won INTEGER,
+        win_percentage REAL,
+        PRIMARY KEY (team, format)
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_batter_innings_match ON batter_innings(match_id)",
+    "CREATE INDEX IF NOT EXISTS idx_bowler_innings_match ON bowler_innings(match_id)",
+    "CREATE INDEX IF NOT EXISTS idx_partnerships_match ON partnerships(match_id)",
+    "CREATE INDEX IF NOT EXISTS idx_batter_innings_key ON batter_innings(batter_key, format)",
+    "CREATE INDEX IF NOT EXISTS idx_bowler_innings_key ON bowler_innings(bowler_key, format)"
+]
+
+# {match_filter} restricts a per-match summary to the matches in refresh_ids.
+# Deliveries are grouped by their integer keys. Player summaries keep the
+# player_key, so namesakes stay apart; readers join dim_players for the name.
+# Balls and wickets are sums of the ingest-time flags: wides are not balls
+# faced, wides/no-balls are not balls bowled, run outs are not bowler wickets.
+MATCH_SUMMARY_SQL = {
+    'batter_innings': '''
+    INSERT INTO batter_innings
+    SELECT b.match_id, b.innings_number, f.format, b.batter_key, t.team_name,
+           b.runs, b.balls, b.fours, b.sixes, b.dots,
+           CASE WHEN w.player_dismissed_key IS NOT NULL THEN 1 ELSE 0 END
+    FROM (
+        SELECT d.match_id, d.innings_number, d.format_key, d.batter_key, d.batting_team_key,
+               SUM(d.batter_runs) AS runs,
+               SUM(d.is_batter_ball) AS balls,
+               SUM(d.batter_runs = 4) AS fours,
+               SUM(d.batter_runs = 6) AS sixes,
+               SUM(d.is_batter_ball AND d.batter_runs = 0) AS dots
+        FROM fact_deliveries d
+        WHERE d.batter_key IS NOT NULL {match_filter}
+        GROUP BY d.match_id, d.innings_number, d.batter_key
+    ) b
+    LEFT JOIN dim_formats f ON f.format_key = b.format_key
+    LEFT JOIN dim_teams t ON t.team_key = b.batting_team_key
+    LEFT JOIN (
+        SELECT DISTINCT d.match_id, d.innings_number, d.player_dismissed_key
+        FROM fact_deliveries d
+        WHERE d.player_dismissed_key IS NOT NULL {match_filter}
+    ) w ON w.match_id = b.match_id
+       AND w.innings_number = b.innings_number
+       AND w.player_dismissed_key = b.batter_key
+    ''',
+    'bowler_innings': '''
+    INSERT INTO bowler_innings
+    SELECT b.match_id, b.innings_number, f.format, b.bowler_key,
+           b.balls, b.runs_conceded, b.wickets, b.dots
+    FROM (
+        SELECT d.match_id, d.innings_number, d.format_key, d.bowler_key,
+               SUM(d.is_legal_ball) AS balls,
+               SUM(d.total_runs) AS runs_conceded,
+               SUM(d.is_bowler_wicket) AS wickets,
+               SUM(d.is_legal_ball AND d.total_runs = 0) AS dots
+        FROM fact_deliveries d
+        WHERE d.bowler_key IS NOT NULL {match_filter}
+        GROUP BY d.match_id, d.innings_number, d.bowler_key
+    ) b
+    LEFT JOIN dim_formats f ON f.format_key = b.format_key
+    ''',
+    'partnerships': '''
+    INSERT INTO partnerships
+    SELECT s.match_id, s.innings_number, s.wickets_before + 1, f.format, MIN(t.team_name),
+           MIN(MIN(b.player_name, ns.player_name)), MAX(MAX(b.player_name, ns.player_name)),
+           SUM(s.runs), SUM(s.balls)
+    FROM (
+        SELECT p.match_id, p.innings_number, p.wickets_before, p.format_key,
+               p.batting_team_key, p.batter_key, p.non_striker_key,
+               SUM(p.total_runs) AS runs, SUM(p.is_legal_ball) AS balls
+        FROM (
+            SELECT d.match_id, d.innings_number, d.format_key, d.batting_team_key,
+                   d.batter_key, d.non_striker_key, d.total_runs, d.is_legal_ball,
+                   COALESCE(SUM(d.player_dismissed_key IS NOT NULL) OVER (
+                       PARTITION BY d.match_id, d.innings_number
+                       ORDER BY d.delivery_number
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                   ), 0) AS wickets_before
+            FROM fact_deliveries d
+            WHERE d.batter_key IS NOT NULL AND d.non_striker_key IS NOT NULL {match_filter}
+        ) p
+        GROUP BY p.match_id, p.innings_number, p.wickets_before,
+                 p.batting_team_key, p.batter_key, p.non_striker_key
+    ) s
+    LEFT JOIN dim_formats f ON f.format_key = s.format_key
+    LEFT JOIN dim_teams t ON t.team_key = s.batting_team_key
+    JOIN dim_players b ON b.player_key = s.batter_key
+    JOIN dim_players ns ON ns.player_key = s.non_striker_key
+    GROUP BY s.match_id, s.innings_number, s.wickets_before
+    '''
+}
+
+# {key_filter} restricts an aggregate to the keys in the matching affected_* table
+FORMAT_SUMMARY_SQL = {
+    'batter_format_stats': '''
+    INSERT INTO batter_format_stats
+    SELECT batter_key, format,
+           COUNT(*), SUM(runs), SUM(balls), SUM(fours), SUM(sixes), SUM(dots), SUM(dismissed),
+           MAX(runs), SUM(runs >= 50 AND runs < 100), SUM(runs >= 100),
+           ROUND(SUM(runs) * 100.0 / SUM(balls), 2),
+           ROUND(SUM(runs) * 1.0 / NULLIF(SUM(dismissed), 0), 2)
+    FROM batter_innings
+    WHERE 1 = 1 {key_filter}
+    GROUP BY batter_key, format
+    ''',
+    'bowler_format_stats': '''
+    INSERT INTO bowler_format_stats
+    SELECT bowler_key, format,
+           COUNT(*), SUM(balls), SUM(runs_conceded), SUM(wickets), SUM(dots),
+           ROUND(SUM(runs_conceded) * 6.0 / SUM(balls), 2),
+           ROUND(SUM(runs_conceded) * 1.0 / NULLIF(SUM(wickets), 0), 2),
+           ROUND(SUM(balls) * 1.0 / NULLIF(SUM(wickets), 0), 2)
+    FROM bowler_innings
+    WHERE 1 = 1 {key_filter}
+    GROUP BY bowler_key, format
+    ''',
+    'venue_format_stats': '''
+    INSERT INTO venue_format_stats
+    SELECT m.venue, m.format,
+           COUNT(DISTINCT m.match_id),
+           COUNT(i.match_id),
+           SUM(i.total_runs),
+           ROUND(AVG(i.total_runs), 2),
+           MAX(i.total_runs),
+           MIN(i.total_runs),
+           COUNT(DISTINCT CASE WHEN m.toss_decision = 'bat' THEN m.match_id END),
+           COUNT(DISTINCT CASE WHEN m.toss_decision = 'field' THEN m.match_id END)
+    FROM matches m
+    LEFT JOIN innings i ON i.match_id = m.match_id
+    WHERE m.venue IS NOT NULL {key_filter}
+    GROUP BY m.venue, m.format
+    ''',
+    'team_format_stats': '''
+    INSERT INTO team_format_stats
+    SELECT team, format,
+           COUNT(*),
+           SUM(winner = team),
+           SUM(toss_winner = team),
+           ROUND(SUM(winner = team) * 100.0 / COUNT(*), 2)
+    FROM (
+        SELECT m.team1 AS team, m.format, m.winner, m.toss_winner FROM matches m WHERE m.team1 IS NOT NULL
+        UNION ALL
+        SELECT m.team2 AS team, m.format, m.winner, m.toss_winner FROM matches m WHERE m.team2 IS NOT NULL
+    ) t
+    WHERE 1 = 1 {key_filter}
+    GROUP BY team, format
+    '''
+}
+
+# Where each aggregate's keys come from, for refresh bookkeeping
+AFFECTED_KEY_SQL = {
+    'batter_format_stats': ('affected_batters', '''
+        INSERT OR IGNORE INTO affected_batters
+        SELECT batter_key, format FROM batter_innings WHERE match_id IN (SELECT match_id FROM refresh_ids)
+    ''', "AND (batter_key, format) IN (SELECT key, format FROM affected_batters)"),
+    'bowler_format_stats': ('affected_bowlers', '''
+        INSERT OR IGNORE INTO affected_bowlers
+        SELECT bowler_key, format FROM bowler_innings WHERE match_id IN (SELECT match_id FROM refresh_ids)
+    ''', "AND (bowler_key, format) IN (SELECT key, format FROM affected_bowlers)"),
+    'venue_format_stats': ('affected_venues', '''
+        INSERT OR IGNORE INTO affected_venues
+        SELECT venue, format FROM matches
+        WHERE venue IS NOT NULL AND match_id IN (SELECT match_id FROM refresh_ids)
+    ''', "AND (m.venue, m.format) IN (SELECT key, format FROM affected_venues)"),
+    'team_format_stats': ('affected_teams', '''
+        INSERT OR IGNORE INTO affected_teams
+        SELECT team1, format FROM matches
+        WHERE team1 IS NOT NULL AND match_id IN (SELECT match_id FROM refresh_ids)
+        UNION
+        SELECT team2, format FROM matches
+        WHERE team2 IS NOT NULL AND match_id IN (SELECT match_id FROM refresh_ids)
+    ''', "AND (team, format) IN (SELECT key, format FROM affected_teams)")
+}
+
+SUMMARY_KEY_COLUMNS = {
+    'batter_format_stats': 'batter_key',
+    'bowler_format_stats': 'bowler_key',
+    'venue_format_stats': 'venue',
+    'team_format_stats': 'team'
+}
+
+# Key column of each player summary; tables built before the summaries were
+# keyed on player_key lack it and are rebuilt
+PLAYER_KEY_COLUMNS = {
+    'batter_innings': 'batter_key',
+    'bowler_innings': 'bowler_key',
+    'batter_format_stats': 'batter_key',
+    'bowler_format_stats': 'bowler_key'
+}
+
+def table_columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def outdated_summary_tables(conn):
+    """Player summary tables present without their player_key column"""
+    outdated = []
+    for table, key_column in PLAYER_KEY_COLUMNS.items():
+        columns = table_columns(conn, table)
+        if columns and key_column not in columns:
+            outdated.append(table)
+    return outdated
+
+def create_summary_tables(conn):
+    """Create the summary tables and their indexes, dropping outdated ones first"""
+    for table in outdated_summary_tables(conn):
+        conn.execute(f"DROP TABLE {table}")
+    for sql in CREATE_SUMMARY_SQL:
+        conn.execute(sql)
+
+def summary_tables_exist(conn):
+    """True when every summary table is present, with the current schema"""
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return all(table in names for table in SUMMARY_TABLES) and not outdated_summary_tables(conn)
+
+def build_summary_tables(conn):
+    """Rebuild every summary table from the base tables (inside the caller's transaction)"""
+    create_summary_tables(conn)
+
+    for table in SUMMARY_TABLES:
+        conn.execute(f"DELETE FROM {table}")
+
+    for table in MATCH_SUMMARY_TABLES:
+        conn.execute(MATCH_SUMMARY_SQL[table].format(match_filter=""))
+
+    for table in FORMAT_SUMMARY_TABLES:
+        conn.execute(FORMAT_SUMMARY_SQL[table].format(key_filter=""))
+
+    for table in SUMMARY_TABLES:
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        logger.info(f"  {table}: {count:,} rows")
+
+def collect_affected_keys(conn):
+    """Record the aggregate keys touched by the matches in refresh_ids
+
+    Called once before the old rows are deleted and once after the new rows
+    are inserted, so keys that disappear are recomputed (and dropped) too.
+    """
+    for table, (affected_table, collect_sql, key_filter) in AFFECTED_KEY_SQL.items():
+        # key is untyped: player keys are integers, venues and teams text
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {affected_table} "
+                     f"(key, format TEXT, PRIMARY KEY (key, format))")
+        conn.execute(collect_sql)
+
+def begin_summary_refresh(conn):
+    """First half of an incremental refresh: run before the base rows are deleted"""
+    create_summary_tables(conn)
+
+    for affected_table, collect_sql, key_filter in AFFECTED_KEY_SQL.values():
+        conn.execute(f"DROP TABLE IF EXISTS temp.{affected_table}")
+    collect_affected_keys(conn)
+
+    for table in MATCH_SUMMARY_TABLES:
+        conn.execute(f"DELETE FROM {table} WHERE match_id IN (SELECT match_id FROM refresh_ids)")
+
+def finish_summary_refresh(conn):
+    """Second half of an incremental refresh: run after the new base rows are inserted"""
+    match_filter = "AND d.match_id IN (SELECT match_id FROM refresh_ids)"
+    for table in MATCH_SUMMARY_TABLES:
+        conn.execute(MATCH_SUMMARY_SQL[table].format(match_filter=match_filter))
+
+    collect_affected_keys(conn)
+
+    for table in FORMAT_SUMMARY_TABLES:
+        affected_table, collect_sql, key_filter = AFFECTED_KEY_SQL[table]
+        key_column = SUMMARY_KEY_COLUMNS[table]
+
+        cursor = conn.execute(f"DELETE FROM {table} WHERE ({key_column}, format) IN "
+                              f"(SELECT key, format FROM {affected_table})")
+        conn.execute(FORMAT_SUMMARY_SQL[table].format(key_filter=key_filter))
+        logger.info(f"  {table}: {cursor.rowcount:,} keys recomputed")
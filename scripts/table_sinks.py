@@ -0,0 +1,44 @@
+import os
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CsvTableSink:
+    """Append column batches to one CSV per table.
+
+    Each table is written to a temporary file and moved into place on close(),
+    so readers never see a half-written table.
+    """
+
+    def __init__(self, output_dir, tables):
+        self.output_dir = output_dir
+        self.tables = tables
+        self.row_counts = {table: 0 for table in tables}
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        for table in tables:
+            tmp_path = self.tmp_path(table)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def path(self, table):
+        return os.path.join(self.output_dir, f"{table}.csv")
+
+    def tmp_path(self, table):
+        return self.path(table) + '.tmp'
+
+    def write_batch(self, table, frame):
+        """Append a DataFrame batch to a table"""
+        frame.to_csv(self.tmp_path(table), mode='a', header=self.row_counts[table] == 0, index=False)
+        self.row_counts[table] += len(frame)
+
+    def close(self):
+        """Move every table into place"""
+        for table in self.tables:
+            if self.row_counts[table] == 0:
+                pd.DataFrame().to_csv(self.tmp_path(table), index=False)
+            os.replace(self.tmp_path(table), self.path(table))
+
+        logger.info(f"Data saved to {self.output_dir}")
@@ -0,0 +1,366 @@
+import json
+import time
+import sqlite3
+import argparse
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from result_cache import bump_generations
+
+logger = logging.getLogger(__name__)
+
+# Limited-overs formats the model covers, with their scheduled balls per innings
+FORMAT_BALLS = {'odis': 300, 't20s': 120, 'ipl': 120}
+MODEL_FORMATS = list(FORMAT_BALLS)
+MODEL_INNINGS = (1, 2)
+
+# Dismissals that do not cost the batting side a wicket in hand
+NOT_OUT_KINDS = ('retired hurt', 'retired not out')
+
+FEATURE_NAMES = ['intercept', 'runs', 'balls_left', 'wickets_in_hand', 'run_rate', 'wickets_x_balls_left']
+
+# Newton's method on an L2-penalised (intercept excluded) logistic likelihood
+RIDGE = 1.0
+NEWTON_ITERATIONS = 25
+NEWTON_TOLERANCE = 1e-8
+
+# Required/current run rates are clipped to this many runs per over
+MAX_RUN_RATE = 36.0
+
+WIN_PROBABILITY_TABLES = ['win_probability', 'win_probability_models']
+
+CREATE_WIN_PROBABILITY_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS win_probability (
+        match_id TEXT,
+        innings_number INTEGER,
+        delivery_number INTEGER,
+        over_number INTEGER,
+        runs INTEGER,
+        wickets INTEGER,
+        balls_left INTEGER,
+        runs_required INTEGER,
+        win_probability REAL,
+        PRIMARY KEY (match_id, innings_number, delivery_number)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS win_probability_models (
+        format TEXT,
+        innings_number INTEGER,
+        coefficients TEXT,
+        matches INTEGER,
+        balls INTEGER,
+        log_loss REAL,
+        brier_score REAL,
+        trained_at TEXT,
+        PRIMARY KEY (format, innings_number)
+    )
+    '''
+]
+
+# Legal balls and wickets of innings 1 and 2 of every limited-overs match, as
+# integer columns; the label is whether the batting side won (NULL without a winner)
+BALLS_SQL = '''
+SELECT d.match_id, f.format, d.innings_number, d.over_number, d.delivery_number,
+       d.total_runs, d.is_legal_ball,
+       d.player_dismissed_key IS NOT NULL AND COALESCE(d.wicket_type, '') NOT IN ({not_out}) AS is_out,
+       CASE WHEN m.winner IS NULL THEN NULL ELSE t.team_name = m.winner END AS batting_side_won
+FROM fact_deliveries d
+JOIN dim_formats f ON f.format_key = d.format_key
+JOIN matches m ON m.match_id = d.match_id
+LEFT JOIN dim_teams t ON t.team_key = d.batting_team_key
+WHERE f.format IN ({formats}) AND d.innings_number IN (1, 2)
+'''
+
+def sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -35, 35)))
+
+def group_cumsum(values, group_id, starts):
+    """Running total of values within each contiguous group"""
+    total = np.cumsum(values)
+    return total - (total - values)[starts][group_id]
+
+def ball_states(balls):
+    """State of the batting side after every ball, in one vectorised pass
+
+    balls holds match_id, format, innings_number, over_number,
+    delivery_number, total_runs, is_legal_ball and is_out columns. Rows are
+    sorted by match, innings and delivery_number; runs, legal balls and
+    wickets are running totals per innings, balls left count down from the
+    format's scheduled balls, and the second innings chases the first
+    innings total plus one (runs_required is NaN outside a chase). Returns
+    a frame in that order.
+    """
+    match_codes, match_ids = pd.factorize(np.asarray(balls['match_id'], dtype=object))
+    innings = np.asarray(balls['innings_number'], dtype=np.int64)
+    delivery = np.asarray(balls['delivery_number'], dtype=np.int64)
+    order = np.lexsort((delivery, innings, match_codes))
+
+    match_codes, innings = match_codes[order], innings[order]
+    n = len(order)
+
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = (match_codes[1:] != match_codes[:-1]) | (innings[1:] != innings[:-1])
+    starts = np.flatnonzero(new_group)
+    group_id = np.cumsum(new_group) - 1
+
+    runs = group_cumsum(np.asarray(balls['total_runs'], dtype=np.int64)[order], group_id, starts)
+    legal = group_cumsum(np.asarray(balls['is_legal_ball'], dtype=np.int64)[order], group_id, starts)
+    wickets = group_cumsum(np.asarray(balls['is_out'], dtype=np.int64)[order], group_id, starts)
+
+    formats = np.asarray(balls['format'], dtype=object)[order]
+    max_balls = pd.Series(formats).map(FORMAT_BALLS).to_numpy(dtype=np.int64)
+
+    # First-innings total of each match, from the last ball of its innings 1
+    ends = np.r_[starts[1:], n] - 1
+    first_total = np.full(len(match_ids), -1, dtype=np.int64)
+    first_ends = ends[innings[ends] == 1]
+    first_total[match_codes[first_ends]] = runs[first_ends]
+    target = first_total[match_codes] + 1
+    chasing = (innings == 2) & (target > 0)
+
+    won = pd.to_numeric(pd.Series(np.asarray(balls['batting_side_won'], dtype=object)[order]), errors='coerce')
+
+    return pd.DataFrame({
+        'match_id': np.asarray(match_ids, dtype=object)[match_codes],
+        'format': formats,
+        'innings_number': innings,
+        'delivery_number': delivery[order],
+        'over_number': np.asarray(balls['over_number'], dtype=np.int64)[order],
+        'runs': runs,
+        'wickets': wickets,
+        'balls_left': np.clip(max_balls - legal, 0, None),
+        'max_balls': max_balls,
+        'runs_required': np.where(chasing, target - runs, np.nan),
+        'batting_side_won': won.to_numpy(dtype=np.float64)
+    })
+
+def state_features(states):
+    """Feature matrix (rows x FEATURE_NAMES) of ball states
+
+    The second innings uses runs required and the required rate; the
+    first innings, with no target yet, the runs scored and the current
+    rate. Runs and balls are scaled by the scheduled balls, so one set of
+    features serves every format.
+    """
+    max_balls = states['max_balls'].to_numpy(dtype=np.float64)
+    balls_left = states['balls_left'].to_numpy(dtype=np.float64)
+    wickets_in_hand = (10 - states['wickets'].to_numpy(dtype=np.float64)).clip(0, 10) / 10
+    chasing = states['innings_number'].to_numpy() == 2
+
+    runs = np.where(chasing, np.clip(states['runs_required'].to_numpy(dtype=np.float64), 0, None),
+                    states['runs'].to_numpy(dtype=np.float64))
+    # Required rate over the balls left, or the scoring rate over the balls bowled
+    rate_balls = np.where(chasing, balls_left, max_balls - balls_left)
+    run_rate = np.clip(runs * 6.0 / np.maximum(rate_balls, 1), 0, MAX_RUN_RATE) / 6.0
+
+    balls_left_fraction = balls_left / max_balls
+    return np.column_stack([np.ones(len(states)), runs / max_balls, balls_left_fraction,
+                            wickets_in_hand, run_rate, wickets_in_hand * balls_left_fraction])
+
+def fit_logistic(X, y, ridge=RIDGE, iterations=NEWTON_ITERATIONS):
+    """Coefficients of an L2-penalised logistic regression, by Newton's method"""
+    beta = np.zeros(X.shape[1])
+    penalty = np.full(X.shape[1], ridge)
+    penalty[0] = 0.0
+
+    for _ in range(iterations):
+        p = sigmoid(X @ beta)
+        gradient = X.T @ (p - y) + penalty * beta
+        hessian = (X * (p * (1 - p))[:, None]).T @ X + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        beta -= step
+        if np.abs(step).max() < NEWTON_TOLERANCE:
+            break
+    return beta
+
+def settled_probability(states):
+    """1 / 0 where the chase is already decided, NaN where the model applies"""
+    required = states['runs_required'].to_numpy(dtype=np.float64)
+    out_of_resources = (states['balls_left'].to_numpy() == 0) | (states['wickets'].to_numpy() >= 10)
+    return np.where(required <= 0, 1.0, np.where((required > 0) & out_of_resources, 0.0, np.nan))
+
+class WinProbabilityModel:
+    """One logistic model per (format, innings) over the ball state features
+
+    train() fits every model from ball states; score() evaluates all of
+    them over any number of balls with one matrix product, picking each
+    row's coefficients by fancy indexing. predict() is the what-if lookup
+    for a single state (or arrays of them).
+    """
+
+    def __init__(self, coefficients=None):
+        # {(format, innings_number): coefficient array in FEATURE_NAMES order}
+        self.coefficients = coefficients or {}
+        self.metrics = {}
+
+    def model_keys(self):
+        return [(match_format, innings) for match_format in MODEL_FORMATS for innings in MODEL_INNINGS]
+
+    def train(self, states):
+        """Fit the models on the balls of matches with a winner; returns self"""
+        X = state_features(states)
+        won = states['batting_side_won'].to_numpy()
+        open_state = np.isnan(settled_probability(states)) & np.isfinite(X).all(axis=1)
+
+        for match_format, innings in self.model_keys():
+            rows = ((states['format'].to_numpy() == match_format)
+                    & (states['innings_number'].to_numpy() == innings) & ~np.isnan(won) & open_state)
+            if not rows.any():
+                continue
+
+            beta = fit_logistic(X[rows], won[rows])
+            p = np.clip(sigmoid(X[rows] @ beta), 1e-12, 1 - 1e-12)
+            self.coefficients[(match_format, innings)] = beta
+            self.metrics[(match_format, innings)] = {
+                'matches': int(pd.unique(states['match_id'].to_numpy()[rows]).size),
+                'balls': int(rows.sum()),
+                'log_loss': float(-np.mean(won[rows] * np.log(p) + (1 - won[rows]) * np.log(1 - p))),
+                'brier_score': float(np.mean((p - won[rows]) ** 2))
+            }
+        return self
+
+    def score(self, states):
+        """Batting side's win probability after every ball (NaN without a trained model)"""
+        keys = self.model_keys()
+        B = np.vstack([self.coefficients.get(key, np.full(len(FEATURE_NAMES), np.nan)) for key in keys]
+                      + [np.full(len(FEATURE_NAMES), np.nan)])
+
+        format_index = pd.Series(states['format'].to_numpy()).map(
+            {match_format: i for i, match_format in enumerate(MODEL_FORMATS)})
+        model_index = (format_index.to_numpy(dtype=np.float64) * len(MODEL_INNINGS)
+                       + states['innings_number'].to_numpy() - 1)
+        model_index = np.where(np.isnan(model_index) | (model_index < 0) | (model_index >= len(keys)),
+                               len(keys), model_index).astype(np.int64)
+
+        probability = sigmoid(np.einsum('ij,ij->i', state_features(states), B[model_index]))
+        settled = settled_probability(states)
+        return np.where(np.isnan(settled), probability, settled)
+
+    def predict(self, match_format, innings_number, runs, balls_left, wickets, target=None):
+        """Win probability of the batting side for one state or arrays of states
+
+        runs are the runs scored so far, wickets the wickets lost; target is
+        the runs needed to win, required in the second innings.
+        """
+        runs, balls_left, wickets = np.broadcast_arrays(np.asarray(runs), np.asarray(balls_left),
+                                                        np.asarray(wickets))
+        runs_required = (np.asarray(target) - runs) if innings_number == 2 else np.full(runs.shape, np.nan)
+        states = pd.DataFrame({
+            'format': match_format,
+            'innings_number': innings_number,
+            'runs': runs.ravel(),
+            'wickets': wickets.ravel(),
+            'balls_left': balls_left.ravel(),
+            'max_balls': FORMAT_BALLS[match_format],
+            'runs_required': np.broadcast_to(runs_required, runs.shape).ravel()
+        })
+        probability = self.score(states).reshape(runs.shape)
+        return float(probability) if probability.ndim == 0 else probability
+
+    def save(self, conn):
+        """Replace the stored models (inside the caller's transaction)"""
+        conn.execute("DELETE FROM win_probability_models")
+        trained_at = datetime.now().isoformat(timespec='seconds')
+        conn.executemany('''
+        INSERT INTO win_probability_models
+            (format, innings_number, coefficients, matches, balls, log_loss, brier_score, trained_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(match_format, innings, json.dumps(dict(zip(FEATURE_NAMES, beta.tolist()))),
+               *[self.metrics.get((match_format, innings), {}).get(field)
+                 for field in ('matches', 'balls', 'log_loss', 'brier_score')], trained_at)
+              for (match_format, innings), beta in self.coefficients.items()])
+
+    @classmethod
+    def load(cls, conn):
+        """The stored models, or None when they have not been built"""
+        try:
+            rows = conn.execute("SELECT format, innings_number, coefficients FROM win_probability_models").fetchall()
+        except sqlite3.OperationalError:
+            return None
+        if not rows:
+            return None
+        return cls({(match_format, innings): np.array([json.loads(coefficients)[name] for name in FEATURE_NAMES])
+                    for match_format, innings, coefficients in rows})
+
+def create_win_probability_tables(conn):
+    for sql in CREATE_WIN_PROBABILITY_SQL:
+        conn.execute(sql)
+
+def win_probability_tables_exist(conn):
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return all(table in names for table in WIN_PROBABILITY_TABLES)
+
+def read_ball_states(conn):
+    """Ball states of every limited-overs match in the database"""
+    sql = BALLS_SQL.format(not_out=', '.join(f"'{kind}'" for kind in NOT_OUT_KINDS),
+                           formats=', '.join('?' for _ in MODEL_FORMATS))
+    return ball_states(pd.read_sql_query(sql, conn, params=MODEL_FORMATS))
+
+def build_win_probabilities(conn):
+    """Retrain the models and re-score every ball (inside the caller's transaction)
+
+    Returns the timings of the read, train, score and write steps in seconds.
+    """
+    create_win_probability_tables(conn)
+    timings = {}
+
+    start = time.perf_counter()
+    states = read_ball_states(conn)
+    timings['read'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = WinProbabilityModel().train(states)
+    timings['train'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    probability = model.score(states)
+    timings['score'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.save(conn)
+    conn.execute("DELETE FROM win_probability")
+    # NULL outside a chase and for balls without a model
+    runs_required = states['runs_required'].to_numpy()
+    required_values = np.clip(runs_required, 0, None).astype(object)
+    required_values[np.isnan(runs_required)] = None
+    probability_values = np.round(probability, 4).astype(object)
+    probability_values[np.isnan(probability)] = None
+    conn.executemany("INSERT INTO win_probability VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", zip(
+        states['match_id'].tolist(), states['innings_number'].tolist(), states['delivery_number'].tolist(),
+        states['over_number'].tolist(), states['runs'].tolist(), states['wickets'].tolist(),
+        states['balls_left'].tolist(), required_values.tolist(), probability_values.tolist()))
+    timings['write'] = time.perf_counter() - start
+
+    # Invalidates cached query results that read the old probabilities
+    bump_generations(conn, WIN_PROBABILITY_TABLES)
+
+    for (match_format, innings), metrics in sorted(model.metrics.items()):
+        logger.info(f"  {match_format} innings {innings}: {metrics['matches']} matches, {metrics['balls']:,} balls, "
+                    f"log loss {metrics['log_loss']:.3f}, Brier {metrics['brier_score']:.3f}")
+    logger.info(f"  win_probability: {len(states):,} balls scored in {timings['score']:.3f}s")
+    return timings
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Train the win-probability models and re-score every ball")
+    parser.add_argument("--db", default="data/cricket_data.db")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        conn.execute("BEGIN")
+        timings = build_win_probabilities(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    print("🎯 Win probability rebuilt: " + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items()))
@@ -1,80 +1,218 @@
 import requests
 import zipfile
+import shutil
 import json
 import os
 import time
+import argparse
 from urllib.parse import urljoin
 
+from async_downloader import DownloadIndex, INDEX_FILENAME
+from match_sources import file_sha256
+from raw_store import RawPack, raw_pack_exists
+
+# Archives and members are streamed in pieces of this size, so memory stays
+# flat however large the archive is
+CHUNK_SIZE = 1 << 20
+
 class CricsheetZipScraper:
-    def __init__(self, download_dir="data/raw_json"):
+    def __init__(self, download_dir="data/raw_json", archive_dir="data/downloads", extract=True, limit=None,
+                 base_url="https://cricsheet.org"):
         self.download_dir = download_dir
-        self.base_url = "https://cricsheet.org"
+        self.archive_dir = archive_dir
+        self.base_url = base_url
         self.session = requests.Session()
         
+        # extract=False keeps the archives in archive_dir for CricketDataProcessor(archive_dir=...)
+        # to read directly, instead of re-encoding every member into download_dir
+        self.extract = extract
+        
+        # Members extracted per archive (None = all of them)
+        self.limit = limit
+        
+        # {format: [match ids]} written by the last extract_new_members() of each format
+        self.extracted = {}
+        
         # Create directories
         os.makedirs(download_dir, exist_ok=True)
-        os.makedirs("data/downloads", exist_ok=True)
+        os.makedirs(archive_dir, exist_ok=True)
         
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        
+        # ETag / Last-Modified / sha256 of the cached archives
+        self.index = DownloadIndex(os.path.join(archive_dir, INDEX_FILENAME))
+    
+    def archive_path(self, zip_url):
+        """Cached location of an archive, under its Cricsheet name, e.g. tests_json.zip"""
+        return os.path.join(self.archive_dir, os.path.basename(zip_url))
     
-    def download_and_extract_zip(self, zip_url, format_name):
-        """Download ZIP file and extract JSON files"""
+    def download_archive(self, zip_url, expected_sha256=None):
+        """Stream an archive to the on-disk cache in CHUNK_SIZE pieces and return its path
         
-        print(f"\n🏏 Downloading {format_name} matches...")
-        print(f"URL: {zip_url}")
+        A cached archive is revalidated with a conditional GET (304 keeps it).
+        Bytes go to <archive>.part, so an interrupted download resumes with a
+        Range request; If-Range restarts it if the archive changed meanwhile.
+        The finished file is checked against expected_sha256 (when given) and
+        every member's CRC before it replaces the cached copy.
+        """
+        zip_path = self.archive_path(zip_url)
+        part_path = zip_path + '.part'
+        partial_key = zip_url + '#partial'
         
-        try:
-            # Download ZIP file
-            response = self.session.get(zip_url, timeout=60)
-            response.raise_for_status()
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        partial = self.index.entries.get(partial_key) or {}
+        if resume_from and (partial.get('etag') or partial.get('last_modified')):
+            headers = {'Range': f"bytes={resume_from}-",
+                       'If-Range': partial.get('etag') or partial.get('last_modified')}
+        else:
+            resume_from = 0
+            headers = self.index.validators(zip_url, zip_path)
+        
+        with self.session.get(zip_url, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code == 304:
+                recorded = self.index.entries.get(zip_url, {}).get('sha256')
+                if expected_sha256 and recorded != expected_sha256.lower():
+                    raise IOError(f"Checksum mismatch: cached {recorded} != {expected_sha256}")
+                print(f"♻️  Cached archive is current: {zip_path}")
+                return zip_path
             
-            # Save ZIP temporarily
-            zip_path = f"data/downloads/{format_name}.zip"
-            with open(zip_path, 'wb') as f:
-                f.write(response.content)
+            if response.status_code == 416:
+                # The partial file is no prefix of the archive; start over
+                os.remove(part_path)
+                self.index.entries.pop(partial_key, None)
+                return self.download_archive(zip_url, expected_sha256)
             
-            print(f"✅ Downloaded ZIP: {len(response.content)} bytes")
+            response.raise_for_status()
+            if response.status_code != 206:
+                resume_from = 0
+                self.index.record(partial_key, response.headers)
+                self.index.save()
+            elif resume_from:
+                print(f"⏯️  Resuming at {resume_from:,} bytes")
             
-            # Extract JSON files
-            format_dir = os.path.join(self.download_dir, format_name)
-            os.makedirs(format_dir, exist_ok=True)
+            expected_size = int(response.headers.get('Content-Length', 0)) + resume_from
+            with open(part_path, 'ab' if resume_from else 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+            validators = response.headers
+        
+        size = os.path.getsize(part_path)
+        if expected_size > resume_from and size != expected_size:
+            raise IOError(f"Incomplete download: {size:,} of {expected_size:,} bytes (kept for resume)")
+        
+        digest = file_sha256(part_path)
+        try:
+            if expected_sha256 and digest != expected_sha256.lower():
+                raise IOError(f"Checksum mismatch: {digest} != {expected_sha256}")
+            with zipfile.ZipFile(part_path, 'r') as zip_ref:
+                bad_member = zip_ref.testzip()
+            if bad_member:
+                raise IOError(f"CRC check failed for {bad_member}")
+        except (IOError, zipfile.BadZipFile):
+            os.remove(part_path)
+            self.index.entries.pop(partial_key, None)
+            self.index.save()
+            raise
+        
+        os.replace(part_path, zip_path)
+        self.index.entries.pop(partial_key, None)
+        self.index.record(zip_url, validators, sha256=digest)
+        self.index.save()
+        
+        print(f"✅ Downloaded ZIP: {size:,} bytes (sha256 {digest[:12]}…)")
+        return zip_path
+    
+    def member_index_path(self, format_name):
+        return os.path.join(self.archive_dir, f"{format_name}_members.json")
+    
+    def extract_new_members(self, zip_path, format_name):
+        """Extract the JSON members that are new or changed since the last run
+        
+        {member name: CRC} of the last extraction is kept next to the archive;
+        members with the same CRC whose file (or pack entry) still exists are
+        skipped, and the rest are streamed to disk as-is and swapped into place.
+        A format with a raw pack takes the members without a loose file into
+        the pack instead.
+        """
+        format_dir = os.path.join(self.download_dir, format_name)
+        os.makedirs(format_dir, exist_ok=True)
+        pack = RawPack(self.download_dir, format_name) if raw_pack_exists(self.download_dir, format_name) else None
+        
+        index_path = self.member_index_path(format_name)
+        previous = {}
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        
+        members = {}
+        extracted_ids = []
+        
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            json_files = [info for info in zip_ref.infolist() if info.filename.endswith('.json')]
+            print(f"📦 ZIP contains {len(json_files)} JSON files")
             
-            extracted_count = 0
+            if self.limit:
+                json_files = json_files[:self.limit]
             
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # List all files in ZIP
-                file_list = zip_ref.namelist()
-                json_files = [f for f in file_list if f.endswith('.json')]
-                
-                print(f"📦 ZIP contains {len(json_files)} JSON files")
+            for info in json_files:
+                output_path = os.path.join(format_dir, os.path.basename(info.filename))
+                match_id = os.path.basename(info.filename)[:-len('.json')]
+                packed = pack is not None and not os.path.exists(output_path)
+                present = match_id in pack if packed else os.path.exists(output_path)
+                if previous.get(info.filename) == info.CRC and present:
+                    members[info.filename] = info.CRC
+                    continue
                 
-                # Extract JSON files (limit for testing)
-                for i, json_file in enumerate(json_files[:10]):  # Limit to first 10 for testing
-                    try:
-                        # Extract file content
-                        with zip_ref.open(json_file) as file:
-                            json_data = json.load(file)
-                        
-                        # Save to format directory
-                        filename = os.path.basename(json_file)
-                        output_path = os.path.join(format_dir, filename)
-                        
-                        with open(output_path, 'w', encoding='utf-8') as f:
-                            json.dump(json_data, f, indent=2)
-                        
-                        print(f"  ✅ Extracted: {filename}")
-                        extracted_count += 1
-                        
-                    except Exception as e:
-                        print(f"  ❌ Failed to extract {json_file}: {str(e)}")
+                try:
+                    if packed:
+                        # Unchanged content already in the pack is not appended again
+                        if pack.add(match_id, zip_ref.read(info)):
+                            extracted_ids.append(match_id)
+                        members[info.filename] = info.CRC
+                        continue
+                    
+                    # Reading a member to the end verifies its CRC
+                    tmp_path = output_path + '.tmp'
+                    with zip_ref.open(info) as source, open(tmp_path, 'wb') as target:
+                        shutil.copyfileobj(source, target, CHUNK_SIZE)
+                    os.replace(tmp_path, output_path)
+                    
+                    members[info.filename] = info.CRC
+                    extracted_ids.append(match_id)
+                    
+                except Exception as e:
+                    print(f"  ❌ Failed to extract {info.filename}: {str(e)}")
+        
+        if pack is not None:
+            pack.save()
+        self.extracted[format_name] = extracted_ids
+        
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(members, f, indent=2, sort_keys=True)
+        
+        print(f"📊 {format_name} Summary: {len(extracted_ids)} new/changed files extracted, "
+              f"{len(members) - len(extracted_ids)} unchanged")
+        return len(extracted_ids)
+    
+    def download_and_extract_zip(self, zip_url, format_name, expected_sha256=None):
+        """Download (or revalidate) a format archive and extract its new JSON files"""
+        
+        print(f"\n🏏 Downloading {format_name} matches...")
+        print(f"URL: {zip_url}")
+        
+        try:
+            zip_path = self.download_archive(zip_url, expected_sha256)
             
-            # Clean up ZIP file
-            os.remove(zip_path)
+            if not self.extract:
+                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                    member_count = len([f for f in zip_ref.namelist() if f.endswith('.json')])
+                
+                print(f"📦 Kept archive with {member_count} JSON files: {zip_path}")
+                return member_count
             
-            print(f"📊 {format_name} Summary: {extracted_count} files extracted")
-            return extracted_count
+            return self.extract_new_members(zip_path, format_name)
             
         except Exception as e:
             print(f"❌ Error downloading/extracting {format_name}: {str(e)}")
@@ -134,7 +272,14 @@ class CricsheetZipScraper:
                 print(f"{subindent}... and {len(files) - 5} more files")
 
 if __name__ == "__main__":
-    scraper = CricsheetZipScraper()
+    parser = argparse.ArgumentParser(description="Download Cricsheet format archives")
+    parser.add_argument("--keep-archives", action="store_true",
+                        help="Keep the ZIPs in data/downloads for direct ingest instead of extracting")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Extract at most this many members per archive (for testing)")
+    args = parser.parse_args()
+    
+    scraper = CricsheetZipScraper(extract=not args.keep_archives, limit=args.limit)
     
     try:
         total_files = scraper.download_all_formats()
@@ -1,34 +1,55 @@
 -- ============================================================
--- CRICKET DATA ANALYSIS - 20 SQL QUERIES
+-- CRICKET DATA ANALYSIS - 21 SQL QUERIES
 -- ============================================================
 
 -- 1. Top 10 batsmen by total runs across all formats
 SELECT 
-    batter,
-    COUNT(*) as balls_faced,
-    SUM(batter_runs) as total_runs,
-    ROUND(AVG(batter_runs), 2) as strike_rate,
-    COUNT(CASE WHEN batter_runs = 4 THEN 1 END) as fours,
-    COUNT(CASE WHEN batter_runs = 6 THEN 1 END) as sixes
-FROM deliveries 
-WHERE batter IS NOT NULL
-GROUP BY batter
-ORDER BY total_runs DESC
-LIMIT 10;
+    p.player_name as batter,
+    b.balls_faced,
+    b.total_runs,
+    b.strike_rate,
+    b.fours,
+    b.sixes
+FROM (
+    SELECT 
+        batter_key,
+        SUM(is_batter_ball) as balls_faced,
+        SUM(batter_runs) as total_runs,
+        ROUND(SUM(batter_runs) * 100.0 / SUM(is_batter_ball), 2) as strike_rate,
+        COUNT(CASE WHEN batter_runs = 4 THEN 1 END) as fours,
+        COUNT(CASE WHEN batter_runs = 6 THEN 1 END) as sixes
+    FROM fact_deliveries 
+    WHERE batter_key IS NOT NULL
+    GROUP BY batter_key
+    ORDER BY total_runs DESC
+    LIMIT 10
+) b
+JOIN dim_players p ON p.player_key = b.batter_key
+ORDER BY b.total_runs DESC;
 
 -- 2. Top 10 bowlers by wickets taken
 SELECT 
-    bowler,
-    COUNT(*) as balls_bowled,
-    SUM(total_runs) as runs_conceded,
-    COUNT(CASE WHEN wicket_type IS NOT NULL THEN 1 END) as wickets,
-    ROUND(SUM(total_runs) * 1.0 / COUNT(*) * 6, 2) as economy_rate
-FROM deliveries 
-WHERE bowler IS NOT NULL
-GROUP BY bowler
-HAVING wickets > 0
-ORDER BY wickets DESC, economy_rate ASC
-LIMIT 10;
+    p.player_name as bowler,
+    b.balls_bowled,
+    b.runs_conceded,
+    b.wickets,
+    b.economy_rate
+FROM (
+    SELECT 
+        bowler_key,
+        SUM(is_legal_ball) as balls_bowled,
+        SUM(total_runs) as runs_conceded,
+        SUM(is_bowler_wicket) as wickets,
+        ROUND(SUM(total_runs) * 6.0 / SUM(is_legal_ball), 2) as economy_rate
+    FROM fact_deliveries 
+    WHERE bowler_key IS NOT NULL
+    GROUP BY bowler_key
+    HAVING wickets > 0
+    ORDER BY wickets DESC, economy_rate ASC
+    LIMIT 10
+) b
+JOIN dim_players p ON p.player_key = b.bowler_key
+ORDER BY b.wickets DESC, b.economy_rate ASC;
 
 -- 3. Team performance by format
 SELECT 
@@ -67,29 +88,47 @@ LIMIT 15;
 
 -- 5. Most sixes hit by batsmen
 SELECT 
-    batter,
-    COUNT(*) as sixes,
-    SUM(batter_runs) as runs_from_sixes
-FROM deliveries 
-WHERE batter_runs = 6
-GROUP BY batter
-ORDER BY sixes DESC
-LIMIT 10;
+    p.player_name as batter,
+    s.sixes,
+    s.runs_from_sixes
+FROM (
+    SELECT 
+        batter_key,
+        COUNT(*) as sixes,
+        SUM(batter_runs) as runs_from_sixes
+    FROM fact_deliveries 
+    WHERE batter_runs = 6
+    GROUP BY batter_key
+    ORDER BY sixes DESC
+    LIMIT 10
+) s
+JOIN dim_players p ON p.player_key = s.batter_key
+ORDER BY s.sixes DESC;
 
 -- 6. Best bowling figures (most wickets in an innings)
 SELECT 
-    d.bowler,
-    d.match_id,
+    p.player_name as bowler,
+    w.match_id,
     m.format,
     m.venue,
-    COUNT(*) as wickets_taken,
-    SUM(d.total_runs) as runs_conceded
-FROM deliveries d
-JOIN matches m ON d.match_id = m.match_id
-WHERE d.wicket_type IS NOT NULL
-GROUP BY d.bowler, d.match_id, d.innings_number
-ORDER BY wickets_taken DESC, runs_conceded ASC
-LIMIT 10;
+    w.wickets_taken,
+    w.runs_conceded
+FROM (
+    SELECT 
+        d.bowler_key,
+        d.match_id,
+        SUM(d.is_bowler_wicket) as wickets_taken,
+        SUM(d.total_runs) as runs_conceded
+    FROM fact_deliveries d
+    WHERE d.bowler_key IS NOT NULL
+    GROUP BY d.bowler_key, d.match_id, d.innings_number
+    HAVING wickets_taken > 0
+    ORDER BY wickets_taken DESC, runs_conceded ASC
+    LIMIT 10
+) w
+JOIN dim_players p ON p.player_key = w.bowler_key
+JOIN matches m ON w.match_id = m.match_id
+ORDER BY w.wickets_taken DESC, w.runs_conceded ASC;
 
 -- 7. Venue analysis - highest scoring venues
 SELECT 
@@ -119,24 +158,33 @@ GROUP BY format;
 SELECT 
     wicket_type,
     COUNT(*) as frequency,
-    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM deliveries WHERE wicket_type IS NOT NULL), 2) as percentage
-FROM deliveries 
+    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM fact_deliveries WHERE wicket_type IS NOT NULL), 2) as percentage
+FROM fact_deliveries 
 WHERE wicket_type IS NOT NULL
 GROUP BY wicket_type
 ORDER BY frequency DESC;
 
 -- 10. Batsmen with highest strike rates (minimum 100 balls)
 SELECT 
-    batter,
-    COUNT(*) as balls_faced,
-    SUM(batter_runs) as runs_scored,
-    ROUND(SUM(batter_runs) * 100.0 / COUNT(*), 2) as strike_rate
-FROM deliveries 
-WHERE batter IS NOT NULL
-GROUP BY batter
-HAVING balls_faced >= 100
-ORDER BY strike_rate DESC
-LIMIT 10;
+    p.player_name as batter,
+    b.balls_faced,
+    b.runs_scored,
+    b.strike_rate
+FROM (
+    SELECT 
+        batter_key,
+        SUM(is_batter_ball) as balls_faced,
+        SUM(batter_runs) as runs_scored,
+        ROUND(SUM(batter_runs) * 100.0 / SUM(is_batter_ball), 2) as strike_rate
+    FROM fact_deliveries 
+    WHERE batter_key IS NOT NULL
+    GROUP BY batter_key
+    HAVING balls_faced >= 100
+    ORDER BY strike_rate DESC
+    LIMIT 10
+) b
+JOIN dim_players p ON p.player_key = b.batter_key
+ORDER BY b.strike_rate DESC;
 
 -- 11. Teams with most wins by result type
 SELECT 
@@ -162,30 +210,52 @@ LIMIT 10;
 
 -- 13. Extras analysis by format
 SELECT 
-    m.format,
-    COUNT(DISTINCT d.match_id) as matches,
-    SUM(d.extras_runs) as total_extras,
-    ROUND(AVG(d.extras_runs), 2) as avg_extras_per_delivery,
-    COUNT(CASE WHEN d.extras_type = 'wide' THEN 1 END) as wides,
-    COUNT(CASE WHEN d.extras_type = 'noball' THEN 1 END) as noballs
-FROM deliveries d
-JOIN matches m ON d.match_id = m.match_id
-GROUP BY m.format
-ORDER BY total_extras DESC;
+    f.format,
+    x.matches,
+    x.total_extras,
+    x.avg_extras_per_delivery,
+    x.wides,
+    x.noballs
+FROM (
+    SELECT 
+        d.format_key,
+        COUNT(DISTINCT d.match_id) as matches,
+        SUM(d.extras_runs) as total_extras,
+        ROUND(AVG(d.extras_runs), 2) as avg_extras_per_delivery,
+        SUM(1 - d.is_batter_ball) as wides,
+        SUM(d.is_batter_ball - d.is_legal_ball) as noballs
+    FROM fact_deliveries d
+    WHERE d.format_key IS NOT NULL
+    GROUP BY d.format_key
+) x
+JOIN dim_formats f ON f.format_key = x.format_key
+ORDER BY x.total_extras DESC;
 
 -- 14. Most productive partnerships (batting pairs)
 SELECT 
-    d1.batter,
-    d1.non_striker,
-    d1.batting_team,
-    SUM(d1.total_runs) as partnership_runs,
-    COUNT(*) as balls_together
-FROM deliveries d1
-WHERE d1.batter IS NOT NULL AND d1.non_striker IS NOT NULL
-GROUP BY d1.batter, d1.non_striker, d1.batting_team, d1.match_id, d1.innings_number
-HAVING balls_together >= 20
-ORDER BY partnership_runs DESC
-LIMIT 15;
+    b.player_name as batter,
+    ns.player_name as non_striker,
+    t.team_name as batting_team,
+    pr.partnership_runs,
+    pr.balls_together
+FROM (
+    SELECT 
+        d1.batter_key,
+        d1.non_striker_key,
+        d1.batting_team_key,
+        SUM(d1.total_runs) as partnership_runs,
+        SUM(d1.is_legal_ball) as balls_together
+    FROM fact_deliveries d1
+    WHERE d1.batter_key IS NOT NULL AND d1.non_striker_key IS NOT NULL
+    GROUP BY d1.batter_key, d1.non_striker_key, d1.batting_team_key, d1.match_id, d1.innings_number
+    HAVING balls_together >= 20
+    ORDER BY partnership_runs DESC
+    LIMIT 15
+) pr
+JOIN dim_players b ON b.player_key = pr.batter_key
+JOIN dim_players ns ON ns.player_key = pr.non_striker_key
+LEFT JOIN dim_teams t ON t.team_key = pr.batting_team_key
+ORDER BY pr.partnership_runs DESC;
 
 -- 15. Format-wise performance comparison
 SELECT 
@@ -202,37 +272,48 @@ ORDER BY avg_score_per_innings DESC;
 
 -- 16. Most economical bowlers (minimum 50 balls)
 SELECT 
-    bowler,
-    COUNT(*) as balls_bowled,
-    SUM(total_runs) as runs_conceded,
-    ROUND(SUM(total_runs) * 6.0 / COUNT(*), 2) as economy_rate,
-    COUNT(CASE WHEN wicket_type IS NOT NULL THEN 1 END) as wickets
-FROM deliveries 
-WHERE bowler IS NOT NULL
-GROUP BY bowler
-HAVING balls_bowled >= 50
-ORDER BY economy_rate ASC
-LIMIT 10;
+    p.player_name as bowler,
+    b.balls_bowled,
+    b.runs_conceded,
+    b.economy_rate,
+    b.wickets
+FROM (
+    SELECT 
+        bowler_key,
+        SUM(is_legal_ball) as balls_bowled,
+        SUM(total_runs) as runs_conceded,
+        ROUND(SUM(total_runs) * 6.0 / SUM(is_legal_ball), 2) as economy_rate,
+        SUM(is_bowler_wicket) as wickets
+    FROM fact_deliveries 
+    WHERE bowler_key IS NOT NULL
+    GROUP BY bowler_key
+    HAVING balls_bowled >= 50
+    ORDER BY economy_rate ASC
+    LIMIT 10
+) b
+JOIN dim_players p ON p.player_key = b.bowler_key
+ORDER BY b.economy_rate ASC;
 
 -- 17. Century makers analysis
 WITH batting_scores AS (
     SELECT 
-        d.batter,
+        d.batter_key,
         d.match_id,
         d.innings_number,
         SUM(d.batter_runs) as runs_scored
-    FROM deliveries d
-    WHERE d.batter IS NOT NULL
-    GROUP BY d.batter, d.match_id, d.innings_number
+    FROM fact_deliveries d
+    WHERE d.batter_key IS NOT NULL
+    GROUP BY d.batter_key, d.match_id, d.innings_number
 )
 SELECT 
-    batter,
+    p.player_name as batter,
     COUNT(*) as centuries,
-    MAX(runs_scored) as highest_score,
-    ROUND(AVG(runs_scored), 2) as avg_score
-FROM batting_scores
-WHERE runs_scored >= 100
-GROUP BY batter
+    MAX(s.runs_scored) as highest_score,
+    ROUND(AVG(s.runs_scored), 2) as avg_score
+FROM batting_scores s
+JOIN dim_players p ON p.player_key = s.batter_key
+WHERE s.runs_scored >= 100
+GROUP BY s.batter_key
 ORDER BY centuries DESC, highest_score DESC;
 
 -- 18. Win/Loss patterns by venue
@@ -258,15 +339,24 @@ ORDER BY matches DESC;
 
 -- 19. Powerplay analysis (first 6 overs)
 SELECT 
-    m.format,
-    COUNT(DISTINCT d.match_id) as matches,
-    ROUND(AVG(CASE WHEN d.over_number < 6 THEN d.total_runs END), 2) as avg_powerplay_runs_per_ball,
-    COUNT(CASE WHEN d.over_number < 6 AND d.wicket_type IS NOT NULL THEN 1 END) as powerplay_wickets,
-    COUNT(CASE WHEN d.over_number < 6 AND d.batter_runs >= 4 THEN 1 END) as powerplay_boundaries
-FROM deliveries d
-JOIN matches m ON d.match_id = m.match_id
-GROUP BY m.format
-ORDER BY avg_powerplay_runs_per_ball DESC;
+    f.format,
+    pp.matches,
+    pp.avg_powerplay_runs_per_ball,
+    pp.powerplay_wickets,
+    pp.powerplay_boundaries
+FROM (
+    SELECT 
+        d.format_key,
+        COUNT(DISTINCT d.match_id) as matches,
+        ROUND(AVG(CASE WHEN d.over_number < 6 THEN d.total_runs END), 2) as avg_powerplay_runs_per_ball,
+        COUNT(CASE WHEN d.over_number < 6 AND d.wicket_type IS NOT NULL THEN 1 END) as powerplay_wickets,
+        COUNT(CASE WHEN d.over_number < 6 AND d.batter_runs >= 4 THEN 1 END) as powerplay_boundaries
+    FROM fact_deliveries d
+    WHERE d.format_key IS NOT NULL
+    GROUP BY d.format_key
+) pp
+JOIN dim_formats f ON f.format_key = pp.format_key
+ORDER BY pp.avg_powerplay_runs_per_ball DESC;
 
 -- 20. Match outcome predictions based on first innings score
 SELECT 
@@ -285,4 +375,22 @@ FROM matches m
 JOIN innings i1 ON m.match_id = i1.match_id AND i1.innings_number = 1
 WHERE m.winner IS NOT NULL
 GROUP BY m.format, first_innings_score_range
-ORDER BY m.format, first_innings_score_range;
\ No newline at end of file
+ORDER BY m.format, first_innings_score_range;
+
+-- 21. Biggest comebacks: lowest win probability the eventual winner recovered from
+-- (ball-by-ball model, odis/t20s/ipl; built by scripts/win_probability.py)
+SELECT 
+    m.format,
+    m.match_id,
+    m.date,
+    m.winner,
+    CASE WHEN m.winner = m.team1 THEN m.team2 ELSE m.team1 END as loser,
+    ROUND(MIN(CASE WHEN i.batting_team = m.winner THEN w.win_probability
+                   ELSE 1 - w.win_probability END) * 100, 2) as lowest_win_percentage
+FROM win_probability w
+JOIN innings i ON i.match_id = w.match_id AND i.innings_number = w.innings_number
+JOIN matches m ON m.match_id = w.match_id
+WHERE m.winner IS NOT NULL
+GROUP BY m.match_id
+ORDER BY lowest_win_percentage ASC
+LIMIT 10;
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+import unittest
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from async_downloader import AsyncDownloader, DownloadIndex, TokenBucket, format_jobs
+
+class FlakyHandler(SimpleHTTPRequestHandler):
+    """Static files, failing the first `failures[path]` GETs of a path with 503"""
+
+    requests = None
+    failures = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append((self.path, dict(self.headers)))
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        super().do_GET()
+
+class AsyncDownloaderTest(unittest.TestCase):
+    """AsyncDownloader against http.server, as in test_delta_sync"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.site = os.path.join(self.tmp, 'site')
+        self.download_dir = os.path.join(self.tmp, 'raw_json')
+        os.makedirs(os.path.join(self.site, 'matches'))
+
+        self.matches = {f"{match_id}.json": {'info': {'match_type': 'Test'}, 'id': match_id}
+                        for match_id in (1001, 1002, 1003)}
+        for name, data in self.matches.items():
+            with open(os.path.join(self.site, 'matches', name), 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+        with open(os.path.join(self.site, 'matches', 'broken.json'), 'w', encoding='utf-8') as f:
+            f.write('{"info": ')
+
+        self.requests = []
+        self.failures = {}
+        handler = type('Handler', (FlakyHandler,), {'requests': self.requests, 'failures': self.failures})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=self.site))
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp)
+
+    def jobs(self, names=None):
+        links = [f"{self.base_url}/matches/{name}" for name in (names or self.matches)]
+        return format_jobs(links, self.download_dir, 'tests')
+
+    def downloader(self, **kwargs):
+        kwargs.setdefault('index_path', os.path.join(self.download_dir, 'download_index.json'))
+        return AsyncDownloader(rate=100, burst=100, backoff_base=0.01, **kwargs)
+
+    def dest(self, name):
+        return os.path.join(self.download_dir, 'tests', name)
+
+    def requests_for(self, name):
+        return [headers for path, headers in self.requests if path == f"/matches/{name}"]
+
+    def test_transient_503_is_retried(self):
+        self.failures['/matches/1001.json'] = 2
+        results = self.downloader().download_all(self.jobs())
+
+        self.assertEqual(set(results.values()), {'downloaded'})
+        self.assertEqual(len(self.requests_for('1001.json')), 3)
+        for name, data in self.matches.items():
+            with open(self.dest(name), 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f), data)
+
+    def test_gives_up_after_max_retries(self):
+        self.failures['/matches/1001.json'] = 10
+        results = self.downloader(max_retries=2).download_all(self.jobs(['1001.json']))
+
+        self.assertEqual(list(results.values()), ['failed'])
+        self.assertEqual(len(self.requests_for('1001.json')), 3)
+        self.assertFalse(os.path.exists(self.dest('1001.json')))
+
+    def test_invalid_json_is_not_written(self):
+        results = self.downloader().download_all(self.jobs(['broken.json', '1001.json']))
+
+        self.assertEqual(sorted(results.values()), ['downloaded', 'failed'])
+        self.assertFalse(os.path.exists(self.dest('broken.json')))
+        # Files are swapped into place, so no temporary files are left behind
+        self.assertEqual(os.listdir(os.path.join(self.download_dir, 'tests')), ['1001.json'])
+
+    def test_rerun_is_not_modified(self):
+        self.downloader().download_all(self.jobs())
+        index = DownloadIndex(os.path.join(self.download_dir, 'download_index.json'))
+        self.assertEqual(len(index.entries), len(self.matches))
+
+        self.requests.clear()
+        results = self.downloader().download_all(self.jobs())
+
+        self.assertEqual(set(results.values()), {'not_modified'})
+        self.assertTrue(all('If-Modified-Since' in headers for path, headers in self.requests))
+
+    def test_deleted_file_is_fetched_again(self):
+        self.downloader().download_all(self.jobs())
+        os.remove(self.dest('1002.json'))
+
+        self.requests.clear()
+        results = self.downloader().download_all(self.jobs())
+
+        self.assertEqual(results[f"{self.base_url}/matches/1002.json"], 'downloaded')
+        self.assertNotIn('If-Modified-Since', self.requests_for('1002.json')[0])
+        self.assertTrue(os.path.exists(self.dest('1002.json')))
+
+    def test_token_bucket_caps_the_rate(self):
+        async def acquire_all(bucket, count):
+            for _ in range(count):
+                await bucket.acquire()
+
+        start = time.monotonic()
+        asyncio.run(acquire_all(TokenBucket(rate=50, burst=2), 7))
+        # The burst goes at once, the other five wait 1/50 s each
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50 * 0.9)
+
+if __name__ == "__main__":
+    unittest.main()
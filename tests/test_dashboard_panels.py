@@ -0,0 +1,58 @@
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(REPO_DIR, 'scripts'))
+
+from data_processor import CricketDataProcessor
+from database_setup import setup_database
+from dashboard_queries import DashboardQueries, FORMAT_OPTIONS
+from frame_loader import load_processed_frames
+from panel_cache import db_panels, frame_panels
+
+RANKED_PANELS = ['top_run_scorers', 'top_wicket_takers', 'dismissal_types', 'team_wins',
+                 'batting_stats', 'bowling_stats']
+
+class DashboardPanelsTest(unittest.TestCase):
+    """The SQL panels against the pandas panels, from the same sample raw JSON"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cwd = os.getcwd()
+        cls.tmp = tempfile.mkdtemp()
+        shutil.copytree(os.path.join(REPO_DIR, 'data', 'raw_json'), os.path.join(cls.tmp, 'data', 'raw_json'))
+        os.chdir(cls.tmp)
+        CricketDataProcessor().process_all_formats()
+        assert setup_database()
+        cls.frames = load_processed_frames('data/processed')
+        cls.conn = sqlite3.connect(os.path.join('data', 'cricket_data.db'))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.tmp)
+
+    def test_ranked_panels_agree(self):
+        queries = DashboardQueries(self.conn)
+        for match_format in FORMAT_OPTIONS:
+            from_db = db_panels(queries, match_format)
+            from_frames = frame_panels(self.frames['matches'], self.frames['deliveries'],
+                                       self.frames['innings'], match_format)
+            for name in RANKED_PANELS:
+                with self.subTest(format=match_format, panel=name):
+                    # Same rows in the same order, ties included, and identical rounding
+                    expected = from_db[name].astype(object)
+                    actual = from_frames[name].astype(object)
+                    actual.index.name = expected.index.name
+                    pd.testing.assert_frame_equal(expected, actual, check_dtype=False,
+                                                  check_index_type=False, check_column_type=False)
+
+if __name__ == "__main__":
+    unittest.main()
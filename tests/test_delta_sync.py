@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import shutil
+import zipfile
+import tempfile
+import threading
+import unittest
+from datetime import date, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import data_processor
+from async_downloader import list_links
+from delta_sync import DeltaSync, SyncCatalogue, CATALOGUE_FILENAME, sync_and_ingest
+from raw_store import RawPack, pack_format
+
+TODAY = date.today()
+
+# Laid out like data/cricsheet_page.html: one <dd> of archive links per download
+PAGE = """<html><body><div class="data"><dl>
+{entries}
+</dl></div></body></html>
+"""
+PAGE_ENTRY = '<dt>{title}</dt>\n<dd>{count} matches - <a href="/downloads/{name}">JSON</a></dd>'
+
+def match_json(match_type, team_type='international', event=None):
+    info = {'match_type': match_type, 'team_type': team_type, 'teams': ['A', 'B']}
+    if event:
+        info['event'] = {'name': event}
+    return json.dumps({'meta': {'data_version': '1.1.0', 'revision': 1}, 'info': info, 'innings': []}).encode()
+
+def write_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as zip_ref:
+        for match_id, data in members.items():
+            zip_ref.writestr(f"{match_id}.json", data)
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    requested = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.requested.append(self.path)
+        super().do_GET()
+
+class DeltaSyncTest(unittest.TestCase):
+    """DeltaSync against a local copy of the Cricsheet site served over HTTP"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.site = os.path.join(self.tmp, 'site')
+        self.raw_dir = os.path.join(self.tmp, 'raw_json')
+        self.archive_dir = os.path.join(self.tmp, 'downloads')
+        os.makedirs(os.path.join(self.site, 'downloads'))
+        os.makedirs(os.path.join(self.raw_dir, 'tests'))
+
+        self.archives = {
+            'tests_json.zip': {'1001': match_json('Test'), '1002': match_json('Test')},
+            'odis_json.zip': {'2001': match_json('ODI')},
+            't20s_json.zip': {'3001': match_json('T20')},
+            'ipl_json.zip': {'4001': match_json('T20', 'club', 'Indian Premier League')},
+            # 1001 is already on disk and 5001 is a format we do not keep
+            'recently_added_7_json.zip': {'1001': match_json('Test'), '1003': match_json('Test'),
+                                          '2002': match_json('ODI'), '5001': match_json('MDM', 'club')},
+        }
+        for name, members in self.archives.items():
+            write_zip(os.path.join(self.site, 'downloads', name), members)
+
+        entries = [PAGE_ENTRY.format(title=name, count=len(members), name=name)
+                   for name, members in self.archives.items()]
+        with open(os.path.join(self.site, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(PAGE.format(entries='\n'.join(entries)))
+
+        with open(os.path.join(self.raw_dir, 'tests', '1001.json'), 'wb') as f:
+            f.write(match_json('Test'))
+
+        self.requested = []
+        handler = type('Handler', (QuietHandler,), {'requested': self.requested})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=self.site))
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp)
+
+    def last_synced(self, days_ago):
+        catalogue = SyncCatalogue(os.path.join(self.archive_dir, CATALOGUE_FILENAME), self.raw_dir)
+        catalogue.save(TODAY - timedelta(days=days_ago))
+
+    def fetched_archives(self):
+        return [path for path in self.requested if path.endswith('.zip')]
+
+    def assert_linked_from_page(self):
+        links = list_links(f"{self.base_url}/", suffix='.zip')
+        for path in self.fetched_archives():
+            self.assertIn(f"{self.base_url}{path}", links)
+
+    def test_recent_bundle_adds_only_unknown_matches(self):
+        self.last_synced(3)
+        added = DeltaSync(self.raw_dir, self.archive_dir, self.base_url).sync(TODAY)
+
+        self.assertEqual(added, {'tests': ['1003'], 'odis': ['2002'], 't20s': [], 'ipl': []})
+        self.assertEqual(self.fetched_archives(), ['/downloads/recently_added_7_json.zip'])
+        self.assertTrue(os.path.exists(os.path.join(self.raw_dir, 'odis', '2002.json')))
+        self.assertFalse(os.path.exists(os.path.join(self.raw_dir, 'tests', '5001.json')))
+
+        catalogue = SyncCatalogue(os.path.join(self.archive_dir, CATALOGUE_FILENAME), self.raw_dir)
+        self.assertEqual(catalogue.last_sync, TODAY.isoformat())
+        self.assertIn('5001', catalogue.skipped)
+        self.assert_linked_from_page()
+
+    def test_full_archives_when_bundle_is_missing(self):
+        os.remove(os.path.join(self.site, 'downloads', 'recently_added_7_json.zip'))
+        pack_format(self.raw_dir, 'tests', remove=True)
+        self.last_synced(3)
+
+        added = DeltaSync(self.raw_dir, self.archive_dir, self.base_url).sync(TODAY)
+
+        self.assertEqual(added, {'tests': ['1002'], 'odis': ['2001'], 't20s': ['3001'], 'ipl': ['4001']})
+        self.assertEqual(self.fetched_archives()[0], '/downloads/recently_added_7_json.zip')
+        self.assertEqual(sorted(self.fetched_archives()[1:]),
+                         ['/downloads/ipl_json.zip', '/downloads/odis_json.zip',
+                          '/downloads/t20s_json.zip', '/downloads/tests_json.zip'])
+
+        # The packed format takes the new match into its pack, not a loose file
+        self.assertEqual(RawPack(self.raw_dir, 'tests').match_ids(), ['1001', '1002'])
+        self.assertEqual(os.listdir(os.path.join(self.raw_dir, 'tests')), [])
+        self.assert_linked_from_page()
+
+    def test_ingest_receives_the_synced_ids(self):
+        self.last_synced(3)
+        with mock.patch.object(data_processor.CricketDataProcessor, 'process_all_formats') as process:
+            added = sync_and_ingest(self.raw_dir, self.archive_dir, self.base_url)
+
+        process.assert_called_once_with(incremental=True, match_ids=added)
+        self.assertEqual(added['tests'], ['1003'])
+
+if __name__ == "__main__":
+    unittest.main()
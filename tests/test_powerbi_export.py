@@ -0,0 +1,77 @@
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(REPO_DIR, 'scripts'))
+
+from data_processor import CricketDataProcessor
+from database_setup import setup_database
+from powerbi_data_prep import prepare_powerbi_data
+
+EXPORTS = ['matches', 'player_batting_stats', 'player_bowling_stats', 'team_performance',
+           'venue_analysis', 'match_outcomes']
+
+class PowerBIExportTest(unittest.TestCase):
+    """Power BI export against a database freshly built from the sample raw JSON
+
+    The scripts use paths relative to the repo root, so each test runs in a
+    scratch copy of that layout.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cwd = os.getcwd()
+        cls.tmp = tempfile.mkdtemp()
+        shutil.copytree(os.path.join(REPO_DIR, 'data', 'raw_json'), os.path.join(cls.tmp, 'data', 'raw_json'))
+        os.chdir(cls.tmp)
+        CricketDataProcessor().process_all_formats()
+        assert setup_database()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.tmp)
+
+    def read_exports(self):
+        return {name: pd.read_csv(os.path.join('data', 'powerbi', f"{name}.csv")) for name in EXPORTS}
+
+    def test_export_from_summary_tables(self):
+        prepare_powerbi_data()
+        exports = self.read_exports()
+
+        for name, df in exports.items():
+            self.assertFalse(df.empty, name)
+        self.assertTrue(exports['player_batting_stats']['player_name'].notna().all())
+        self.assertTrue(exports['player_bowling_stats']['player_name'].notna().all())
+
+    def test_summary_export_matches_delivery_export(self):
+        prepare_powerbi_data()
+        from_summaries = self.read_exports()
+
+        # Without the summary tables the player stats come from the deliveries
+        conn = sqlite3.connect(os.path.join('data', 'cricket_data.db'))
+        conn.execute("ALTER TABLE batter_format_stats RENAME TO batter_format_stats_saved")
+        conn.commit()
+        try:
+            prepare_powerbi_data()
+        finally:
+            conn.execute("ALTER TABLE batter_format_stats_saved RENAME TO batter_format_stats")
+            conn.commit()
+            conn.close()
+        from_deliveries = self.read_exports()
+
+        for name in ('player_batting_stats', 'player_bowling_stats'):
+            key = ['player_name', 'format']
+            expected = from_summaries[name].sort_values(key).reset_index(drop=True)
+            actual = from_deliveries[name].sort_values(key).reset_index(drop=True)
+            # Ratios are rounded by SQLite on one side and by pandas on the other
+            pd.testing.assert_frame_equal(expected, actual, check_dtype=False, check_exact=False, atol=0.011)
+
+if __name__ == "__main__":
+    unittest.main()